@@ -0,0 +1,213 @@
+import numpy as np
+
+from models.gesture import Gesture
+from models.gestures import Gestures
+from models.hand_frames import HandFrames
+
+
+class GestureAugmenter:
+    """ This is a class for generating randomly changed copies of gestures in batches of arrays for training.
+
+    Every sample of a batch is generated at once by broadcasting, following the array form of a hand side,
+    i.e 'RootPos' of shape (frames, 3) and joints relative to the wrist of shape (frames, joints, 3).
+    Each sample gets its own
+        rotation   : a rotation about the wrist by up to 'rotation_degrees' around a random axis. Joints are rotated
+                     around the wrist, and the path of the wrist is rotated around its first position,
+        scaling    : joints are scaled by a factor drawn from 'scale_range', like a bigger or smaller hand,
+        time warp  : frames are resampled along a random smooth timeline whose speed changes by about 'time_warp'
+                     (a fraction of the original speed) over the gesture,
+        jitter     : normal noise of standard deviation 'jitter' added to every joint coordinate,
+        mirroring  : a left hand is turned into a right hand or the other way around with 'mirror_probability'.
+                     In the recordings the left hand skeleton is the right hand one with every axis negated,
+                     so joints are negated, and the path of the wrist is mirrored across the plane x = 0
+
+    The same seed generates the same samples for the same sequence of calls.
+
+    at the time of instantiation, it takes the amount of each change described above and a seed
+    for its constructor
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # '__JOINT_MIRROR' turns joints of a hand side into joints of the other one, '__ROOT_POS_MIRROR' mirrors
+    # the wrist across the plane x = 0, and '__WARP_KNOTS' is the number of random speeds of a time warp
+    __JOINT_MIRROR = np.array([-1.0, -1.0, -1.0])
+    __ROOT_POS_MIRROR = np.array([-1.0, 1.0, 1.0])
+    __WARP_KNOTS = 4
+
+    def __init__(self, rotation_degrees: float = 15.0, scale_range: tuple = (0.9, 1.1), time_warp: float = 0.2,
+                 jitter: float = 0.001, mirror_probability: float = 0.0, seed: int = None):
+        if rotation_degrees < 0 or time_warp < 0 or jitter < 0:
+            raise ValueError('rotation_degrees, time_warp and jitter should not be negative')
+        if not 0 < scale_range[0] <= scale_range[1]:
+            raise ValueError('scale_range should be a positive range (minimum, maximum)')
+        if not 0 <= mirror_probability <= 1:
+            raise ValueError('mirror_probability should be between zero and one')
+        self.rotation_degrees = rotation_degrees
+        self.scale_range = tuple(scale_range)
+        self.time_warp = time_warp
+        self.jitter = jitter
+        self.mirror_probability = mirror_probability
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def get_other_hand(cls, hand_side: str) -> str:
+        return Gesture.left_hand() if hand_side == Gesture.right_hand() else Gesture.right_hand()
+
+    @classmethod
+    def mirror_arrays(cls, root_pos: np.ndarray, joints: np.ndarray) -> tuple:
+        """ Turning arrays of a hand side into arrays of the other hand side, see the class description
+        Returns:
+            tuple : (root_pos, joints) of the same shapes
+        """
+        return root_pos * cls.__ROOT_POS_MIRROR, joints * cls.__JOINT_MIRROR
+
+    @classmethod
+    def mirror_hand_frames(cls, hand_frames: HandFrames) -> HandFrames:
+        """ Turning frames of a hand side into frames of the other hand side with the same frame numbers """
+        root_pos, joints = cls.mirror_arrays(hand_frames.get_root_pos(), hand_frames.get_joints())
+        return HandFrames(cls.get_other_hand(hand_frames.hand_type), root_pos, joints,
+                          hand_frames.get_frame_numbers().copy())
+
+    def __get_rotations(self, count: int) -> np.ndarray:
+        """ Drawing rotation matrices of shape (count, 3, 3) about random axes by Rodrigues' formula """
+        axes = self.rng.normal(size=(count, 3))
+        axes /= np.linalg.norm(axes, axis=-1, keepdims=True)
+        angles = np.radians(self.rng.uniform(-self.rotation_degrees, self.rotation_degrees, count))
+        cross = np.zeros((count, 3, 3))
+        cross[:, 0, 1], cross[:, 0, 2], cross[:, 1, 2] = -axes[:, 2], axes[:, 1], -axes[:, 0]
+        cross -= cross.transpose(0, 2, 1)
+        sin, cos = np.sin(angles)[:, np.newaxis, np.newaxis], np.cos(angles)[:, np.newaxis, np.newaxis]
+        return np.eye(3) + sin * cross + (1 - cos) * (cross @ cross)
+
+    def __get_warp_positions(self, count: int, frame_count: int, length: int) -> np.ndarray:
+        """ Drawing monotonic fractional frame indexes of shape (count, length) from the first frame to the last one.
+        Speeds at a few knots are interpolated over the timeline and accumulated into positions """
+        log_speeds = self.rng.normal(0, self.time_warp, (count, self.__WARP_KNOTS)) if self.time_warp > 0 \
+            else np.zeros((count, self.__WARP_KNOTS))
+        knot_positions = np.linspace(0, self.__WARP_KNOTS - 1, length)
+        left = np.minimum(knot_positions.astype(np.intp), self.__WARP_KNOTS - 2)
+        weight = knot_positions - left
+        speeds = np.exp(log_speeds[:, left] * (1 - weight) + log_speeds[:, left + 1] * weight)
+        positions = np.concatenate([np.zeros((count, 1)), np.cumsum(speeds[:, 1:], axis=-1)], axis=-1)
+        return positions / np.maximum(positions[:, -1:], 1e-12) * (frame_count - 1)
+
+    @staticmethod
+    def __interpolate(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """ Linearly interpolating an array of shape (frames, ...) at positions of shape (count, length)
+        into an array of shape (count, length, ...).
+        Positions within rounding of a frame take that frame as it is, so a missing value of the next frame
+        is not carried into it """
+        rounded = np.round(positions)
+        positions = np.where(np.abs(positions - rounded) < 1e-9, rounded, positions)
+        left = np.floor(positions).astype(np.intp)
+        right = np.minimum(left + 1, len(values) - 1)
+        weight = (positions - left).reshape(positions.shape + (1,) * (values.ndim - 1))
+        return np.where(weight == 0, values[left], values[left] * (1 - weight) + values[right] * weight)
+
+    def augment(self, root_pos: np.ndarray, joints: np.ndarray, count: int, hand_side: str, length: int = None,
+                target_hand_side: str = None) -> tuple:
+        """ Generating augmented samples of a hand side
+        Parameters:
+            root_pos(np.ndarray) : 'RootPos' of each frame, shape (frames, 3),
+            joints(np.ndarray) : joints of each frame, shape (frames, joints, 3),
+            count(int) : the number of samples,
+            hand_side(str) : hand side of the arrays e.g 'R' or 'L',
+            length(int) : the number of frames of every sample, the number of frames of the arrays if it is None,
+            target_hand_side(str) : if it is given, every sample is turned into this hand side
+                                    instead of being mirrored at random
+
+        Returns:
+            tuple : (root_pos, joints, hand_sides) where root_pos is of shape (count, length, 3), joints is of shape
+                    (count, length, joints, 3) and hand_sides is an array of the hand side of each sample
+        """
+        root_pos = np.asarray(root_pos, dtype=np.float64)
+        joints = np.asarray(joints, dtype=np.float64)
+        if len(joints) == 0:
+            raise ValueError('the arrays should have at least one frame')
+        length = len(joints) if length is None else length
+        if count < 0 or length < 1:
+            raise ValueError('count should not be negative and length should be at least one')
+
+        positions = self.__get_warp_positions(count, len(joints), length)
+        sample_root_pos = self.__interpolate(root_pos, positions)
+        sample_joints = self.__interpolate(joints, positions)
+
+        rotations = self.__get_rotations(count)
+        scales = self.rng.uniform(self.scale_range[0], self.scale_range[1], count)
+        # joints are rotated and scaled around the wrist, which is their origin
+        # (row vectors are multiplied by transposed matrices, so every frame of a sample is one matrix product)
+        transforms = (rotations * scales[:, np.newaxis, np.newaxis]).transpose(0, 2, 1)
+        sample_joints = (sample_joints.reshape(count, length * joints.shape[1], 3) @ transforms) \
+            .reshape(sample_joints.shape)
+        start = sample_root_pos[:, :1]
+        sample_root_pos = (sample_root_pos - start) @ rotations.transpose(0, 2, 1) + start
+        if self.jitter > 0:
+            sample_joints += self.jitter * self.rng.standard_normal(sample_joints.shape)
+
+        if target_hand_side is not None:
+            mirrored = np.full(count, target_hand_side != hand_side)
+        else:
+            mirrored = self.rng.random(count) < self.mirror_probability
+        if mirrored.any():
+            sample_root_pos[mirrored], sample_joints[mirrored] = self.mirror_arrays(sample_root_pos[mirrored],
+                                                                                    sample_joints[mirrored])
+        hand_sides = np.where(mirrored, self.get_other_hand(hand_side), hand_side)
+        return sample_root_pos, sample_joints, hand_sides
+
+    def augment_hand_frames(self, hand_frames: HandFrames, count: int, length: int = None,
+                            target_hand_side: str = None) -> tuple:
+        """ Generating augmented samples of frames of a hand side, see 'augment' """
+        return self.augment(hand_frames.get_root_pos(), hand_frames.get_joints(), count, hand_frames.hand_type,
+                            length, target_hand_side)
+
+    def augment_gesture(self, gesture: Gesture, count: int, length: int = None, target_hand_side: str = None) -> dict:
+        """ Generating augmented samples of each hand side of a gesture, see 'augment'
+        Returns:
+            dict : (root_pos, joints, hand_sides) for each hand side having frames e.g {'R': (...), 'L': (...)}
+        """
+        sample_dict = dict()
+        for hand_side in (Gesture.right_hand(), Gesture.left_hand()):
+            hand_frames = gesture.get_hand_frames(hand_side)
+            if len(hand_frames) > 0:
+                sample_dict.update({hand_side: self.augment_hand_frames(hand_frames, count, length,
+                                                                        target_hand_side)})
+        return sample_dict
+
+    def iter_batches(self, gestures: Gestures, batch_size: int = 64, length: int = 64, target_hand_side: str = None,
+                     batch_count: int = None):
+        """ Generating batches of augmented samples drawn from every hand side of every gesture
+        Parameters:
+            gestures(Gestures) : gestures to draw samples from,
+            batch_size(int) : the number of samples in each batch,
+            length(int) : the number of frames of every sample,
+            target_hand_side(str) : see 'augment',
+            batch_count(int) : the number of batches, batches are generated forever if it is None
+
+        Returns:
+            generator : (root_pos, joints, gesture_names, hand_sides) for each batch, where the arrays are
+                        of shape (batch_size, length, 3) and (batch_size, length, joints, 3), and the names and
+                        hand sides are arrays of labels of each sample
+
+        the source of each sample is drawn uniformly from hand sides of the gestures, and the samples drawn from
+        the same source are generated at once
+        """
+        sources = [(gesture.gesture_name, gesture.get_hand_frames(hand_side))
+                   for gesture in gestures.get_list_of_gesture().values()
+                   for hand_side in (Gesture.right_hand(), Gesture.left_hand())
+                   if len(gesture.get_frames_data_in_dict().get(hand_side, [])) > 0]
+        if len(sources) == 0:
+            raise ValueError('gestures should have at least one hand side with frames')
+        joint_number = sources[0][1].get_joints().shape[1]
+        batch_number = 0
+        while batch_count is None or batch_number < batch_count:
+            source_indexes = self.rng.integers(0, len(sources), batch_size)
+            root_pos = np.empty((batch_size, length, 3))
+            joints = np.empty((batch_size, length, joint_number, 3))
+            hand_sides = np.empty(batch_size, dtype='<U1')
+            for source_index in np.unique(source_indexes):
+                rows = np.flatnonzero(source_indexes == source_index)
+                root_pos[rows], joints[rows], hand_sides[rows] = self.augment_hand_frames(
+                    sources[source_index][1], len(rows), length, target_hand_side)
+            gesture_names = np.array([sources[source_index][0] for source_index in source_indexes])
+            yield root_pos, joints, gesture_names, hand_sides
+            batch_number += 1
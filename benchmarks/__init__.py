@@ -0,0 +1,3 @@
+""" Benchmarks of loading, extraction and visualisation, run with 'python -m benchmarks' from the repository root """
+from benchmarks.runner import BenchmarkRunner, compare_results, print_results, save_results
+from benchmarks.synthetic import SyntheticCorpus
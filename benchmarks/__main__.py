@@ -0,0 +1,53 @@
+import argparse
+import json
+import sys
+import tempfile
+
+from benchmarks.runner import BenchmarkRunner, compare_results, print_results, save_results
+from benchmarks.synthetic import SyntheticCorpus
+from models.gesture import Gesture
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time loading, extraction and visualisation of gesture data files')
+    parser.add_argument('--data-dir', help='directory of data files to use instead of a synthetic corpus')
+    parser.add_argument('--gestures', type=int, default=10, help='number of synthetic gestures')
+    parser.add_argument('--frames', type=int, default=300, help='number of frames of each synthetic file')
+    parser.add_argument('--hand', default=Gesture.both_hand(),
+                        choices=[Gesture.right_hand(), Gesture.left_hand(), Gesture.both_hand()],
+                        help='hand sides of each synthetic gesture')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs of each benchmark')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes of read_data_files')
+    parser.add_argument('--benchmarks', nargs='*', help='names of benchmarks to run, every benchmark by default')
+    parser.add_argument('--output', help='JSON file to write the result to')
+    parser.add_argument('--compare', help='JSON file of a baseline result, exits with 1 if a benchmark regressed')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed slowdown against the baseline')
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        data_dir = arguments.data_dir
+        if data_dir is None:
+            data_dir = temporary_dir
+            SyntheticCorpus.generate_corpus(data_dir, arguments.gestures, arguments.frames, arguments.hand,
+                                            arguments.seed)
+        result = BenchmarkRunner(data_dir, arguments.repeat, arguments.workers).run(arguments.benchmarks)
+    result['metadata'].update({'synthetic': arguments.data_dir is None})
+    if arguments.data_dir is None:
+        result['metadata'].update({'gestures': arguments.gestures, 'frames_per_file': arguments.frames,
+                                   'hand': arguments.hand, 'seed': arguments.seed})
+
+    print_results(result)
+    if arguments.output is not None:
+        save_results(result, arguments.output)
+
+    if arguments.compare is not None:
+        with open(arguments.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressed = False
+        for (name, baseline_time, current_time, ratio, is_regressed) in compare_results(baseline, result,
+                                                                                         arguments.tolerance):
+            print(f"{name:34s} {baseline_time * 1000:10.2f} ms -> {current_time * 1000:10.2f} ms  x{ratio:.2f}"
+                  f"{'  REGRESSED' if is_regressed else ''}")
+            regressed = regressed or is_regressed
+        if regressed:
+            sys.exit(1)
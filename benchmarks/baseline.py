@@ -0,0 +1,84 @@
+""" A frozen copy of the line by line reader the package started with, timed as the reference of the benchmarks.
+It is kept as it was apart from reading a given directory without changing the current directory,
+so that the benchmarks always compare the current code with the original one """
+import glob
+import os
+import pathlib
+import re
+import sys
+
+from models.frame import Frame
+from models.gesture import Gesture
+from models.gestures import Gestures
+
+
+def set_finger_data(finger_type: str, finger_data: tuple, frame: Frame):
+    """ Setting a finger data for the frame in accordance with finger type, the frame holds finger dictionaries """
+    if finger_type.find('Thumb') != -1:
+        frame.get_thumb_data()[finger_type] = finger_data
+    elif finger_type.find('Index') != -1:
+        frame.get_index_finger_data()[finger_type] = finger_data
+    elif finger_type.find('Middle') != -1:
+        frame.get_middle_finger_data()[finger_type] = finger_data
+    elif finger_type.find('Ring') != -1:
+        frame.get_ring_finger_data()[finger_type] = finger_data
+    elif finger_type.find('Pinky') != -1:
+        frame.get_pinky_data()[finger_type] = finger_data
+
+
+def is_root_pos(text_line: str):
+    return text_line.find('RootPos') != -1
+
+
+def read_gesture(file_name: str) -> Gesture:
+    """ Read a text file for a gesture line by line into a list of Frame objects per hand side
+    Parameters:
+        file_name(str): file name string
+
+    Returns:
+        Gesture : an instance of Gesture object
+    """
+
+    # 'pathlib.Path(file_name).stem' will remove extension from the file_name
+    file_name_array = pathlib.Path(file_name).stem.split('_')
+    gesture_name = file_name_array[2] + ' ' + file_name_array[3]
+    gesture = Gesture(gesture_name)
+    hand_type = Gesture.left_hand() if file_name_array[0] == 'Left' else Gesture.right_hand()
+
+    # this pattern will be used extract hands coordinate data from each lines of the given file
+    pattern = re.compile(r'(.*)(\s*,\s*)(\(.*\))')
+
+    with open(file_name) as fopen:
+        lines = fopen.readlines()
+        frame_number = 0
+        for line in lines:
+            match = pattern.search(line)
+            if match:  # line is in a format of '<finger_type>, (<coordinate data>)'
+                finger_type = match.group(1).strip()
+                # eval method will convert a string of '(<coordinate data>)' to a tuple
+                finger_data = eval(match.group(3).strip())
+                if is_root_pos(finger_type):  # the line is about 'RootPos'
+                    frame_number += 1  # a new frame starts so increase the frame number
+                    root_pos = finger_data
+                    frame = Frame(hand_type, frame_number, root_pos)  # declare and initialise an instance of Frame
+                    gesture.set_frames_data(frame)  # add the frame into a Gesture instance
+
+                # skip the line if it starts with 'Hand_Start' or 'Hand_ForearmStub',
+                # and the line is NOT about 'RootPos'
+                elif finger_type.find('Hand_Start') != 0 and finger_type.find('Hand_ForearmStub') != 0:
+                    set_finger_data(finger_type.split('_')[1], finger_data, frame)
+    return gesture
+
+
+def read_data_files(data_dir: str) -> Gestures:
+    """ Read all the hand gesture data files of a directory one by one with 'read_gesture' """
+    gesture_list = Gestures()
+    for file in glob.glob(os.path.join(glob.escape(data_dir), '*.txt')):
+        try:
+            gesture_list.add_gesture(read_gesture(file))
+        except IOError as ioe:
+            print(f'{ioe}: File not found or unreadable', file=sys.stderr)
+        except Exception as ie:
+            print(f'{ie}: Data file is ill-formatted', file=sys.stderr)
+
+    return gesture_list
@@ -0,0 +1,245 @@
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import main
+from benchmarks import baseline
+from gesture_parser import parse_file_name, parse_gesture_file
+from models.frame import Frame
+from models.gesture import Gesture
+from models.gestures import Gestures
+from visualisation import Visualization
+
+_FINGER_LIST = [Frame.get_thumb_finger(), Frame.get_index_finger(), Frame.get_middle_finger(),
+                Frame.get_ring_finger(), Frame.get_pinky_finger()]
+
+
+class BenchmarkRunner:
+    """ This is a class for timing loading, extraction and visualisation of a directory of data files.
+
+    Each benchmark is timed 'repeat' times, and then run once more under tracemalloc to record its peak memory,
+    so tracing does not slow down the timed runs. Work which is not measured, e.g reading the gestures to extract
+    fingers from, is done before each run and is not timed.
+    The original code, a frozen copy of the line by line reader the package started with (see 'baseline'),
+    is measured as the reference of reading ('read_gesture_baseline' and 'read_data_files_baseline').
+    The current code is measured both with a list of Frame objects per hand side ('read_gesture', 'read_data_files',
+    'extract_finger_frame', 'Visualization.update') and with its fast paths (compact storage, array extraction,
+    precomputed line data), so all of them can be compared in one result.
+
+    at the time of instantiation, it takes a data directory, the number of timed runs and the number of worker
+    processes of 'read_data_files' for its constructor
+    """
+
+    def __init__(self, data_dir: str, repeat: int = 5, workers: int = 1):
+        self.data_dir = os.path.abspath(data_dir)
+        self.repeat = max(1, repeat)
+        self.workers = workers
+        self.files = sorted(glob.glob(os.path.join(self.data_dir, '*.txt')))
+        # benchmark name and a function returning the arguments of a run, and the run itself
+        self.__benchmarks = {
+            'read_gesture_baseline': (self.__no_setup, self.__read_gesture_baseline),
+            'read_gesture': (self.__no_setup, self.__read_gesture),
+            'read_gesture_compact': (self.__no_setup, self.__read_gesture_compact),
+            'read_data_files_baseline': (self.__no_setup, self.__read_data_files_baseline),
+            'read_data_files': (self.__no_setup, self.__read_data_files),
+            'read_data_files_compact': (self.__no_setup, self.__read_data_files_compact),
+            'Gestures.add_gesture': (self.__create_gestures, self.__add_gestures),
+            'extract_finger_frame': (self.__read_gestures, self.__extract_finger_frame),
+            'extract_finger_array': (self.__read_gestures_compact, self.__extract_finger_array),
+            'Visualization.update': (self.__create_lines, self.__update),
+            'Visualization.update_precomputed': (self.__create_lines, self.__update_precomputed),
+        }
+
+    def get_benchmark_names(self) -> list:
+        return list(self.__benchmarks.keys())
+
+    def get_corpus_information(self) -> dict:
+        """ Getting the number of files, frames and bytes of the data directory """
+        frame_count = 0
+        for file_name in self.files:
+            root_pos, _ = parse_gesture_file(file_name)
+            frame_count += len(root_pos)
+        return {'data_dir': self.data_dir, 'files': len(self.files), 'frames': frame_count,
+                'bytes': sum(os.path.getsize(file_name) for file_name in self.files)}
+
+    def run(self, benchmark_names: list = None) -> dict:
+        """ Running benchmarks
+        Parameters:
+            benchmark_names(list) : names of benchmarks to run, every benchmark if it is None
+
+        Returns:
+            dict : a JSON serialisable result, {'metadata': {..}, 'benchmarks': {name: {..}}}.
+                   Times are in seconds and the peak memory is in bytes
+        """
+        if benchmark_names is None:
+            benchmark_names = self.get_benchmark_names()
+        unknown_names = [name for name in benchmark_names if name not in self.__benchmarks]
+        if len(unknown_names) != 0:
+            raise ValueError(f'{unknown_names} are not one of {self.get_benchmark_names()}')
+
+        corpus = self.get_corpus_information()
+        results = dict()
+        for name in benchmark_names:
+            setup, benchmark = self.__benchmarks[name]
+            times = []
+            for _ in range(self.repeat):
+                arguments = setup()
+                start = time.perf_counter()
+                benchmark(*arguments)
+                times.append(time.perf_counter() - start)
+
+            arguments = setup()
+            tracemalloc.start()
+            try:
+                benchmark(*arguments)
+                _, peak_memory = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            results.update({name: {'min_s': min(times), 'mean_s': statistics.mean(times),
+                                   'median_s': statistics.median(times),
+                                   'stdev_s': statistics.stdev(times) if len(times) > 1 else 0.0,
+                                   'frames_per_s': corpus['frames'] / min(times) if min(times) > 0 else None,
+                                   'peak_memory_bytes': peak_memory, 'times_s': times}})
+
+        return {'metadata': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'python': platform.python_version(),
+                             'numpy': np.__version__, 'platform': platform.platform(), 'repeat': self.repeat,
+                             'workers': self.workers, 'corpus': corpus},
+                'benchmarks': results}
+
+    # functions below are setups returning the arguments of a run, and the runs themselves
+    @staticmethod
+    def __no_setup() -> tuple:
+        return tuple()
+
+    def __read_gesture_baseline(self):
+        for file_name in self.files:
+            baseline.read_gesture(file_name)
+
+    def __read_gesture(self):
+        for file_name in self.files:
+            main.read_gesture(file_name, compact=False)
+
+    def __read_gesture_compact(self):
+        for file_name in self.files:
+            main.read_gesture(file_name)
+
+    def __read_data_files_baseline(self):
+        baseline.read_data_files(self.data_dir)
+
+    def __read_data_files(self):
+        self.__read_data_directory(compact=False)
+
+    def __read_data_files_compact(self):
+        self.__read_data_directory(compact=True)
+
+    def __read_data_directory(self, compact: bool) -> Gestures:
+        return main.read_data_files(compact=compact, use_cache=False, workers=self.workers, data_dir=self.data_dir)
+
+    def __create_gestures(self) -> tuple:
+        """ Creating a Gesture object of each file, they are created again for every run because adding a gesture
+        to Gestures changes the gesture already added under the same name """
+        gesture_list = []
+        for file_name in self.files:
+            gesture_name, hand_type = parse_file_name(file_name)
+            root_pos, joints = parse_gesture_file(file_name)
+            gesture_list.append(main.create_gesture(gesture_name, hand_type, root_pos, joints, compact=False))
+        return (gesture_list,)
+
+    @staticmethod
+    def __add_gestures(gesture_list: list):
+        gestures = Gestures()
+        for gesture in gesture_list:
+            gestures.add_gesture(gesture)
+
+    def __read_gestures(self) -> tuple:
+        return (self.__read_data_directory(compact=False),)
+
+    def __read_gestures_compact(self) -> tuple:
+        return (self.__read_data_directory(compact=True),)
+
+    @staticmethod
+    def __extract_finger_frame(gestures: Gestures):
+        for gesture_name in gestures.get_list_of_gesture().keys():
+            main.extract_finger_frame(gesture_name, Gesture.both_hand(), _FINGER_LIST, gestures)
+
+    @staticmethod
+    def __extract_finger_array(gestures: Gestures):
+        for gesture_name in gestures.get_list_of_gesture().keys():
+            main.extract_finger_array(gesture_name, Gesture.both_hand(), _FINGER_LIST, gestures)
+
+    def __create_lines(self) -> tuple:
+        """ Creating a Line2D of each finger of each hand side of each gesture on a figure of the Agg canvas,
+        so that no display is needed """
+        gestures = self.__read_data_directory(compact=False)
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(projection='3d')
+        gesture_lines = []
+        for gesture in gestures.get_list_of_gesture().values():
+            hand_finger = dict()
+            for (hand_side, hand_frame_data) in gesture.get_frames_data_in_dict().items():
+                if len(hand_frame_data) > 0:
+                    hand_finger.update({hand_side: {finger: ax.plot([0], [0], [0], 'o-')[0]
+                                                    for finger in _FINGER_LIST}})
+            # frames both hand sides have, so that 'Visualization.update' does not run past the shorter one
+            frame_count = min(len(frames) for frames in gesture.get_frames_data_in_list() if len(frames) > 0)
+            gesture_lines.append((gesture, hand_finger, frame_count))
+        return (gesture_lines,)
+
+    @staticmethod
+    def __update(gesture_lines: list):
+        for (gesture, hand_finger, frame_count) in gesture_lines:
+            all_frames = gesture.get_frames_data_in_list()
+            # 'Visualization.update' is called with frame numbers 0 .. frames - 1 by FuncAnimation
+            for frame_number in range(frame_count):
+                Visualization.update(frame_number, hand_finger, all_frames)
+
+    @staticmethod
+    def __update_precomputed(gesture_lines: list):
+        for (gesture, hand_finger, frame_count) in gesture_lines:
+            line_data = Visualization.precompute_line_data(gesture)
+            for frame_index in range(frame_count):
+                Visualization.update_precomputed(frame_index, hand_finger, line_data)
+
+
+def compare_results(baseline: dict, current: dict, tolerance: float = 0.1) -> list:
+    """ Comparing benchmark results with a baseline result
+    Parameters:
+        baseline(dict), current(dict) : results of 'BenchmarkRunner.run' e.g loaded from JSON files,
+        tolerance(float) : a benchmark is regressed when it is slower than the baseline by more than this fraction
+
+    Returns:
+        list : (name, baseline min time, current min time, ratio, regressed) of each benchmark in both results.
+               Minimum times are compared because they are the least affected by other work on the machine
+    """
+    comparison = []
+    for (name, result) in current['benchmarks'].items():
+        if name in baseline['benchmarks']:
+            baseline_time = baseline['benchmarks'][name]['min_s']
+            ratio = result['min_s'] / baseline_time if baseline_time > 0 else float('inf')
+            comparison.append((name, baseline_time, result['min_s'], ratio, ratio > 1 + tolerance))
+    return comparison
+
+
+def print_results(result: dict, file=sys.stdout):
+    """ Writing a summary table of a result """
+    corpus = result['metadata']['corpus']
+    print(f"{corpus['files']} files, {corpus['frames']} frames, {corpus['bytes']} bytes", file=file)
+    for (name, benchmark) in result['benchmarks'].items():
+        print(f"{name:34s} min {benchmark['min_s'] * 1000:10.2f} ms  mean {benchmark['mean_s'] * 1000:10.2f} ms  "
+              f"peak {benchmark['peak_memory_bytes'] / 2 ** 20:8.2f} MiB", file=file)
+
+
+def save_results(result: dict, output_path: str):
+    with open(output_path, 'w') as output_file:
+        json.dump(result, output_file, indent=2)
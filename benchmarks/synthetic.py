@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+
+from gesture_parser import format_gesture_text
+from models.frame import Frame
+from models.gesture import Gesture
+
+
+class SyntheticCorpus:
+    """ This is a class to generate synthetic hand gesture recordings in the same format as the 'data/*.txt' files,
+    so that loading, extraction and visualisation can be measured on corpora of any size.
+
+    Each file starts with a UTF-8 byte order mark and is formatted by 'gesture_parser.format_gesture_text'.
+    Joint coordinates are relative to the wrist, and fingers bend and the wrist moves smoothly over time,
+    so the values stay within the ranges of the real recordings.
+    In the program, all methods are class methods, and therefore this class will NOT be instantiated.
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # direction of each finger from the wrist and the length of each bone of it
+    __FINGER_DIRECTIONS = {Frame.get_thumb_finger(): (-0.6, -0.3, -0.6), Frame.get_index_finger(): (-1.0, -0.1, -0.2),
+                           Frame.get_middle_finger(): (-1.0, -0.1, 0.05), Frame.get_ring_finger(): (-1.0, -0.1, 0.2),
+                           Frame.get_pinky_finger(): (-0.8, -0.1, 0.4)}
+    __BONE_LENGTH = 0.025
+    __ROOT_POS = (0.19, 0.88, 0.34)
+
+    @classmethod
+    def get_file_name(cls, gesture_number: int, hand_side: str) -> str:
+        """ Getting a data file name e.g 'Right_Hand_Gesture_4.txt' """
+        hand_name = 'Right' if hand_side == Gesture.right_hand() else 'Left'
+        return f'{hand_name}_Hand_Gesture_{gesture_number}.txt'
+
+    @classmethod
+    def generate_arrays(cls, frame_count: int, seed: int = 0) -> tuple:
+        """ Generating a recording of a hand side
+        Parameters:
+            frame_count(int) : the number of frames,
+            seed(int) : seed of the random motion, the same seed always generates the same recording
+
+        Returns:
+            tuple : (root_pos, joints) as described in 'gesture_parser.parse_gesture_text'
+        """
+        rng = np.random.default_rng(seed)
+        time_axis = np.linspace(0, 2 * np.pi, frame_count)[:, np.newaxis]
+        joint_number = len(Frame.get_joint_names())
+
+        root_pos = np.asarray(cls.__ROOT_POS) + 0.05 * np.sin(time_axis * rng.uniform(0.5, 2, 3) + rng.uniform(0, 6, 3))
+        joints = np.zeros((frame_count, joint_number, 3))  # 'Start' and 'ForearmStub' stay at the wrist
+        for (finger, direction) in cls.__FINGER_DIRECTIONS.items():
+            columns = Frame.get_finger_joint_columns(finger)
+            direction = np.asarray(direction) / np.linalg.norm(direction)
+            # each finger curls towards the palm (negative Y) and back at its own pace
+            curl = 0.5 * (1 - np.cos(time_axis * rng.uniform(1, 4) + rng.uniform(0, 6)))
+            position = np.zeros((frame_count, 3))
+            for (bone, column) in enumerate(columns):
+                angle = curl * (bone + 1) * 0.35
+                bone_direction = direction * np.cos(angle) + np.array([0.0, -1.0, 0.0]) * np.sin(angle)
+                position = position + cls.__BONE_LENGTH * bone_direction
+                joints[:, column] = position
+        joints[:, 2:] += rng.normal(0, 0.0005, (frame_count, joint_number - 2, 3))
+        return root_pos, joints
+
+    @classmethod
+    def generate_corpus(cls, output_dir: str, gesture_count: int = 10, frame_count: int = 300,
+                        hand_side: str = Gesture.both_hand(), seed: int = 0) -> list:
+        """ Writing synthetic data files into a directory
+        Parameters:
+            output_dir(str) : a directory to write files in, it is created if it does not exist,
+            gesture_count(int) : the number of gestures, numbered from one,
+            frame_count(int) : the number of frames of each file,
+            hand_side(str) : 'R', 'L' or 'B' for a file of each hand side per gesture,
+            seed(int) : seed of the random motion
+
+        Returns:
+            list : paths of the written files
+        """
+        hand_side_list = [Gesture.left_hand(), Gesture.right_hand()] if hand_side == Gesture.both_hand() \
+            else [hand_side]
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for gesture_number in range(1, gesture_count + 1):
+            for (hand_index, each_hand_side) in enumerate(hand_side_list):
+                root_pos, joints = cls.generate_arrays(frame_count, seed * 1000 + gesture_number * 2 + hand_index)
+                path = os.path.join(output_dir, cls.get_file_name(gesture_number, each_hand_side))
+                with open(path, 'w', encoding='utf-8-sig', newline='') as data_file:
+                    data_file.write(format_gesture_text(root_pos, joints))
+                paths.append(path)
+        return paths
@@ -0,0 +1,234 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+from models.frame import Frame
+from models.gesture import Gesture
+from models.gestures import Gestures
+
+
+class GestureLoader:
+    """ This is a class for iterating over a corpus of gestures in shuffled mini-batches of arrays for training.
+
+    Every hand side of every gesture is a sample, labelled by its gesture name. A batch is a dictionary
+        {'joints': array of shape (batch, frames, joints, 3), 'root_pos': array of shape (batch, frames, 3),
+         'mask': boolean array of shape (batch, frames), True for real frames and False for padding,
+         'lengths': the number of real frames of each sample, 'labels': index of each gesture name in
+         'get_label_names()', 'gesture_names': gesture name of each sample, 'hand_sides': hand side of each sample}
+    Samples shorter than the longest sample of their batch are padded with zeros after their last frame.
+    Batches are made of samples in a random order ('pad'), or of samples of similar lengths ('bucket') so that
+    little padding is needed, in which case the order of batches is random instead.
+    Missing joints (NaN) are kept as they are.
+
+    Batches are assembled in a background thread and kept in a queue of 'prefetch' batches, so the next batches are
+    ready while the current one is used. The order of samples in each epoch only depends on the seed and the number
+    of the epoch.
+
+    at the time of instantiation, it takes Gestures or a data directory, a batch size, a list of fingers
+    (every joint if None), a hand side ('R', 'L' or 'B'), a batching mode, whether to shuffle, whether to drop
+    the last incomplete batch, the number of prefetched batches, a seed, a float type, the maximum number of frames
+    of a sample (longer samples are cut, None keeps every frame) and a GestureAugmenter changing each sample
+    for its constructor
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # each of them represents a way to put samples into batches
+    __PAD = 'pad'
+    __BUCKET = 'bucket'
+    __MODES = (__PAD, __BUCKET)
+
+    @classmethod
+    def get_modes(cls) -> tuple:
+        return cls.__MODES
+
+    def __init__(self, source, batch_size: int = 16, finger_name_list: list = None,
+                 hand_side: str = Gesture.both_hand(), mode: str = 'pad', shuffle: bool = True, drop_last: bool = False,
+                 prefetch: int = 2, seed: int = None, dtype=np.float32, max_frames: int = None, augmenter=None):
+        if mode not in self.__MODES:
+            raise ValueError(f'{mode} is not one of {self.__MODES}')
+        if batch_size < 1 or prefetch < 1:
+            raise ValueError('batch_size and prefetch should be at least one')
+        if isinstance(source, Gestures):
+            gestures = source
+        else:
+            import main  # importing 'main' at the module level would import matplotlib for every user
+
+            gestures = main.read_data_files(data_dir=source)
+        self.batch_size = batch_size
+        self.mode = mode
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.prefetch = prefetch
+        self.seed = seed
+        self.dtype = dtype
+        self.augmenter = augmenter
+        self.__epoch = 0
+        self.__statistics = {'epochs': 0, 'batches': 0, 'samples': 0, 'frames': 0, 'batch_frames': 0,
+                             'assembly_seconds': 0.0, 'wait_seconds': 0.0, 'elapsed_seconds': 0.0}
+        self.__lock = threading.Lock()
+
+        hand_side_list = [Gesture.right_hand(), Gesture.left_hand()] if hand_side == Gesture.both_hand() \
+            else [hand_side]
+        # samples are kept as arrays of each hand side, fingers are selected once here
+        self.__samples = []
+        self.joint_names = Frame.get_joint_names()
+        for gesture in gestures.get_list_of_gesture().values():
+            for each_hand_side in hand_side_list:
+                hand_frames = gesture.get_hand_frames(each_hand_side)
+                if len(hand_frames) == 0:
+                    continue
+                if finger_name_list is None:
+                    joints = hand_frames.get_joints()
+                else:
+                    joints, self.joint_names = hand_frames.select_fingers(finger_name_list)
+                self.__samples.append((gesture.gesture_name, each_hand_side,
+                                       hand_frames.get_root_pos()[:max_frames], joints[:max_frames]))
+        if len(self.__samples) == 0:
+            raise ValueError('there is no hand side with frames to load')
+        self.__label_names = sorted({sample[0] for sample in self.__samples})
+        self.__label_indexes = {name: index for (index, name) in enumerate(self.__label_names)}
+        self.__lengths = np.array([len(sample[3]) for sample in self.__samples])
+
+    def get_label_names(self) -> list:
+        """ Getting gesture names in the order of labels """
+        return list(self.__label_names)
+
+    def get_sample_count(self) -> int:
+        return len(self.__samples)
+
+    def __len__(self):
+        """ The number of batches in an epoch """
+        if self.drop_last:
+            return len(self.__samples) // self.batch_size
+        return -(-len(self.__samples) // self.batch_size)
+
+    def get_batch_indexes(self, epoch: int) -> list:
+        """ Getting sample indexes of each batch of an epoch
+        Returns:
+            list : an array of sample indexes for each batch in the order they are yielded
+        """
+        rng = np.random.default_rng(None if self.seed is None else (self.seed, epoch))
+        if self.mode == self.__BUCKET:
+            # samples of the same length are shuffled among themselves, then batches are shuffled
+            tie_break = rng.random(len(self.__samples)) if self.shuffle else np.zeros(len(self.__samples))
+            order = np.lexsort((tie_break, self.__lengths))
+        else:
+            order = rng.permutation(len(self.__samples)) if self.shuffle else np.arange(len(self.__samples))
+        batch_indexes = [order[start:start + self.batch_size] for start in range(0, len(order), self.batch_size)]
+        if self.drop_last and len(batch_indexes[-1]) < self.batch_size:
+            batch_indexes.pop()
+        if self.mode == self.__BUCKET and self.shuffle:
+            batch_indexes = [batch_indexes[index] for index in rng.permutation(len(batch_indexes))]
+        return batch_indexes
+
+    def assemble_batch(self, sample_indexes: np.ndarray) -> dict:
+        """ Putting samples into padded arrays, see the class description """
+        samples = [self.__samples[index] for index in sample_indexes]
+        if self.augmenter is not None:
+            # a mirrored sample takes the other hand side
+            augmented_samples = []
+            for (gesture_name, hand_side, root_pos, joints) in samples:
+                root_pos, joints, hand_sides = self.augmenter.augment(root_pos, joints, 1, hand_side)
+                augmented_samples.append((gesture_name, str(hand_sides[0]), root_pos[0], joints[0]))
+            samples = augmented_samples
+        lengths = np.array([len(sample[3]) for sample in samples])
+        frame_count = int(lengths.max())
+        joint_number = samples[0][3].shape[1]
+        joints = np.zeros((len(samples), frame_count, joint_number, 3), dtype=self.dtype)
+        root_pos = np.zeros((len(samples), frame_count, 3), dtype=self.dtype)
+        for (row, sample) in enumerate(samples):
+            root_pos[row, :lengths[row]] = sample[2]
+            joints[row, :lengths[row]] = sample[3]
+        return {'joints': joints, 'root_pos': root_pos,
+                'mask': np.arange(frame_count) < lengths[:, np.newaxis], 'lengths': lengths,
+                'labels': np.array([self.__label_indexes[sample[0]] for sample in samples]),
+                'gesture_names': np.array([sample[0] for sample in samples]),
+                'hand_sides': np.array([sample[1] for sample in samples])}
+
+    @staticmethod
+    def __put(batch_queue: queue.Queue, item, stop_event: threading.Event) -> bool:
+        """ Putting an item into a queue, a full queue is checked again every 0.1 seconds so that a stopped consumer
+        does not block the background thread forever. Returns False if the consumer has stopped """
+        while not stop_event.is_set():
+            try:
+                batch_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __produce(self, batch_indexes: list, batch_queue: queue.Queue, stop_event: threading.Event):
+        """ Assembling batches in the background thread until every batch is queued or the consumer stops """
+        try:
+            for sample_indexes in batch_indexes:
+                started = time.perf_counter()
+                batch = self.assemble_batch(sample_indexes)
+                with self.__lock:
+                    self.__statistics['assembly_seconds'] += time.perf_counter() - started
+                if not self.__put(batch_queue, batch, stop_event):
+                    return
+            self.__put(batch_queue, None, stop_event)
+        except Exception as e:  # the error is raised again in the consumer
+            self.__put(batch_queue, e, stop_event)
+
+    def iter_epoch(self, epoch: int = None):
+        """ Iterating over the batches of an epoch
+        Parameters:
+            epoch(int) : the number of the epoch, the epoch after the previous one if it is None
+
+        Returns:
+            generator : a batch for each step, see the class description
+        """
+        if epoch is None:
+            epoch = self.__epoch
+        self.__epoch = epoch + 1
+        batch_queue = queue.Queue(maxsize=self.prefetch)
+        stop_event = threading.Event()
+        producer = threading.Thread(target=self.__produce, args=(self.get_batch_indexes(epoch), batch_queue,
+                                                                 stop_event), daemon=True)
+        started = time.perf_counter()
+        producer.start()
+        try:
+            while True:
+                waited = time.perf_counter()
+                batch = batch_queue.get()
+                with self.__lock:
+                    self.__statistics['wait_seconds'] += time.perf_counter() - waited
+                if batch is None:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                with self.__lock:
+                    self.__statistics['batches'] += 1
+                    self.__statistics['samples'] += len(batch['lengths'])
+                    self.__statistics['frames'] += int(batch['lengths'].sum())
+                    self.__statistics['batch_frames'] += batch['mask'].size
+                yield batch
+            with self.__lock:
+                self.__statistics['epochs'] += 1
+        finally:
+            stop_event.set()
+            producer.join()
+            with self.__lock:
+                self.__statistics['elapsed_seconds'] += time.perf_counter() - started
+
+    def __iter__(self):
+        return self.iter_epoch()
+
+    def get_statistics(self) -> dict:
+        """ Getting counters and throughput of every epoch so far
+        Returns:
+            dict : counters with 'samples_per_second' and 'batches_per_second' over the time spent in epochs,
+                   'padding_ratio' the fraction of frames of batches which are padding, and 'wait_seconds' the
+                   time spent waiting for a batch, which stays near zero while batches are prefetched faster than
+                   they are used
+        """
+        with self.__lock:
+            statistics = dict(self.__statistics)
+        elapsed = max(statistics['elapsed_seconds'], 1e-12)
+        statistics.update({'samples_per_second': statistics['samples'] / elapsed,
+                           'batches_per_second': statistics['batches'] / elapsed,
+                           'padding_ratio': 1 - statistics['frames'] / max(statistics['batch_frames'], 1)})
+        return statistics
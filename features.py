@@ -0,0 +1,196 @@
+import numpy as np
+
+from models.frame import Frame
+from models.gesture import Gesture
+from models.hand_frames import HandFrames
+
+
+class FeatureExtractor:
+    """ This is a class for computing kinematic features of every frame at once with array operations.
+
+    It works on a joint array of shape (..., frames, joints, 3) following 'Frame.get_joint_names()', where the
+    leading axes are optional, so a single hand, a batch of equal length sequences or a whole corpus padded to one
+    length is featurised in a single call. Joint coordinates in the data files are relative to the wrist,
+    hence the wrist is the origin of every finger chain.
+
+    Available features are
+        'positions'      : coordinates of each joint,
+        'angles'         : angle (radian) at each joint between its neighbours on the finger chain,
+        'flexion'        : sum of bending angles (pi - angle) of each finger,
+        'tip_distances'  : distance between every pair of fingertips,
+        'velocities'     : rate of change of each joint coordinate,
+        'accelerations'  : rate of change of each joint velocity
+
+    at the time of instantiation, it takes a list of features, a list of fingers and a frame rate for its constructor
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # each of them represents a feature name
+    __POSITIONS = 'positions'
+    __ANGLES = 'angles'
+    __FLEXION = 'flexion'
+    __TIP_DISTANCES = 'tip_distances'
+    __VELOCITIES = 'velocities'
+    __ACCELERATIONS = 'accelerations'
+    __FEATURE_LIST = (__POSITIONS, __ANGLES, __FLEXION, __TIP_DISTANCES, __VELOCITIES, __ACCELERATIONS)
+    __FINGER_LIST = (Frame.get_thumb_finger(), Frame.get_index_finger(), Frame.get_middle_finger(),
+                     Frame.get_ring_finger(), Frame.get_pinky_finger())
+
+    @classmethod
+    def get_available_features(cls) -> tuple:
+        return cls.__FEATURE_LIST
+
+    def __init__(self, feature_list: list = None, finger_name_list: list = None, frame_rate: float = 1.0):
+        if feature_list is None:
+            feature_list = self.__FEATURE_LIST
+        unknown_features = [feature for feature in feature_list if feature not in self.__FEATURE_LIST]
+        if len(unknown_features) != 0:
+            raise ValueError(f'{unknown_features} are not one of {self.__FEATURE_LIST}')
+        if finger_name_list is None:
+            finger_name_list = self.__FINGER_LIST
+        self.feature_list = list(feature_list)
+        # fingers are kept in the order of '__FINGER_LIST' so that feature columns do not depend on the given order
+        self.finger_name_list = [finger for finger in self.__FINGER_LIST if finger in finger_name_list]
+        # frames per second, velocities and accelerations are per frame when it is 1
+        self.frame_rate = frame_rate
+        self.__columns = sorted({column for finger in self.finger_name_list
+                                 for column in Frame.get_finger_joint_columns(finger)})
+        self.__feature_names = self.__build_feature_names()
+
+    def __build_feature_names(self) -> list:
+        """ Building a name of each feature column, in the same order as 'transform' computes them """
+        joint_names = [Frame.get_joint_names()[column] for column in self.__columns]
+        feature_names = []
+        for feature in self.feature_list:
+            if feature == self.__POSITIONS:
+                feature_names += [f'{name}_{axis}' for name in joint_names for axis in 'xyz']
+            elif feature == self.__ANGLES:
+                for finger in self.finger_name_list:
+                    feature_names += [f'{name}_angle' for name in Frame.get_finger_joint_names(finger)[:-1]]
+            elif feature == self.__FLEXION:
+                feature_names += [f'{finger}_flexion' for finger in self.finger_name_list]
+            elif feature == self.__TIP_DISTANCES:
+                tip_names = [Frame.get_finger_joint_names(finger)[-1] for finger in self.finger_name_list]
+                feature_names += [f'{tip_names[i]}_{tip_names[j]}_distance'
+                                  for i in range(len(tip_names)) for j in range(i + 1, len(tip_names))]
+            elif feature == self.__VELOCITIES:
+                feature_names += [f'{name}_v{axis}' for name in joint_names for axis in 'xyz']
+            elif feature == self.__ACCELERATIONS:
+                feature_names += [f'{name}_a{axis}' for name in joint_names for axis in 'xyz']
+        return feature_names
+
+    def get_feature_names(self) -> list:
+        return list(self.__feature_names)
+
+    def __get_finger_angles(self, joints: np.ndarray) -> list:
+        """ Computing angles at the joints of each finger chain, returns an array of shape (..., frames, angles)
+        for each finger """
+        finger_angles = []
+        for finger in self.finger_name_list:
+            finger_joints = joints[..., list(Frame.get_finger_joint_columns(finger)), :]
+            # the wrist (origin) is the first point of every finger chain
+            origin = np.zeros(finger_joints.shape[:-2] + (1, 3), dtype=finger_joints.dtype)
+            chain = np.concatenate((origin, finger_joints), axis=-2)
+            to_previous = chain[..., :-2, :] - chain[..., 1:-1, :]
+            to_next = chain[..., 2:, :] - chain[..., 1:-1, :]
+            norms = np.linalg.norm(to_previous, axis=-1) * np.linalg.norm(to_next, axis=-1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cosine = np.sum(to_previous * to_next, axis=-1) / norms
+            finger_angles.append(np.arccos(np.clip(cosine, -1.0, 1.0)))
+        return finger_angles
+
+    def __get_derivative(self, values: np.ndarray) -> np.ndarray:
+        """ Computing a rate of change along the frame axis, which is the third axis from the last """
+        if values.shape[-3] < 2:
+            return np.zeros_like(values)
+        return np.gradient(values, axis=-3) * self.frame_rate
+
+    def transform(self, joints: np.ndarray) -> np.ndarray:
+        """ Computing a feature matrix
+        Parameters:
+            joints(np.ndarray) : a joint array of shape (..., frames, joints, 3) following 'Frame.get_joint_names()'
+
+        Returns:
+            np.ndarray : a feature matrix of shape (..., frames, features), columns follow 'get_feature_names()'.
+                         Features depending on a missing joint (NaN) are NaN
+        """
+        joints = np.asarray(joints, dtype=np.float64)
+        selected_joints = joints[..., self.__columns, :]
+        leading_shape = joints.shape[:-2]
+        feature_matrix = []
+        finger_angles = None
+        velocities = None
+        for feature in self.feature_list:
+            if feature == self.__POSITIONS:
+                feature_matrix.append(selected_joints.reshape(leading_shape + (-1,)))
+            elif feature in (self.__ANGLES, self.__FLEXION):
+                if finger_angles is None:
+                    finger_angles = self.__get_finger_angles(joints)
+                if feature == self.__ANGLES:
+                    feature_matrix += finger_angles
+                else:
+                    feature_matrix.append(np.stack([np.sum(np.pi - angles, axis=-1) for angles in finger_angles],
+                                                   axis=-1).reshape(leading_shape + (-1,)))
+            elif feature == self.__TIP_DISTANCES:
+                tips = joints[..., [Frame.get_finger_joint_columns(finger)[-1] for finger in self.finger_name_list], :]
+                first, second = np.triu_indices(len(self.finger_name_list), k=1)
+                feature_matrix.append(np.linalg.norm(tips[..., first, :] - tips[..., second, :], axis=-1))
+            elif feature in (self.__VELOCITIES, self.__ACCELERATIONS):
+                if velocities is None:
+                    velocities = self.__get_derivative(selected_joints)
+                if feature == self.__VELOCITIES:
+                    feature_matrix.append(velocities.reshape(leading_shape + (-1,)))
+                else:
+                    feature_matrix.append(self.__get_derivative(velocities).reshape(leading_shape + (-1,)))
+        if len(feature_matrix) == 0:
+            return np.empty(leading_shape + (0,))
+        return np.concatenate(feature_matrix, axis=-1)
+
+    def transform_gesture(self, gesture: Gesture) -> dict:
+        """ Computing a feature matrix of each hand side of a gesture
+        Parameters:
+            gesture(Gesture) : a gesture
+
+        Returns:
+            dict : a feature matrix of shape (frames, features) for each hand side having frames e.g {'R': array}
+        """
+        feature_dict = dict()
+        for hand_side in (Gesture.right_hand(), Gesture.left_hand()):
+            hand_frames = gesture.get_hand_frames(hand_side)
+            if len(hand_frames) > 0:
+                feature_dict.update({hand_side: self.transform(hand_frames.get_joints())})
+        return feature_dict
+
+    def transform_extracted(self, extracted) -> dict:
+        """ Computing a feature matrix of each hand side from the output of 'main.extract_finger_frame'
+        or 'main.extract_finger_array'
+        Parameters:
+            extracted(dict or tuple) : {'R': [[{Thumb0: (), ..}, {Index1: (), ..}], ..], 'L': ..}
+                                       or ({'R': array, 'L': array}, joint_names)
+
+        Returns:
+            dict : a feature matrix of shape (frames, features) for each hand side.
+                   Features depending on fingers which were not extracted are NaN
+        """
+        joint_number = len(Frame.get_joint_names())
+        feature_dict = dict()
+        if isinstance(extracted, tuple):  # output of 'extract_finger_array'
+            finger_arrays, joint_names = extracted
+            columns = [Frame.get_joint_names().index(name) for name in joint_names]
+            for (hand_side, finger_array) in finger_arrays.items():
+                joints = np.full((len(finger_array), joint_number, 3), np.nan)
+                joints[:, columns] = finger_array
+                feature_dict.update({hand_side: self.transform(joints)})
+            return feature_dict
+
+        for (hand_side, frame_list) in extracted.items():  # output of 'extract_finger_frame'
+            joints = np.full((len(frame_list), joint_number, 3), np.nan)
+            for (frame_index, finger_data_list) in enumerate(frame_list):
+                for finger_data in finger_data_list:
+                    for (joint_name, coordinate) in finger_data.items():
+                        joints[frame_index, Frame.get_joint_names().index(joint_name)] = coordinate
+            feature_dict.update({hand_side: self.transform(joints)})
+        return feature_dict
+
+    def transform_hand_frames(self, hand_frames: HandFrames) -> np.ndarray:
+        return self.transform(hand_frames.get_joints())
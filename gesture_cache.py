@@ -0,0 +1,114 @@
+import glob
+import hashlib
+import os
+import pathlib
+
+import numpy as np
+
+from gesture_parser import parse_gesture_file
+from instrumentation import Instrumentation, instrumented
+from models.frame import Frame
+
+
+class GestureCache:
+    """ This is a class for caching parsed gesture data files on disk as binary NumPy arrays.
+
+    Each data file is cached as two '.npy' files, one for 'RootPos' and one for joints, in a cache directory.
+    A cache entry is keyed by the absolute path, the size and the modification time of the data file,
+    so that a data file changed after it was cached is parsed again and its stale entry is replaced.
+    Cached arrays are memory-mapped rather than read, hence loading an unchanged data file costs almost nothing.
+
+    at the time of instantiation, it takes a cache directory for its constructor
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # '__CACHE_DIR_NAME' is a default cache directory name created next to the data files,
+    # '__ENABLED_ENV' and '__DIR_ENV' are environment variables to disable the cache and to change its directory
+    __CACHE_DIR_NAME = '.gesture_cache'
+    __ENABLED_ENV = 'GESTURE_CACHE'
+    __DIR_ENV = 'GESTURE_CACHE_DIR'
+    __ROOT_POS_SUFFIX = '.root.npy'
+    __JOINTS_SUFFIX = '.joints.npy'
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """ Checking if the cache is enabled. Setting the environment variable 'GESTURE_CACHE' to
+        '0', 'false', 'no' or 'off' disables the cache """
+        return os.environ.get(cls.__ENABLED_ENV, '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+    @classmethod
+    def get_default_cache_dir(cls, data_dir: str) -> str:
+        """ Getting the cache directory for a data directory, the environment variable 'GESTURE_CACHE_DIR'
+        overrides the default directory '<data_dir>/.gesture_cache' """
+        return os.environ.get(cls.__DIR_ENV) or os.path.join(data_dir, cls.__CACHE_DIR_NAME)
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def __get_entry_prefix(self, file_name: str) -> str:
+        """ Getting a prefix of entry file names for a data file, every entry of the data file starts with it.
+        The joint layout is hashed together with the path, so entries saved with another layout are never used """
+        absolute_path = os.path.abspath(file_name)
+        key = absolute_path + '\n' + ','.join(Frame.get_joint_names())
+        path_hash = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, pathlib.Path(file_name).stem + '_' + path_hash)
+
+    def __get_entry_name(self, file_name: str) -> str:
+        """ Getting an entry name for the current state of a data file, the name changes whenever
+        the size or the modification time of the data file changes """
+        status = os.stat(file_name)
+        return f'{self.__get_entry_prefix(file_name)}_{status.st_size}_{status.st_mtime_ns}'
+
+    def __save_array(self, path: str, array: np.ndarray):
+        """ Saving an array into a temporary file first then renaming it, so that other processes reading
+        the cache never see a half written file """
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as fopen:
+            np.save(fopen, array)
+        os.replace(temp_path, path)
+
+    def __remove_entries(self, file_name: str):
+        """ Removing every entry of a data file """
+        for path in glob.glob(glob.escape(self.__get_entry_prefix(file_name)) + '_*'):
+            os.remove(path)
+
+    @instrumented('GestureCache.load')
+    def load(self, file_name: str, dtype=np.float64) -> tuple:
+        """ Loading a gesture data file through the cache
+        Parameters:
+            file_name(str) : data file name,
+            dtype(numpy dtype) : float type of the returned arrays
+
+        Returns:
+            tuple : (root_pos, joints) as described in 'gesture_parser.parse_gesture_text'
+
+        if there is an entry for the current state of the data file, the arrays are memory-mapped from the entry.
+        Otherwise the data file is parsed, stale entries of the data file are removed and a new entry is saved.
+        Failing to save an entry does not fail the load.
+        Memory-mapped arrays are copy-on-write, so changing them never changes the entry.
+        Arrays are cached in float64 and converted when another dtype is requested
+        """
+        entry_name = self.__get_entry_name(file_name)
+        root_pos_path = entry_name + self.__ROOT_POS_SUFFIX
+        joints_path = entry_name + self.__JOINTS_SUFFIX
+        try:
+            root_pos = np.load(root_pos_path, mmap_mode='c')
+            joints = np.load(joints_path, mmap_mode='c')
+            Instrumentation.count('cache_hits')
+        except (OSError, ValueError):  # the entry does not exist or it is broken
+            Instrumentation.count('cache_misses')
+            root_pos, joints = parse_gesture_file(file_name)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self.__remove_entries(file_name)
+                self.__save_array(root_pos_path, root_pos)
+                self.__save_array(joints_path, joints)
+            except OSError:  # the cache directory is not writable, the parsed arrays are still usable
+                pass
+        return root_pos.astype(dtype, copy=False), joints.astype(dtype, copy=False)
+
+    def clear(self):
+        """ Removing every entry in the cache directory """
+        for suffix in (self.__ROOT_POS_SUFFIX, self.__JOINTS_SUFFIX):
+            for path in glob.glob(os.path.join(glob.escape(self.cache_dir), '*' + suffix)):
+                os.remove(path)
@@ -0,0 +1,177 @@
+import sys
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from gesture_parser import parse_file_name
+from models.gesture import Gesture
+from models.gestures import Gestures
+
+
+class LazyGestures(Gestures):
+    """ This is a Gestures object which loads a gesture only when it is accessed for the first time.
+
+    At the time of its instantiation, it only indexes data file names by gesture name and hand side
+    (and optionally counts frames in each file without parsing it). Frames of a gesture are read when the gesture is
+    accessed through 'get_list_of_gesture()[name]' or 'get_gesture([name])', and loaded gestures are kept in
+    a bounded LRU so that sweeping across a large data set does not keep every gesture in memory.
+
+    at the time of instantiation, it takes a list of data file names, a function reading a data file into a Gesture,
+    the maximum number of loaded gestures and whether to count frames for its constructor
+    """
+
+    def __init__(self, file_names: list, read_gesture, max_loaded_gestures: int = 16, count_frames: bool = True):
+        super().__init__()
+        if max_loaded_gestures < 1:
+            raise ValueError('max_loaded_gestures should be at least one')
+        self.__read_gesture = read_gesture
+        self.__max_loaded_gestures = max_loaded_gestures
+        # '__index' maps a gesture name to data file names of each hand side, e.g {'Gesture 3': {'L': [..], 'R': [..]}}
+        self.__index = dict()
+        # '__frame_counts' maps a gesture name to the number of frames of each hand side, e.g {'Gesture 3': {'L': 166}}
+        self.__frame_counts = dict()
+        # '__loaded' is the LRU of loaded gestures, the most recently used one is at the end
+        self.__loaded = OrderedDict()
+        # '__pinned' keeps gestures changed by 'add_gesture', they are never evicted because they can not be reloaded
+        self.__pinned = dict()
+        # '__version' changes whenever a gesture is read or added, because a gesture read again after it was
+        # evicted is another Gesture object
+        self.__version = 0
+        for file_name in file_names:
+            gesture_name, hand_type = parse_file_name(file_name)
+            hand_files = self.__index.setdefault(gesture_name, {Gesture.right_hand(): [], Gesture.left_hand(): []})
+            hand_files[hand_type].append(file_name)
+            if count_frames:
+                hand_counts = self.__frame_counts.setdefault(gesture_name, dict())
+                hand_counts[hand_type] = hand_counts.get(hand_type, 0) + self.__count_frames(file_name)
+
+    @staticmethod
+    def __count_frames(file_name: str) -> int:
+        """ Counting frames in a data file without parsing it, each frame starts with a 'RootPos' line """
+        try:
+            with open(file_name, 'rb') as fopen:
+                return fopen.read().count(b'RootPos')
+        except IOError:
+            return 0
+
+    def get_gesture_names(self) -> list:
+        """ Getting every gesture name in the catalog in the order of data file names """
+        return list(self.__index.keys()) + [name for name in self.__pinned.keys() if name not in self.__index]
+
+    def get_hand_files(self, gesture_name: str) -> dict:
+        """ Getting data file names of each hand side for a gesture name, e.g {'R': [..], 'L': [..]} """
+        return self.__index[gesture_name]
+
+    def get_frame_counts(self, gesture_name: str) -> dict:
+        """ Getting the number of frames of each hand side for a gesture name without loading it, e.g {'L': 166} """
+        return self.__frame_counts.get(gesture_name, dict())
+
+    def get_loaded_gesture_names(self) -> list:
+        """ Getting names of gestures in memory, from the least recently used one """
+        return list(self.__pinned.keys()) + list(self.__loaded.keys())
+
+    # getter for '__version'
+    def get_version(self) -> int:
+        return self.__version
+
+    def is_indexed(self, gesture_name: str) -> bool:
+        return gesture_name in self.__index or gesture_name in self.__pinned
+
+    def load_gesture(self, gesture_name: str) -> Gesture:
+        """ Getting a gesture, reading its data files if it is not in memory
+        Parameters:
+            gesture_name(str) : gesture name e.g Gesture 4
+
+        Returns:
+            Gesture : a Gesture object
+
+        data files of a gesture are read and merged in the same way as 'main.read_data_files' does,
+        and a data file which can not be read is reported to stderr and skipped.
+        If the number of loaded gestures exceeds the maximum, the least recently used one is evicted
+        """
+        if gesture_name in self.__pinned:
+            return self.__pinned[gesture_name]
+        if gesture_name in self.__loaded:
+            self.__loaded.move_to_end(gesture_name)
+            return self.__loaded[gesture_name]
+
+        gesture = self.__read_files(gesture_name)
+        self.__version += 1
+        self.__loaded[gesture_name] = gesture
+        if len(self.__loaded) > self.__max_loaded_gestures:
+            self.__loaded.popitem(last=False)
+        return gesture
+
+    def __read_files(self, gesture_name: str) -> Gesture:
+        """ Reading every data file of a gesture name and merging them into a Gesture """
+        gesture = None
+        hand_files = self.__index[gesture_name]
+        for file_name in sorted(hand_files[Gesture.right_hand()] + hand_files[Gesture.left_hand()]):
+            try:
+                if gesture is None:
+                    gesture = self.__read_gesture(file_name)
+                else:
+                    gesture.add_more_hands(self.__read_gesture(file_name))
+            except IOError as ioe:
+                print(f'{ioe}: File not found or unreadable', file=sys.stderr)
+            except Exception as ie:
+                print(f'{ie}: Data file is ill-formatted', file=sys.stderr)
+        if gesture is None:  # none of the data files could be read, so the gesture does not exist
+            raise KeyError(gesture_name)
+        return gesture
+
+    def get_gesture(self, list_of_gesture_name: list) -> list:
+        """ Getting a list of gestures for a given list of gesture names, loading the gestures not in memory
+
+        Parameters:
+            list_of_gesture_name(list) : list of Gesture names
+
+        Returns:
+            list of gesture objects(list) : list of Gesture objects
+        """
+        # a set checks each name in O(1) instead of scanning the given list for every gesture
+        gesture_name_set = set(list_of_gesture_name)
+        return [self.load_gesture(name) for name in self.get_gesture_names() if name in gesture_name_set]
+
+    # getter for '__list_of_gestures', gestures are loaded when they are accessed through the returned mapping
+    def get_list_of_gesture(self):
+        return _LazyGestureMapping(self)
+
+    def add_gesture(self, gesture: Gesture):
+        """ Adding a gesture object to the catalog
+        Parameters:
+            gesture(Gesture) : input Gesture object
+
+        Returns:
+            void
+
+        if the gesture name is already in the catalog, the gesture is merged into the gesture with the same name
+        in the same way as 'Gestures.add_gesture'. The merged gesture stays in memory from then on
+        """
+        if self.is_indexed(gesture.gesture_name):
+            existing_gesture = self.load_gesture(gesture.gesture_name)
+            existing_gesture.add_more_hands(gesture)
+            gesture = existing_gesture
+        self.__version += 1
+        self.__loaded.pop(gesture.gesture_name, None)
+        self.__pinned[gesture.gesture_name] = gesture
+
+
+class _LazyGestureMapping(Mapping):
+    """ A read-only dictionary view of LazyGestures, checking a gesture name does not load the gesture """
+
+    def __init__(self, gestures: LazyGestures):
+        self.__gestures = gestures
+
+    def __getitem__(self, gesture_name):
+        if not self.__gestures.is_indexed(gesture_name):
+            raise KeyError(gesture_name)
+        return self.__gestures.load_gesture(gesture_name)
+
+    def __contains__(self, gesture_name):
+        return self.__gestures.is_indexed(gesture_name)
+
+    def __iter__(self):
+        return iter(self.__gestures.get_gesture_names())
+
+    def __len__(self):
+        return len(self.__gestures.get_gesture_names())
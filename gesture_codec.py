@@ -0,0 +1,307 @@
+import bz2
+import lzma
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from gesture_parser import format_gesture_text, parse_file_name, parse_gesture_file
+from models.frame import Frame
+
+
+class GestureCodec:
+    """ This is a class for storing a hand side of a gesture in a compact binary format.
+
+    Coordinates of 'RootPos' and every joint form one track per axis, 75 tracks in total. Each track is turned into
+    integer codes in one of three modes
+        'lossless' : fixed-point codes at the 8 decimals of the data files, which give exactly the same floats back.
+                     Arrays with more precision than that are stored as the bits of their float64 values instead,
+                     so decoding always gives the exact arrays back,
+        'fixed'    : fixed-point codes with a step of twice 'max_error', so no coordinate is off by more than
+                     'max_error',
+        'float16'  : the bits of half precision floats, about three significant digits.
+    Then each track is delta encoded (the first frame, then the difference from the previous frame), and the
+    differences of each track are stored in the smallest integer type holding them. As joints barely move between
+    frames most tracks fit in one or two bytes per frame. Finally the body is optionally compressed.
+    Missing joints (NaN) are kept in a bit mask.
+
+    A file starts with a fixed header:
+        magic(4s) version(B) mode(B) compression(B) hand type(1s) frames(I) tracks(H) has mask(B) reserved(B)
+        scale(d) gesture name length(H), followed by the gesture name in UTF-8
+    and the (compressed) body:
+        mask (packed bits of shape (frames, tracks), only if it has a mask), the codes of the first frame (int64),
+        the integer size of each track (B), and the differences of each track one after another
+    In the program, all methods are class methods, and therefore this class will NOT be instantiated.
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    __MAGIC = b'GSTB'
+    __VERSION = 1
+    __HEADER = struct.Struct('<4sBBB1sIHBBdH')
+    __EXTENSION = '.gsb'
+    __LOSSLESS = 'lossless'
+    __FIXED = 'fixed'
+    __FLOAT16 = 'float16'
+    __MODES = (__LOSSLESS, __FIXED, __FLOAT16)
+    # 'raw' is how 'lossless' stores arrays which are not at the precision of the data files
+    __RAW = 'raw'
+    __MODE_CODES = {__LOSSLESS: 0, __FIXED: 1, __FLOAT16: 2, __RAW: 3}
+    __COMPRESSIONS = {'none': (0, None, None), 'zlib': (1, lambda data: zlib.compress(data, 9), zlib.decompress),
+                      'bz2': (2, lambda data: bz2.compress(data, 9), bz2.decompress),
+                      'lzma': (3, lzma.compress, lzma.decompress)}
+    # fixed-point scale of the 8 decimals of the data files, a code divided by it gives the same float as parsing
+    __TEXT_SCALE = 1e8
+    __INTEGER_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+    @classmethod
+    def get_modes(cls) -> tuple:
+        return cls.__MODES
+
+    @classmethod
+    def get_compressions(cls) -> tuple:
+        return tuple(cls.__COMPRESSIONS.keys())
+
+    @classmethod
+    def get_extension(cls) -> str:
+        return cls.__EXTENSION
+
+    @classmethod
+    def __to_codes(cls, values: np.ndarray, mode: str, scale: float) -> np.ndarray:
+        """ Converting an array of shape (frames, tracks) without NaN into int64 codes """
+        if mode in (cls.__LOSSLESS, cls.__FIXED):
+            return np.rint(values * scale).astype(np.int64)
+        if mode == cls.__FLOAT16:
+            return values.astype(np.float16).view(np.uint16).astype(np.int64)
+        return values.view(np.int64).copy()
+
+    @classmethod
+    def __from_codes(cls, codes: np.ndarray, mode: str, scale: float) -> np.ndarray:
+        if mode in (cls.__LOSSLESS, cls.__FIXED):
+            # division by an exactly representable scale is correctly rounded, which makes 'lossless' exact
+            return codes / scale
+        if mode == cls.__FLOAT16:
+            return codes.astype(np.uint16).view(np.float16).astype(np.float64)
+        return codes.view(np.float64)
+
+    @classmethod
+    def encode(cls, root_pos: np.ndarray, joints: np.ndarray, hand_type: str = 'R', gesture_name: str = '',
+               mode: str = 'lossless', max_error: float = None, compression: str = 'zlib') -> bytes:
+        """ Encoding arrays of a hand side
+        Parameters:
+            root_pos(np.ndarray), joints(np.ndarray) : arrays as described in 'gesture_parser.parse_gesture_text',
+            hand_type(str) : hand side e.g 'R' or 'L',
+            gesture_name(str) : gesture name e.g 'Gesture 4',
+            mode(str) : 'lossless', 'fixed' or 'float16',
+            max_error(float) : the maximum error of a coordinate in 'fixed' mode,
+            compression(str) : 'none', 'zlib', 'bz2' or 'lzma'
+
+        Returns:
+            bytes : encoded data
+        """
+        if mode not in cls.__MODES:
+            raise ValueError(f'{mode} is not one of {cls.__MODES}')
+        if compression not in cls.__COMPRESSIONS:
+            raise ValueError(f'{compression} is not one of {cls.get_compressions()}')
+        if mode == cls.__FIXED and (max_error is None or max_error <= 0):
+            raise ValueError('max_error should be positive in fixed mode')
+        if len(root_pos) != len(joints):
+            raise ValueError('root_pos and joints should have the same number of frames')
+
+        frame_count = len(root_pos)
+        joints = np.asarray(joints, dtype=np.float64)
+        values = np.concatenate((np.asarray(root_pos, dtype=np.float64).reshape(frame_count, 3),
+                                 joints.reshape(frame_count, joints.shape[1] * 3)), axis=1)
+        missing = np.isnan(values)
+        has_mask = bool(missing.any())
+        values = np.where(missing, 0.0, values)
+
+        scale = 0.0
+        if mode == cls.__LOSSLESS:
+            scale = cls.__TEXT_SCALE
+            codes = cls.__to_codes(values, mode, scale)
+            if np.abs(values).max(initial=0) >= 2 ** 52 / scale \
+                    or not np.array_equal(cls.__from_codes(codes, mode, scale), values):
+                mode, scale = cls.__RAW, 0.0
+                codes = cls.__to_codes(values, mode, scale)
+        else:
+            if mode == cls.__FIXED:
+                # the step is a little shorter than twice 'max_error' so that rounding never exceeds 'max_error'
+                scale = (1 + 1e-6) / (2 * max_error)
+            codes = cls.__to_codes(values, mode, scale)
+
+        first_codes = codes[:1] if frame_count > 0 else np.zeros((1, values.shape[1]), dtype=np.int64)
+        # differences wrap around in int64, which the cumulative sum of decoding wraps back
+        differences = np.diff(codes, axis=0)
+        magnitude = np.abs(differences).max(axis=0, initial=0) if len(differences) > 0 \
+            else np.zeros(values.shape[1], dtype=np.int64)
+        sizes = np.full(values.shape[1], 8, dtype=np.uint8)
+        for (integer_type, size) in zip(cls.__INTEGER_TYPES[:-1][::-1], (4, 2, 1)):
+            sizes[magnitude <= np.iinfo(integer_type).max] = size
+        sizes[magnitude < 0] = 8  # the magnitude of the smallest int64 is negative
+        body = [np.packbits(missing).tobytes() if has_mask else b'', first_codes.astype('<i8').tobytes(),
+                sizes.tobytes()]
+        for (integer_type, size) in zip(cls.__INTEGER_TYPES, (1, 2, 4, 8)):
+            tracks = np.flatnonzero(sizes == size)
+            if len(tracks) != 0:
+                # tracks of the same size are written together, one track after another
+                body.append(np.ascontiguousarray(differences[:, tracks].T).astype(
+                    np.dtype(integer_type).newbyteorder('<')).tobytes())
+        body = b''.join(body)
+
+        compression_code, compress, _ = cls.__COMPRESSIONS[compression]
+        if compress is not None:
+            body = compress(body)
+        name = gesture_name.encode('utf-8')
+        header = cls.__HEADER.pack(cls.__MAGIC, cls.__VERSION, cls.__MODE_CODES[mode], compression_code,
+                                   hand_type.encode('ascii')[:1], frame_count, values.shape[1], int(has_mask), 0,
+                                   scale, len(name))
+        return header + name + body
+
+    @classmethod
+    def decode(cls, data: bytes, dtype=np.float64) -> tuple:
+        """ Decoding data made by 'encode'
+        Parameters:
+            data(bytes) : encoded data,
+            dtype(numpy dtype) : float type of the returned arrays
+
+        Returns:
+            tuple : (gesture_name, hand_type, root_pos, joints) where the arrays are as described in
+                    'gesture_parser.parse_gesture_text'
+        """
+        if len(data) < cls.__HEADER.size:
+            raise ValueError('data is too short to be an encoded gesture')
+        (magic, version, mode_code, compression_code, hand_type, frame_count, track_count, has_mask, _,
+         scale, name_length) = cls.__HEADER.unpack_from(data)
+        if magic != cls.__MAGIC:
+            raise ValueError('data is not an encoded gesture')
+        if version != cls.__VERSION:
+            raise ValueError(f'version {version} of the format is not supported')
+        mode = {code: mode for (mode, code) in cls.__MODE_CODES.items()}[mode_code]
+        offset = cls.__HEADER.size
+        gesture_name = data[offset:offset + name_length].decode('utf-8')
+        body = data[offset + name_length:]
+        decompress = [decompress for (code, _, decompress) in cls.__COMPRESSIONS.values()
+                      if code == compression_code][0]
+        if decompress is not None:
+            body = decompress(body)
+
+        offset = 0
+        missing = None
+        if has_mask:
+            mask_length = (frame_count * track_count + 7) // 8
+            missing = np.unpackbits(np.frombuffer(body, dtype=np.uint8, count=mask_length),
+                                    count=frame_count * track_count).reshape(frame_count, track_count).astype(bool)
+            offset += mask_length
+        first_codes = np.frombuffer(body, dtype='<i8', count=track_count, offset=offset)
+        offset += 8 * track_count
+        sizes = np.frombuffer(body, dtype=np.uint8, count=track_count, offset=offset)
+        offset += track_count
+
+        codes = np.empty((frame_count, track_count), dtype=np.int64)
+        if frame_count > 0:
+            codes[0] = first_codes
+        for (integer_type, size) in zip(cls.__INTEGER_TYPES, (1, 2, 4, 8)):
+            tracks = np.flatnonzero(sizes == size)
+            count = len(tracks) * max(frame_count - 1, 0)
+            if count != 0:
+                differences = np.frombuffer(body, dtype=np.dtype(integer_type).newbyteorder('<'), count=count,
+                                            offset=offset)
+                codes[1:, tracks] = differences.reshape(len(tracks), frame_count - 1).T
+                offset += count * size
+        np.cumsum(codes, axis=0, out=codes)
+
+        values = cls.__from_codes(codes, mode, scale)
+        if missing is not None:
+            values[missing] = np.nan
+        root_pos = values[:, :3].astype(dtype)
+        joints = values[:, 3:].reshape(frame_count, (track_count - 3) // 3, 3).astype(dtype)
+        return gesture_name, hand_type.decode('ascii'), root_pos, joints
+
+    @classmethod
+    def write_file(cls, file_name: str, root_pos: np.ndarray, joints: np.ndarray, hand_type: str = 'R',
+                   gesture_name: str = '', mode: str = 'lossless', max_error: float = None,
+                   compression: str = 'zlib') -> int:
+        """ Writing arrays of a hand side to a file, see 'encode'. Returns the number of bytes written """
+        data = cls.encode(root_pos, joints, hand_type, gesture_name, mode, max_error, compression)
+        with open(file_name, 'wb') as output_file:
+            output_file.write(data)
+        return len(data)
+
+    @classmethod
+    def read_file(cls, file_name: str, dtype=np.float64) -> tuple:
+        """ Reading a file written by 'write_file', see 'decode' """
+        with open(file_name, 'rb') as input_file:
+            return cls.decode(input_file.read(), dtype)
+
+    @classmethod
+    def is_encoded_file(cls, file_name: str) -> bool:
+        return str(file_name).endswith(cls.__EXTENSION)
+
+    @classmethod
+    def convert_text_file(cls, text_file_name: str, output_file_name: str = None, mode: str = 'lossless',
+                          max_error: float = None, compression: str = 'zlib') -> str:
+        """ Converting a gesture data file into the binary format
+        Parameters:
+            text_file_name(str) : data file name e.g 'Left_Hand_Gesture_10.txt',
+            output_file_name(str) : binary file name, the data file name with the '.gsb' extension if it is None,
+            mode(str), max_error(float), compression(str) : see 'encode'
+
+        Returns:
+            str : the binary file name
+        """
+        if output_file_name is None:
+            output_file_name = os.path.splitext(text_file_name)[0] + cls.__EXTENSION
+        gesture_name, hand_type = parse_file_name(text_file_name)
+        root_pos, joints = parse_gesture_file(text_file_name)
+        cls.write_file(output_file_name, root_pos, joints, hand_type, gesture_name, mode, max_error, compression)
+        return output_file_name
+
+    @classmethod
+    def convert_binary_file(cls, binary_file_name: str, output_file_name: str = None) -> str:
+        """ Converting a binary file back into a gesture data file
+        Parameters:
+            binary_file_name(str) : binary file name,
+            output_file_name(str) : data file name, the binary file name with the '.txt' extension if it is None
+
+        Returns:
+            str : the data file name, it is written with a byte order mark and CRLF line endings
+                  as the recorded data files are
+        """
+        if output_file_name is None:
+            output_file_name = os.path.splitext(binary_file_name)[0] + '.txt'
+        _, _, root_pos, joints = cls.read_file(binary_file_name)
+        if joints.shape[1] != len(Frame.get_joint_names()):
+            raise ValueError('the number of joints does not match Frame.get_joint_names()')
+        with open(output_file_name, 'w', encoding='utf-8-sig', newline='') as output_file:
+            output_file.write(format_gesture_text(root_pos, joints))
+        return output_file_name
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convert gesture data files to and from the compact binary format')
+    parser.add_argument('direction', choices=['encode', 'decode'])
+    parser.add_argument('files', nargs='+', help='data files to encode or binary files to decode')
+    parser.add_argument('--output-dir', help='directory to write converted files in, next to each file by default')
+    parser.add_argument('--mode', default='lossless', choices=GestureCodec.get_modes())
+    parser.add_argument('--max-error', type=float, default=None, help='maximum coordinate error in fixed mode')
+    parser.add_argument('--compression', default='zlib', choices=GestureCodec.get_compressions())
+    arguments = parser.parse_args()
+
+    if arguments.output_dir is not None:
+        os.makedirs(arguments.output_dir, exist_ok=True)
+    for file_name in arguments.files:
+        output_file_name = None
+        if arguments.output_dir is not None:
+            extension = GestureCodec.get_extension() if arguments.direction == 'encode' else '.txt'
+            output_file_name = os.path.join(arguments.output_dir,
+                                            os.path.splitext(os.path.basename(file_name))[0] + extension)
+        if arguments.direction == 'encode':
+            output_file_name = GestureCodec.convert_text_file(file_name, output_file_name, arguments.mode,
+                                                              arguments.max_error, arguments.compression)
+        else:
+            output_file_name = GestureCodec.convert_binary_file(file_name, output_file_name)
+        print(f'{file_name} ({os.path.getsize(file_name)} bytes) -> '
+              f'{output_file_name} ({os.path.getsize(output_file_name)} bytes)')
@@ -0,0 +1,250 @@
+import pathlib
+import re
+
+import numpy as np
+
+from instrumentation import Instrumentation, instrumented
+from models.frame import Frame
+from models.gesture import Gesture
+from models.hand_frames import HandFrames
+
+# this pattern matches every line in a format of '<joint_name>, (<coordinate data>)' in a whole file buffer at once
+# group 1 is the joint name, group 2 is the comma separated coordinate data without parentheses
+_LINE_PATTERN = re.compile(r'^([^,\r\n]+),\s*\(([^)\r\n]*)\)', re.MULTILINE)
+
+# column of each joint name in the joint array, the order is the same as 'Frame.get_joint_names()'
+_JOINT_INDEX = {name: index for (index, name) in enumerate(Frame.get_joint_names())}
+
+# the order of joint lines in a frame of the data files, as the recording device writes them (tips last)
+_LINE_JOINT_NAMES = ('Start', 'ForearmStub', 'Thumb0', 'Thumb1', 'Thumb2', 'Thumb3', 'Index1', 'Index2', 'Index3',
+                     'Middle1', 'Middle2', 'Middle3', 'Ring1', 'Ring2', 'Ring3', 'Pinky0', 'Pinky1', 'Pinky2',
+                     'Pinky3', 'ThumbTip', 'IndexTip', 'MiddleTip', 'RingTip', 'PinkyTip')
+
+
+def parse_file_name(file_name: str) -> tuple:
+    """ Extracting a gesture name and a hand side from a data file name
+    Parameters:
+        file_name(str) : data file name e.g 'Left_Hand_Gesture_10.txt'
+
+    Returns:
+        tuple : (gesture name, hand side) e.g ('Gesture 10', 'L')
+
+    the gesture name is made of the last two words of the file name,
+    and the hand side is left hand if the file name starts with 'Left', right hand otherwise
+    """
+    # 'pathlib.Path(file_name).stem' will remove extension from the file_name
+    file_name_array = pathlib.Path(file_name).stem.split('_')
+    gesture_name = file_name_array[2] + ' ' + file_name_array[3]
+    hand_type = Gesture.left_hand() if file_name_array[0] == 'Left' else Gesture.right_hand()
+    return gesture_name, hand_type
+
+
+def get_column_index(name: str) -> int:
+    """ Getting a column index of the joint array for a joint name in a data file, e.g 'Hand_Thumb0',
+    -1 for 'RootPos' and -2 for an unknown joint name """
+    name = name.strip()
+    if name.find('RootPos') != -1:
+        return -1
+    name_array = name.split('_')
+    if len(name_array) < 2:
+        return -2
+    return _JOINT_INDEX.get(name_array[1], -2)
+
+
+def parse_line(line: str):
+    """ Parsing a single line of a gesture data file
+    Parameters:
+        line(str) : a line e.g 'Hand_Thumb0, (0.02006931, 0.01155411, 0.01049651)'
+
+    Returns:
+        tuple : (column index as 'get_column_index' returns, [x, y, z]), or None if the line is not in the format
+    """
+    match = _LINE_PATTERN.match(line.lstrip('\ufeff'))
+    if match is None:
+        return None
+    try:
+        coordinate = [float(value) for value in match.group(2).split(',')]
+    except ValueError:
+        return None
+    if len(coordinate) != 3:
+        return None
+    return get_column_index(match.group(1)), coordinate
+
+
+@instrumented('parse_gesture_text')
+def parse_gesture_text(text: str, dtype=np.float64) -> tuple:
+    """ Parsing the whole content of a gesture data file into arrays
+    Parameters:
+        text(str) : whole content of a gesture data file,
+        dtype(numpy dtype) : float type of the returned arrays
+
+    Returns:
+        tuple : (root_pos, joints) where 'root_pos' is an array of shape (frames, 3) holding 'RootPos' of each frame
+                and 'joints' is an array of shape (frames, joints, 3) whose joint axis follows 'Frame.get_joint_names()'
+
+    every line is tokenised by a single regular expression over the whole buffer, and all coordinates are converted
+    to floats by NumPy in one call, hence no line is evaluated as Python code.
+    A new frame starts at each 'RootPos' line, joints missing in a frame are left as NaN and
+    joints with an unknown name are ignored in the same way 'main.set_finger_data' ignores them
+    """
+    with Instrumentation.stage('parse_gesture_text.regex'):
+        matches = _LINE_PATTERN.findall(text)
+    joint_number = len(Frame.get_joint_names())
+    if len(matches) == 0:
+        return np.empty((0, 3), dtype=dtype), np.empty((0, joint_number, 3), dtype=dtype)
+
+    names, coordinates = zip(*matches)
+    values = np.array(','.join(coordinates).split(','), dtype=np.float64)
+    if values.size != 3 * len(names):
+        raise ValueError('every line should have exactly three coordinates')
+    values = values.reshape(-1, 3)
+
+    # a data file only has a few distinct names, so each distinct name is looked up once and mapped to
+    # a column index, -1 for 'RootPos' and -2 for an unknown joint name
+    name_index = {name: get_column_index(name) for name in set(names)}
+    column_index = np.fromiter(map(name_index.__getitem__, names), dtype=np.intp, count=len(names))
+
+    is_root = column_index == -1
+    if not is_root[0]:
+        raise ValueError('joint data is found before the first RootPos')
+    # 'frame_index' tells which frame each line belongs to
+    frame_index = np.cumsum(is_root) - 1
+
+    root_pos = values[is_root].astype(dtype)
+    joints = np.full((len(root_pos), joint_number, 3), np.nan, dtype=dtype)
+    is_joint = column_index >= 0
+    joints[frame_index[is_joint], column_index[is_joint]] = values[is_joint]
+    Instrumentation.count('frames_parsed', len(root_pos))
+    return root_pos, joints
+
+
+def parse_gesture_file(file_name: str, dtype=np.float64) -> tuple:
+    """ Reading a gesture data file in bulk and parsing it into arrays
+    Parameters:
+        file_name(str) : file name string,
+        dtype(numpy dtype) : float type of the returned arrays
+
+    Returns:
+        tuple : (root_pos, joints) as described in 'parse_gesture_text'
+
+    the file is read into a single buffer, and a byte order mark at the beginning of the file is dropped
+    """
+    with Instrumentation.stage('parse_gesture_file.io'):
+        with open(file_name, encoding='utf-8-sig') as fopen:
+            text = fopen.read()
+    Instrumentation.count('characters_read', len(text))
+    return parse_gesture_text(text, dtype)
+
+
+def format_gesture_text(root_pos: np.ndarray, joints: np.ndarray) -> str:
+    """ Formatting arrays into the content of a gesture data file
+    Parameters:
+        root_pos(np.ndarray), joints(np.ndarray) : arrays as described in 'parse_gesture_text'
+
+    Returns:
+        str : lines in the format of the data files with CRLF line endings and 8 decimals, without a byte order mark.
+              Missing joints (NaN) are left out, so parsing the text gives the same arrays back
+    """
+    order = [_JOINT_INDEX[name] for name in _LINE_JOINT_NAMES]
+    values = np.concatenate((np.asarray(root_pos, dtype=np.float64).reshape(-1, 3),
+                             np.asarray(joints, dtype=np.float64)[:, order].reshape(len(joints), -1)), axis=1)
+    line_names = ['RootPos'] + [f'Hand_{name}' for name in _LINE_JOINT_NAMES]
+    if not np.isnan(values).any():
+        # a frame is formatted by a single 'str.format' call on a template of all its lines
+        template = ''.join(f'{name}, ({{:.8f}}, {{:.8f}}, {{:.8f}})\r\n' for name in line_names)
+        return ''.join(template.format(*frame_values) for frame_values in values.tolist())
+    lines = []
+    for frame_values in values.reshape(len(values), -1, 3).tolist():
+        lines += [f'{name}, ({x:.8f}, {y:.8f}, {z:.8f})\r\n' for (name, (x, y, z)) in zip(line_names, frame_values)
+                  if x == x]  # NaN is the only value which is not equal to itself
+    return ''.join(lines)
+
+
+def _split_complete_frames(text: str) -> tuple:
+    """ Splitting text into complete frames and the rest starting from the last 'RootPos' line,
+    because the last frame may continue in the text read next """
+    root_pos_start = text.rfind('RootPos')
+    if root_pos_start == -1:
+        return '', text
+    line_start = text.rfind('\n', 0, root_pos_start) + 1
+    return text[:line_start], text[line_start:]
+
+
+def iter_hand_frames(source, hand_type: str = None, batch_size: int = 256, dtype=np.float64,
+                     chunk_size: int = 1 << 18):
+    """ Reading a gesture data file incrementally and yielding its frames in batches of arrays
+    Parameters:
+        source(str or file object) : data file name, or a text file object such as 'sys.stdin',
+        hand_type(str) : hand side e.g 'R' or 'L', if it is None it is taken from the data file name,
+        batch_size(int) : the number of frames in each batch, the last batch may have fewer frames,
+        dtype(numpy dtype) : float type of the arrays,
+        chunk_size(int) : the number of characters read at once
+
+    Returns:
+        generator : HandFrames of at most 'batch_size' frames, frame numbers continue across batches
+
+    at most 'chunk_size' characters and one batch of frames are held at the same time, so a file of any size,
+    or a stream which never ends, is processed in bounded memory. A frame is yielded only after the next 'RootPos'
+    line (or the end of the data) is read, because until then more joints of the frame may still come
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size should be at least one')
+    if isinstance(source, (str, pathlib.PurePath)):
+        if hand_type is None:
+            hand_type = parse_file_name(source)[1]
+        with open(source, encoding='utf-8-sig') as fopen:
+            yield from iter_hand_frames(fopen, hand_type, batch_size, dtype, chunk_size)
+        return
+    if hand_type is None:
+        raise ValueError('hand_type should be given when reading from a file object')
+
+    # pending arrays are frames parsed but not yielded yet
+    pending_root_pos, pending_joints = [], []
+    pending_number = 0
+    next_frame_number = 1
+    rest = ''
+    is_first_chunk = True
+    while True:
+        chunk = source.read(chunk_size)
+        if is_first_chunk:  # a byte order mark at the beginning of the data is dropped
+            chunk = chunk.lstrip('\ufeff')
+            is_first_chunk = False
+        if chunk:
+            # only whole lines are parsed, and the last frame waits for the next 'RootPos' line
+            text = rest + chunk
+            line_end = text.rfind('\n') + 1
+            complete, rest = _split_complete_frames(text[:line_end])
+            rest += text[line_end:]
+        else:  # end of data, every remaining line belongs to the last frame
+            complete, rest = rest, ''
+
+        root_pos, joints = parse_gesture_text(complete, dtype)
+        if len(root_pos) != 0:
+            pending_root_pos.append(root_pos)
+            pending_joints.append(joints)
+            pending_number += len(root_pos)
+
+        while pending_number >= batch_size or (not chunk and pending_number > 0):
+            root_pos = np.concatenate(pending_root_pos)
+            joints = np.concatenate(pending_joints)
+            number = min(batch_size, pending_number)
+            yield HandFrames(hand_type, root_pos[:number], joints[:number],
+                             np.arange(next_frame_number, next_frame_number + number, dtype=np.int32))
+            next_frame_number += number
+            pending_root_pos, pending_joints = [root_pos[number:]], [joints[number:]]
+            pending_number -= number
+
+        if not chunk:
+            return
+
+
+def iter_frames(source, hand_type: str = None, batch_size: int = 256, chunk_size: int = 1 << 18):
+    """ Reading a gesture data file incrementally and yielding its frames one by one
+    Parameters:
+        source(str or file object), hand_type(str), batch_size(int), chunk_size(int) : the same as 'iter_hand_frames'
+
+    Returns:
+        generator : Frame objects, each of them is a view of a row of the batch it belongs to
+    """
+    for hand_frames in iter_hand_frames(source, hand_type, batch_size, np.float64, chunk_size):
+        yield from hand_frames
@@ -0,0 +1,266 @@
+import hashlib
+import os
+import sys
+import threading
+
+import numpy as np
+
+from gesture_parser import parse_file_name, parse_gesture_text
+from instrumentation import instrumented
+from main import create_frame
+from models.gesture import Gesture
+from models.gestures import Gestures
+from models.hand_frames import HandFrames
+
+
+class GestureWatcher:
+    """ This is a class for keeping Gestures up to date with a data directory while files are being recorded.
+
+    The directory is polled for '.txt' files. A new file is parsed and added to Gestures. A file which has grown is
+    read from the byte offset where the previous read stopped, and only its new frames are parsed and appended to
+    the hand side of its gesture, with frame numbers continuing from the existing frames. A file which has shrunk
+    or was rewritten is parsed again and replaces its hand side, and a removed file removes its hand side.
+    A grown file is only taken as appended when it is the same file (inode) and the bytes just before the offset
+    are the ones parsed at the previous read, otherwise it was rewritten. If its new bytes can not be parsed,
+    it is parsed again from the beginning as well.
+
+    The last frame of a file is only taken once it has every joint or the next 'RootPos' line has been written,
+    because the rest of it may still be on its way. Its bytes are read again at the next poll.
+    Every change is reported to listeners as a dictionary
+        {'type': 'added', 'appended', 'replaced' or 'removed', 'gesture_name': 'Gesture 4', 'hand_side': 'R',
+         'file_name': path, 'first_frame_number': 1, 'frame_count': frames added}
+    Listeners are called from the thread that polls, i.e the thread calling 'poll' or the watching thread.
+
+    at the time of instantiation, it takes a data directory, Gestures to keep up to date (a new one if None),
+    whether to keep frames in compact storage and a float type for its constructor
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # each of them represents a type of change
+    __ADDED = 'added'
+    __APPENDED = 'appended'
+    __REPLACED = 'replaced'
+    __REMOVED = 'removed'
+    # the number of bytes before the offset of a file whose digest tells whether they are still the bytes parsed
+    __FINGERPRINT_BYTES = 4096
+
+    def __init__(self, data_dir: str = None, gestures: Gestures = None, compact: bool = True, dtype=np.float64):
+        if data_dir is None:
+            data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+        self.data_dir = os.path.abspath(data_dir)
+        self.gestures = gestures if gestures is not None else Gestures()
+        self.compact = compact
+        self.dtype = dtype
+        # state of each file, {path: {'offset', 'fingerprint', 'inode', 'size', 'mtime_ns', 'frame_count',
+        # 'gesture_name', 'hand_side'}}, 'offset' is the number of bytes parsed so far and 'fingerprint' is a digest
+        # of the bytes before it (see '__read_frames'). A file which could not be parsed has no gesture name
+        self.__files = dict()
+        self.__listeners = []
+        self.__lock = threading.Lock()
+        self.__stop_event = threading.Event()
+        self.__thread = None
+
+    def add_listener(self, listener):
+        """ Adding a function called with each change, see the class description """
+        self.__listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.__listeners.remove(listener)
+
+    @instrumented('GestureWatcher.poll')
+    def poll(self) -> list:
+        """ Checking the data directory once and applying every change to the gestures
+        Returns:
+            list : changes in the order they were applied, each of them has been reported to the listeners
+        """
+        with self.__lock:
+            changes = []
+            entries = {entry.path: entry.stat() for entry in os.scandir(self.data_dir)
+                       if entry.is_file() and entry.name.endswith('.txt')}
+            for path in sorted(entries.keys()):
+                stat = entries[path]
+                state = self.__files.get(path)
+                if state is not None and stat.st_size == state['size'] and stat.st_mtime_ns == state['mtime_ns']:
+                    continue
+                if state is not None and state['gesture_name'] is not None and stat.st_size >= state['offset'] \
+                        and stat.st_ino == state['inode']:
+                    changes += self.__read_appended(path, stat, state)
+                else:
+                    changes += self.__read_whole(path, stat, state)
+            for path in sorted(set(self.__files.keys()) - set(entries.keys())):
+                changes += self.__remove(path)
+
+        for change in changes:
+            for listener in list(self.__listeners):
+                listener(change)
+        return changes
+
+    @classmethod
+    def __get_fingerprint(cls, data: bytes) -> bytes:
+        """ Getting a digest of the last '__FINGERPRINT_BYTES' bytes of data """
+        return hashlib.blake2b(data[-cls.__FINGERPRINT_BYTES:], digest_size=16).digest()
+
+    def __read_frames(self, path: str, offset: int, hand_side: str, first_frame_number: int,
+                      fingerprint: bytes = None):
+        """ Reading complete frames from a byte offset of a file
+        Parameters:
+            path(str) : path of the file,
+            offset(int) : byte offset to read from,
+            hand_side(str) : hand side of the file,
+            first_frame_number(int) : frame number of the first new frame,
+            fingerprint(bytes) : the fingerprint returned at the previous read, it is not checked if it is None
+
+        Returns:
+            tuple : (HandFrames of the new frames, byte offset after the last complete frame, fingerprint of the
+                    bytes before that offset), or None if the bytes before 'offset' do not match 'fingerprint'
+        """
+        # the bytes before the offset are read with the new ones, so both come from the same version of the file
+        context_start = max(0, offset - self.__FINGERPRINT_BYTES)
+        with open(path, 'rb') as data_file:
+            data_file.seek(context_start)
+            context = data_file.read()
+        if fingerprint is not None and self.__get_fingerprint(context[:offset - context_start]) != fingerprint:
+            return None
+        data = context[offset - context_start:]
+        start = 0
+        if offset == 0 and data.startswith(b'\xef\xbb\xbf'):  # a byte order mark at the beginning is dropped
+            start = 3
+        # only whole lines are parsed
+        end = data.rfind(b'\n') + 1
+        root_pos_start = data.rfind(b'RootPos', start, end)
+        last_frame_start = data.rfind(b'\n', 0, root_pos_start) + 1 if root_pos_start != -1 else end
+        last_frame_start = max(last_frame_start, start)
+        root_pos, joints = parse_gesture_text(data[start:end].decode('utf-8'), self.dtype)
+        if len(root_pos) != 0 and last_frame_start < end and np.isnan(joints[-1]).any():
+            # the last frame may still get more joints, it is read again at the next poll
+            root_pos, joints = root_pos[:-1], joints[:-1]
+            end = last_frame_start
+        frame_numbers = np.arange(first_frame_number, first_frame_number + len(root_pos), dtype=np.int32)
+        new_fingerprint = self.__get_fingerprint(context[:offset - context_start + end])
+        return HandFrames(hand_side, root_pos, joints, frame_numbers), offset + end, new_fingerprint
+
+    def __add_frames(self, gesture: Gesture, hand_frames: HandFrames):
+        """ Appending frames to a hand side of a gesture in the storage the watcher is configured with """
+        if self.compact:
+            gesture.set_hand_frames(hand_frames)
+        else:
+            for (frame_number, root_pos, joints) in zip(hand_frames.get_frame_numbers().tolist(),
+                                                        hand_frames.get_root_pos().tolist(),
+                                                        hand_frames.get_joints().tolist()):
+                gesture.set_frames_data(create_frame(hand_frames.hand_type, frame_number, root_pos, joints))
+        gesture.set_frame_number()  # the number of frames has changed
+
+    def __replace_hand_side(self, gesture_name: str, hand_side: str, hand_frames: HandFrames = None):
+        """ Replacing frames of a hand side of a gesture, the hand side is removed if 'hand_frames' is None """
+        new_gesture = Gesture(gesture_name)
+        old_gesture = self.gestures.get_list_of_gesture().get(gesture_name)
+        if old_gesture is not None:
+            for (each_hand_side, frames) in old_gesture.get_frames_data_in_dict().items():
+                if each_hand_side != hand_side and len(frames) != 0:
+                    self.__add_frames(new_gesture, old_gesture.get_hand_frames(each_hand_side))
+        if hand_frames is not None and len(hand_frames) != 0:
+            self.__add_frames(new_gesture, hand_frames)
+        if len(new_gesture.get_frames_data_in_dict()) == 0:
+            self.gestures.remove_gesture(gesture_name)
+        else:
+            self.gestures.replace_gesture(new_gesture)
+
+    def __read_whole(self, path: str, stat: os.stat_result, state: dict) -> list:
+        """ Parsing a new, shrunk or rewritten file from the beginning """
+        changes = []
+        if state is not None and state['gesture_name'] is not None:
+            changes += self.__remove(path)
+        try:
+            gesture_name, hand_side = parse_file_name(path)
+            hand_frames, offset, fingerprint = self.__read_frames(path, 0, hand_side, 1)
+        except Exception as e:
+            print(f'{e}: Data file is ill-formatted', file=sys.stderr)
+            self.__files.update({path: {'offset': 0, 'fingerprint': None, 'inode': stat.st_ino,
+                                        'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'frame_count': 0,
+                                        'gesture_name': None, 'hand_side': None}})
+            return changes
+
+        self.__replace_hand_side(gesture_name, hand_side, hand_frames)
+        self.__files.update({path: {'offset': offset, 'fingerprint': fingerprint, 'inode': stat.st_ino,
+                                    'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                    'frame_count': len(hand_frames), 'gesture_name': gesture_name,
+                                    'hand_side': hand_side}})
+        change_type = self.__REPLACED if len(changes) != 0 else self.__ADDED
+        return [{'type': change_type, 'gesture_name': gesture_name, 'hand_side': hand_side, 'file_name': path,
+                 'first_frame_number': 1, 'frame_count': len(hand_frames)}]
+
+    def __read_appended(self, path: str, stat: os.stat_result, state: dict) -> list:
+        """ Parsing only the bytes written after the previous read, the file is parsed again from the beginning
+        when the bytes already parsed have changed or the new bytes can not be parsed """
+        try:
+            result = self.__read_frames(path, state['offset'], state['hand_side'], state['frame_count'] + 1,
+                                        state['fingerprint'])
+        except Exception:
+            result = None
+        if result is None:
+            return self.__read_whole(path, stat, state)
+        hand_frames, offset, fingerprint = result
+        state.update({'offset': offset, 'fingerprint': fingerprint, 'size': stat.st_size,
+                      'mtime_ns': stat.st_mtime_ns})
+        if len(hand_frames) == 0:
+            return []
+
+        gesture = self.gestures.get_list_of_gesture().get(state['gesture_name'])
+        if gesture is None:
+            gesture = Gesture(state['gesture_name'])
+            self.gestures.add_gesture(gesture)
+        self.__add_frames(gesture, hand_frames)
+        first_frame_number = state['frame_count'] + 1
+        state['frame_count'] += len(hand_frames)
+        return [{'type': self.__APPENDED, 'gesture_name': state['gesture_name'], 'hand_side': state['hand_side'],
+                 'file_name': path, 'first_frame_number': first_frame_number, 'frame_count': len(hand_frames)}]
+
+    def __remove(self, path: str) -> list:
+        state = self.__files.pop(path)
+        if state['gesture_name'] is None:
+            return []
+        self.__replace_hand_side(state['gesture_name'], state['hand_side'])
+        return [{'type': self.__REMOVED, 'gesture_name': state['gesture_name'], 'hand_side': state['hand_side'],
+                 'file_name': path, 'first_frame_number': 1, 'frame_count': 0}]
+
+    def watch(self, interval: float = 1.0):
+        """ Polling every 'interval' seconds until 'stop' is called, it blocks the calling thread """
+        self.__stop_event.clear()
+        while not self.__stop_event.is_set():
+            try:
+                self.poll()
+            except OSError as e:  # e.g the data directory is being moved, it is tried again at the next poll
+                print(f'{e}: Data directory could not be read', file=sys.stderr)
+            self.__stop_event.wait(interval)
+
+    def start(self, interval: float = 1.0):
+        """ Polling in a background thread, see 'watch' """
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self.watch, args=(interval,), daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """ Stopping 'watch' or the background thread, and waiting for the background thread to finish """
+        self.__stop_event.set()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+            self.__thread = None
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Watch a data directory and report changes to gestures')
+    parser.add_argument('data_dir', nargs='?', default=None)
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between polls')
+    arguments = parser.parse_args()
+
+    gesture_watcher = GestureWatcher(arguments.data_dir)
+    gesture_watcher.add_listener(lambda change: print(json.dumps(change), flush=True))
+    try:
+        gesture_watcher.watch(arguments.interval)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,239 @@
+import atexit
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import time
+from contextlib import nullcontext
+
+
+class Instrumentation:
+    """ This is a class for recording where time goes in loading, extraction and visualisation.
+
+    Hot paths are split into named stages, e.g 'parse_gesture_file.io' or 'create_gesture', and each time a stage
+    runs its duration is added to a histogram of the stage. Counters such as the number of frames parsed are recorded
+    next to them. Optionally a cProfile profiler runs while instrumentation is enabled, and its statistics are
+    dumped to a pstats file.
+
+    Instrumentation is disabled unless it is enabled by 'enable' or by the environment variable
+    'GESTURE_INSTRUMENT' (set to '1', 'true', 'yes' or 'on'). Setting 'GESTURE_INSTRUMENT_PROFILE' to a file name
+    enables it with the profiler as well. When it is enabled by the environment, a summary is written to stderr
+    and the profile to the file when the program exits.
+    While it is disabled, a stage is a shared no-op context manager and a counter is a single flag check,
+    so instrumented code runs at almost the same speed as uninstrumented code.
+    Stages running in worker processes, e.g 'read_data_files' with workers, are not recorded.
+    In the program, all methods are class methods, and therefore this class will NOT be instantiated.
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    __ENABLED_ENV = 'GESTURE_INSTRUMENT'
+    __PROFILE_ENV = 'GESTURE_INSTRUMENT_PROFILE'
+    __NULL_STAGE = nullcontext()
+
+    # state of instrumentation, '__stages' maps a stage name to its statistics
+    # and '__counters' maps a counter name to its value
+    __enabled = False
+    __profiler = None
+    __stages = dict()
+    __counters = dict()
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls.__enabled
+
+    @classmethod
+    def enable(cls, profile: bool = False):
+        """ Enabling instrumentation
+        Parameters:
+            profile(bool) : True to run a cProfile profiler until 'disable' is called
+
+        Returns:
+            void
+        """
+        cls.__enabled = True
+        if profile and cls.__profiler is None:
+            cls.__profiler = cProfile.Profile()
+            cls.__profiler.enable()
+
+    @classmethod
+    def disable(cls):
+        """ Disabling instrumentation and stopping the profiler, recorded data is kept until 'reset' is called """
+        cls.__enabled = False
+        if cls.__profiler is not None:
+            cls.__profiler.disable()
+
+    @classmethod
+    def reset(cls):
+        """ Clearing every stage, counter and profile recorded so far """
+        cls.__stages.clear()
+        cls.__counters.clear()
+        if cls.__profiler is not None:
+            is_profiling = cls.__enabled
+            cls.__profiler.disable()
+            cls.__profiler = cProfile.Profile()
+            if is_profiling:
+                cls.__profiler.enable()
+
+    @classmethod
+    def stage(cls, name: str):
+        """ Getting a context manager which records the duration of a stage
+        Parameters:
+            name(str) : stage name e.g 'parse_gesture_text.regex'
+
+        Returns:
+            context manager : e.g 'with Instrumentation.stage('create_gesture'): ...'
+        """
+        if not cls.__enabled:
+            return cls.__NULL_STAGE
+        statistics = cls.__stages.get(name)
+        if statistics is None:
+            statistics = cls.__stages.setdefault(name, _StageStatistics())
+        return _Stage(statistics)
+
+    @classmethod
+    def count(cls, name: str, value: int = 1):
+        """ Adding a value to a counter e.g 'Instrumentation.count('frames_parsed', len(root_pos))' """
+        if cls.__enabled:
+            cls.__counters[name] = cls.__counters.get(name, 0) + value
+
+    @classmethod
+    def get_summary(cls) -> dict:
+        """ Getting recorded stages and counters
+        Returns:
+            dict : {'stages': {name: {..}}, 'counters': {name: value}}. Each stage has its number of runs,
+                   total, mean, minimum and maximum duration in milliseconds, the 50th, 90th and 99th percentiles
+                   (upper bounds of histogram buckets) and the histogram itself, which maps the upper bound
+                   of each bucket in microseconds (powers of two) to the number of runs in the bucket
+        """
+        return {'stages': {name: statistics.get_summary() for (name, statistics) in sorted(cls.__stages.items())},
+                'counters': dict(sorted(cls.__counters.items()))}
+
+    @classmethod
+    def format_summary(cls) -> str:
+        """ Formatting recorded stages and counters as a table """
+        summary = cls.get_summary()
+        lines = [f"{'stage':34s} {'count':>8s} {'total ms':>11s} {'mean ms':>10s} {'p90 ms':>10s} {'max ms':>10s}"]
+        for (name, stage) in summary['stages'].items():
+            lines.append(f"{name:34s} {stage['count']:8d} {stage['total_ms']:11.3f} {stage['mean_ms']:10.4f} "
+                         f"{stage['p90_ms']:10.4f} {stage['max_ms']:10.4f}")
+        for (name, value) in summary['counters'].items():
+            lines.append(f'{name:34s} {value:8d}')
+        return '\n'.join(lines)
+
+    @classmethod
+    def print_summary(cls, file=sys.stderr):
+        print(cls.format_summary(), file=file)
+
+    @classmethod
+    def get_profile_stats(cls) -> pstats.Stats:
+        """ Getting pstats.Stats of the profile recorded so far, or None if instrumentation was not enabled
+        with the profiler """
+        if cls.__profiler is None:
+            return None
+        return pstats.Stats(cls.__profiler)
+
+    @classmethod
+    def dump_profile(cls, file_name: str) -> bool:
+        """ Writing the profile recorded so far to a pstats file, which can be read by 'pstats.Stats(file_name)'
+        or tools such as snakeviz. Returns False if instrumentation was not enabled with the profiler """
+        if cls.__profiler is None:
+            return False
+        # 'dump_stats' stops the profiler, so it is started again if instrumentation is still enabled
+        cls.__profiler.dump_stats(file_name)
+        if cls.__enabled:
+            cls.__profiler.enable()
+        return True
+
+    @classmethod
+    def enable_from_environment(cls):
+        """ Enabling instrumentation if it is requested by the environment variables, and reporting at exit """
+        profile_file_name = os.environ.get(cls.__PROFILE_ENV, '').strip()
+        is_requested = os.environ.get(cls.__ENABLED_ENV, '0').strip().lower() in ('1', 'true', 'yes', 'on')
+        if not is_requested and not profile_file_name:
+            return
+        cls.enable(profile=bool(profile_file_name))
+
+        def report():
+            cls.disable()
+            cls.print_summary()
+            if profile_file_name:
+                cls.dump_profile(profile_file_name)
+        atexit.register(report)
+
+
+class _StageStatistics:
+    """ Durations of a stage, a histogram bucket 'i' counts durations up to 2 ** i microseconds """
+    __slots__ = ('count', 'total_ns', 'min_ns', 'max_ns', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = []
+
+    def add(self, duration_ns: int):
+        self.count += 1
+        self.total_ns += duration_ns
+        if self.min_ns is None or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        bucket = ((duration_ns + 999) // 1000 - 1).bit_length() if duration_ns > 1000 else 0
+        if bucket >= len(self.buckets):
+            self.buckets.extend([0] * (bucket + 1 - len(self.buckets)))
+        self.buckets[bucket] += 1
+
+    def get_percentile_ms(self, percent: float) -> float:
+        """ Getting the upper bound of the histogram bucket where the given percentile falls, in milliseconds """
+        rank = percent / 100 * self.count
+        cumulative = 0
+        for (bucket, bucket_count) in enumerate(self.buckets):
+            cumulative += bucket_count
+            if cumulative >= rank and bucket_count > 0:
+                return min(2 ** bucket / 1000, self.max_ns / 1e6)
+        return self.max_ns / 1e6
+
+    def get_summary(self) -> dict:
+        return {'count': self.count, 'total_ms': self.total_ns / 1e6, 'mean_ms': self.total_ns / 1e6 / self.count,
+                'min_ms': self.min_ns / 1e6, 'max_ms': self.max_ns / 1e6, 'p50_ms': self.get_percentile_ms(50),
+                'p90_ms': self.get_percentile_ms(90), 'p99_ms': self.get_percentile_ms(99),
+                'histogram_us': {2 ** bucket: bucket_count for (bucket, bucket_count) in enumerate(self.buckets)
+                                 if bucket_count > 0}}
+
+
+class _Stage:
+    """ A context manager adding its duration to the statistics of a stage """
+    __slots__ = ('statistics', 'start')
+
+    def __init__(self, statistics: _StageStatistics):
+        self.statistics = statistics
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.statistics.add(time.perf_counter_ns() - self.start)
+        return False
+
+
+def instrumented(name: str):
+    """ A decorator recording every call of a function as a stage, see 'Instrumentation.stage'
+
+    while instrumentation is disabled the function is called directly after a single flag check
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not Instrumentation.is_enabled():
+                return function(*args, **kwargs)
+            with Instrumentation.stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+Instrumentation.enable_from_environment()
@@ -0,0 +1,400 @@
+import asyncio
+import io
+import json
+import os
+import stat
+import sys
+import time
+
+import numpy as np
+
+import gesture_parser
+from models.frame import Frame
+from models.gesture import Gesture
+from recognition import GestureRecognizer
+from smoothing import ExponentialFilter, OneEuroFilter
+
+
+class FrameAssembler:
+    """ This is a class for assembling frames from lines arriving one by one, in the same
+    '<joint_name>, (<coordinate data>)' format as the data files.
+
+    A frame is complete as soon as every joint of it has arrived, or when the next 'RootPos' line arrives,
+    so a frame is passed on without waiting for the next frame when the producer sends every joint.
+    """
+
+    def __init__(self):
+        self.__joint_number = len(Frame.get_joint_names())
+        self.__root_pos = None
+        self.__joints = None
+        self.__received = 0
+
+    def feed(self, line: str):
+        """ Feeding a line
+        Parameters:
+            line(str) : a line of text
+
+        Returns:
+            tuple : (root_pos, joints) of a completed frame, or None if no frame is completed by the line.
+                    Lines which are not in the format, and joint lines before the first 'RootPos', are ignored
+        """
+        parsed_line = gesture_parser.parse_line(line)
+        if parsed_line is None:
+            return None
+        column, coordinate = parsed_line
+
+        completed = None
+        if column == -1:  # 'RootPos' starts a new frame
+            completed = self.flush()
+            self.__root_pos = np.array(coordinate)
+            self.__joints = np.full((self.__joint_number, 3), np.nan)
+            self.__received = 0
+        elif column >= 0 and self.__joints is not None:
+            if np.isnan(self.__joints[column, 0]):
+                self.__received += 1
+            self.__joints[column] = coordinate
+            if self.__received == self.__joint_number:
+                completed = self.flush()
+        return completed
+
+    def flush(self):
+        """ Completing the current frame, returns (root_pos, joints) or None if there is no frame """
+        if self.__root_pos is None:
+            return None
+        completed = (self.__root_pos, self.__joints)
+        self.__root_pos, self.__joints, self.__received = None, None, 0
+        return completed
+
+
+class FrameRingBuffer:
+    """ This is a class for keeping the most recent frames of a hand side in fixed size arrays.
+    Once it is full, a new frame overwrites the oldest one, so memory does not grow with the stream
+
+    at the time of instantiation, it takes a capacity (the number of frames) for its constructor
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError('capacity should be at least one')
+        self.capacity = capacity
+        self.__root_pos = np.zeros((capacity, 3))
+        self.__joints = np.zeros((capacity, len(Frame.get_joint_names()), 3))
+        # total number of frames appended so far, the next frame is written at 'frame_count % capacity'
+        self.frame_count = 0
+
+    def append(self, root_pos: np.ndarray, joints: np.ndarray):
+        index = self.frame_count % self.capacity
+        self.__root_pos[index] = root_pos
+        self.__joints[index] = joints
+        self.frame_count += 1
+
+    def get_latest_joints(self, frame_number: int = None) -> np.ndarray:
+        """ Getting a copy of the latest joints from the oldest one, of shape (frames, joints, 3) """
+        size = min(self.frame_count, self.capacity)
+        frame_number = size if frame_number is None else min(frame_number, size)
+        indexes = np.arange(self.frame_count - frame_number, self.frame_count) % self.capacity
+        return self.__joints[indexes]
+
+    def get_latest_root_pos(self, frame_number: int = None) -> np.ndarray:
+        """ Getting a copy of the latest 'RootPos' from the oldest one, of shape (frames, 3) """
+        size = min(self.frame_count, self.capacity)
+        frame_number = size if frame_number is None else min(frame_number, size)
+        indexes = np.arange(self.frame_count - frame_number, self.frame_count) % self.capacity
+        return self.__root_pos[indexes]
+
+
+class FrameStream:
+    """ This is a class for the state of one producer of frames (a connection or stdin) of a hand side.
+    Every stream has its own ring buffer, joint filter and detection state, so frames of concurrent producers
+    are never interleaved into one sequence
+
+    at the time of instantiation, it takes a hand side, a ring buffer capacity and a joint filter for its constructor
+    """
+
+    def __init__(self, hand_side: str, capacity: int, joint_filter=None):
+        self.hand_side = hand_side
+        self.buffer = FrameRingBuffer(capacity)
+        self.joint_filter = joint_filter
+        # frame count at the last matching run, the last detection and the arrival time of the latest frame
+        self.matched_frame_count = 0
+        self.last_detection = (None, None)
+        self.latest_arrival = 0.0
+        # 'closing' makes the next matching run match any unmatched frame even if fewer than 'stride' frames arrived,
+        # 'closed' is set once the stream is matched for the last time
+        self.closing = False
+        self.closed = asyncio.Event()
+
+
+class LiveRecognizer:
+    """ This is a class for recognising gestures in live hand tracking streams with asyncio.
+
+    Frames are read from stdin, TCP connections or Unix socket connections, each of them bound to a hand side.
+    Each of them is a FrameStream of its own, and its frames are appended to the ring buffer of the stream.
+    Every 'stride' frames the latest 'window' frames of a stream are matched against the references of the hand side
+    of a GestureRecognizer in a worker thread, so reading never waits for matching. If frames arrive faster than
+    they are matched, matching runs are coalesced: a matching run always takes the latest frames, and the runs it
+    replaces are counted as skipped instead of queueing up. When a stream ends, its remaining frames are matched.
+    A detection is reported when the nearest reference is within the threshold of the hand side, and the same
+    gesture is not reported again for the stream for 'cooldown' frames.
+    The default window is the longest reference, so a whole gesture fits in it, and the default threshold of a hand
+    side is half the DTW distance between its two nearest references of different gestures (see
+    'GestureRecognizer.get_separation'), so a window is detected as the gesture it is nearer to than half way to
+    another one.
+    Joints of each frame can be smoothed by a streaming filter of 'smoothing' (e.g OneEuroFilter) before they are
+    buffered, 'create_joint_filter' is called once for each stream to create its filter.
+
+    at the time of instantiation, it takes a GestureRecognizer, window, stride, threshold, cooldown,
+    a function called with each detection and a function creating a filter for its constructor
+    """
+
+    def __init__(self, recognizer: GestureRecognizer, window: int = None, stride: int = 10, threshold: float = None,
+                 cooldown: int = 60, on_detection=None, create_joint_filter=None):
+        self.recognizer = recognizer
+        self.window = window if window is not None else max(1, recognizer.get_longest_reference())
+        self.stride = max(1, stride)
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.on_detection = on_detection if on_detection is not None else self.print_detection
+        self.__create_joint_filter = create_joint_filter
+        self.__thresholds = {hand_side: threshold if threshold is not None else recognizer.get_separation(hand_side) / 2
+                             for hand_side in [Gesture.right_hand(), Gesture.left_hand()]}
+        # open streams by their id, a stream is removed once it is closed
+        self.__streams = dict()
+        self.__next_stream_id = 0
+        self.__pending = asyncio.Event()
+        self.__statistics = {'frames': 0, 'matching_runs': 0, 'skipped_runs': 0, 'detections': 0,
+                             'frame_latency_ms_total': 0.0, 'frame_latency_ms_max': 0.0,
+                             'detection_latency_ms_total': 0.0, 'detection_latency_ms_max': 0.0}
+
+    @staticmethod
+    def print_detection(detection: dict):
+        """ Writing a detection to stdout as a JSON line """
+        print(json.dumps(detection), flush=True)
+
+    def get_threshold(self, hand_side: str) -> float:
+        """ Getting the maximum DTW distance of a detection of a hand side """
+        return self.__thresholds[hand_side]
+
+    def get_statistics(self) -> dict:
+        """ Getting counters and latencies, including mean latencies in milliseconds """
+        statistics = dict(self.__statistics)
+        statistics['frame_latency_ms_mean'] = statistics['frame_latency_ms_total'] / max(1, statistics['frames'])
+        statistics['detection_latency_ms_mean'] = \
+            statistics['detection_latency_ms_total'] / max(1, statistics['detections'])
+        return statistics
+
+    def open_stream(self, hand_side: str) -> int:
+        """ Opening a stream of frames of a hand side
+        Parameters:
+            hand_side(str) : 'R' or 'L'
+
+        Returns:
+            int : the id of the stream, passed to 'add_frame' and 'close_stream'
+        """
+        if hand_side not in self.__thresholds:
+            raise ValueError(f'{hand_side} is not one of {list(self.__thresholds)}')
+        joint_filter = self.__create_joint_filter() if self.__create_joint_filter is not None else None
+        stream_id = self.__next_stream_id
+        self.__next_stream_id += 1
+        self.__streams[stream_id] = FrameStream(hand_side, self.window, joint_filter)
+        return stream_id
+
+    def add_frame(self, stream_id: int, root_pos: np.ndarray, joints: np.ndarray, received_at: float):
+        """ Appending a completed frame to the ring buffer of a stream
+        Parameters:
+            stream_id(int) : an id from 'open_stream',
+            root_pos(np.ndarray), joints(np.ndarray) : a frame from FrameAssembler,
+            received_at(float) : 'time.perf_counter()' when the last line of the frame was received
+
+        Returns:
+            void
+        """
+        stream = self.__streams[stream_id]
+        if stream.joint_filter is not None:
+            joints = stream.joint_filter.filter_frame(joints)
+        stream.buffer.append(root_pos, joints)
+        now = time.perf_counter()
+        stream.latest_arrival = now
+        latency = (now - received_at) * 1000
+        self.__statistics['frames'] += 1
+        self.__statistics['frame_latency_ms_total'] += latency
+        self.__statistics['frame_latency_ms_max'] = max(self.__statistics['frame_latency_ms_max'], latency)
+        new_frames = stream.buffer.frame_count - stream.matched_frame_count
+        if new_frames >= self.stride:
+            # a request not taken yet is replaced by this one, which counts as a skipped run every 'stride' frames
+            if self.__pending.is_set() and new_frames % self.stride == 0:
+                self.__statistics['skipped_runs'] += 1
+            self.__pending.set()
+
+    async def close_stream(self, stream_id: int):
+        """ Matching frames of a stream which arrived after its last matching run, and removing the stream.
+        It returns once the stream is matched for the last time, so 'run_matching' should be running """
+        stream = self.__streams[stream_id]
+        stream.closing = True
+        self.__pending.set()
+        await stream.closed.wait()
+
+    async def consume(self, reader, hand_side: str):
+        """ Reading lines from a stream until it ends, adding completed frames of a hand side to a stream of its own,
+        and closing the stream when it ends. 'reader' is an asyncio.StreamReader or any object with an awaitable
+        'readline' """
+        stream_id = self.open_stream(hand_side)
+        assembler = FrameAssembler()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ConnectionError:  # a reset connection ends the stream as its end of file does
+                    break
+                if not line:
+                    break
+                received_at = time.perf_counter()
+                if isinstance(line, bytes):
+                    line = line.decode('utf-8', errors='replace')
+                completed = assembler.feed(line)
+                if completed is not None:
+                    self.add_frame(stream_id, completed[0], completed[1], received_at)
+            completed = assembler.flush()
+            if completed is not None:
+                self.add_frame(stream_id, completed[0], completed[1], time.perf_counter())
+        except BaseException:
+            # e.g cancelled at shutdown, when 'run_matching' may not run anymore, so the stream is not matched again
+            self.__streams.pop(stream_id).closed.set()
+            raise
+        await self.close_stream(stream_id)
+
+    async def read_stdin(self, hand_side: str):
+        """ Reading frames of a hand side from stdin until it ends """
+        try:
+            mode = os.fstat(sys.stdin.fileno()).st_mode
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            mode = 0
+        if stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or stat.S_ISCHR(mode):
+            loop = asyncio.get_running_loop()
+            reader = asyncio.StreamReader()
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        else:
+            # pipe transports only take pipes, sockets and character devices, so a file redirected to stdin
+            # is read line by line in a worker thread instead
+            reader = _ThreadLineReader(getattr(sys.stdin, 'buffer', sys.stdin))
+        await self.consume(reader, hand_side)
+
+    async def serve_tcp(self, host: str, port: int, hand_side: str):
+        """ Accepting TCP connections, each of them sends frames of a hand side """
+        async def handle(reader, writer):
+            await self.consume(reader, hand_side)
+            writer.close()
+        return await asyncio.start_server(handle, host, port)
+
+    async def serve_unix(self, path: str, hand_side: str):
+        """ Accepting Unix socket connections, each of them sends frames of a hand side """
+        async def handle(reader, writer):
+            await self.consume(reader, hand_side)
+            writer.close()
+        return await asyncio.start_unix_server(handle, path)
+
+    def __match(self, hand_side: str, joints: np.ndarray) -> list:
+        return self.recognizer.recognize(joints, k=1, hand_side=hand_side)
+
+    async def run_matching(self):
+        """ Matching the latest frames whenever enough new frames arrived, until it is cancelled """
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.__pending.wait()
+            self.__pending.clear()
+            await self.__match_streams(loop)
+
+    async def __match_streams(self, loop):
+        """ Matching the latest frames of each stream having enough new frames, and removing closing streams """
+        for (stream_id, stream) in list(self.__streams.items()):
+            frame_count = stream.buffer.frame_count
+            minimum_frames = 1 if stream.closing else self.stride
+            if frame_count - stream.matched_frame_count >= minimum_frames:
+                stream.matched_frame_count = frame_count
+                arrival = stream.latest_arrival
+                joints = stream.buffer.get_latest_joints()
+                # matching runs in a worker thread, so the event loop keeps reading frames in the meantime
+                result = await loop.run_in_executor(None, self.__match, stream.hand_side, joints)
+                self.__statistics['matching_runs'] += 1
+                self.__report(stream_id, stream, result, frame_count, arrival)
+            if stream.closing and stream.matched_frame_count == stream.buffer.frame_count:
+                del self.__streams[stream_id]
+                stream.closed.set()
+
+    def __report(self, stream_id: int, stream: FrameStream, result: list, frame_count: int, arrival: float):
+        """ Reporting the nearest reference of a matching run if it is a detection """
+        if len(result) == 0 or result[0][2] > self.__thresholds[stream.hand_side]:
+            return
+        gesture_name, _, distance = result[0]
+        last_gesture_name, last_frame_count = stream.last_detection
+        if gesture_name == last_gesture_name and frame_count - last_frame_count < self.cooldown:
+            return
+        stream.last_detection = (gesture_name, frame_count)
+        latency = (time.perf_counter() - arrival) * 1000
+        self.__statistics['detections'] += 1
+        self.__statistics['detection_latency_ms_total'] += latency
+        self.__statistics['detection_latency_ms_max'] = max(self.__statistics['detection_latency_ms_max'], latency)
+        self.on_detection({'hand': stream.hand_side, 'stream': stream_id, 'gesture': gesture_name,
+                           'distance': distance, 'frame': frame_count, 'latency_ms': latency})
+
+    async def finish(self):
+        """ Closing every open stream, see 'close_stream'. It is called when no more frames will arrive """
+        await asyncio.gather(*[self.close_stream(stream_id) for stream_id in list(self.__streams)])
+
+
+class _ThreadLineReader:
+    """ This is a class for reading lines of a blocking file in a worker thread, with the 'readline' of
+    asyncio.StreamReader """
+
+    def __init__(self, file):
+        self.__file = file
+
+    async def readline(self):
+        return await asyncio.get_running_loop().run_in_executor(None, self.__file.readline)
+
+
+async def _main(arguments):
+    import main
+
+    recognizer = GestureRecognizer(main.read_data_files())
+    create_joint_filter = {'none': None, 'exponential': ExponentialFilter,
+                           'one_euro': OneEuroFilter}[arguments.smoothing]
+    live_recognizer = LiveRecognizer(recognizer, arguments.window, arguments.stride, arguments.threshold,
+                                     arguments.cooldown, create_joint_filter=create_joint_filter)
+    matching = asyncio.create_task(live_recognizer.run_matching())
+    try:
+        if arguments.tcp is not None or arguments.unix is not None:
+            if arguments.tcp is not None:
+                host, port = arguments.tcp.rsplit(':', 1)
+                server = await live_recognizer.serve_tcp(host, int(port), arguments.hand)
+            else:
+                server = await live_recognizer.serve_unix(arguments.unix, arguments.hand)
+            async with server:
+                await server.serve_forever()
+        else:
+            await live_recognizer.read_stdin(arguments.hand)
+    finally:
+        matching.cancel()
+        print(json.dumps({'statistics': live_recognizer.get_statistics()}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Recognise gestures in a live hand tracking stream')
+    parser.add_argument('--hand', default=Gesture.right_hand(), choices=[Gesture.right_hand(), Gesture.left_hand()])
+    parser.add_argument('--tcp', help='host:port to listen on, stdin is read if neither --tcp nor --unix is given')
+    parser.add_argument('--unix', help='Unix socket path to listen on')
+    parser.add_argument('--window', type=int, default=None,
+                        help='number of latest frames matched, the longest reference by default')
+    parser.add_argument('--stride', type=int, default=10, help='number of new frames between matching runs')
+    parser.add_argument('--threshold', type=float, default=None,
+                        help='maximum DTW distance of a detection, half the distance between the two nearest '
+                             'references of different gestures of the hand side by default')
+    parser.add_argument('--cooldown', type=int, default=60, help='frames before the same gesture is reported again')
+    parser.add_argument('--smoothing', default='none', choices=['none', 'exponential', 'one_euro'],
+                        help='streaming filter smoothing joints before matching')
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
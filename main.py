@@ -1,9 +1,27 @@
-import os, glob, sys, pathlib
+import os, glob, sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+
+import numpy as np
 
 from models.frame import Frame
 from models.gesture import Gesture
 from models.gestures import Gestures
+from models.hand_frames import HandFrames
 from visualisation import Visualization
+from gesture_parser import parse_file_name, parse_gesture_file
+from gesture_cache import GestureCache
+from gesture_catalog import LazyGestures
+from gesture_codec import GestureCodec
+from instrumentation import Instrumentation, instrumented
+
+# (joint name, column in the parsed joint array) pairs of each finger,
+# the order of fingers is thumb, index, middle, ring and pinky
+_FINGER_JOINT_COLUMNS = tuple(tuple(zip(Frame.get_finger_joint_names(finger), Frame.get_finger_joint_columns(finger)))
+                               for finger in (Frame.get_thumb_finger(), Frame.get_index_finger(),
+                                              Frame.get_middle_finger(), Frame.get_ring_finger(),
+                                              Frame.get_pinky_finger()))
 
 
 def set_finger_data(finger_type: str, finger_data: tuple, frame: Frame):
@@ -16,18 +34,25 @@ def set_finger_data(finger_type: str, finger_data: tuple, frame: Frame):
     Returns:
         void
 
-    adding a finger data to an argument of frame based on the argument value of finger type
+    adding a finger data to an argument of frame based on the argument value of finger type.
+    the finger dictionary is written back by its setter, because a frame viewing a joint array row
+    (see 'Frame') returns a read-only copy of its finger dictionary
     """
     if finger_type.find('Thumb') != -1:
-        frame.get_thumb_data()[finger_type] = finger_data
+        get_finger_data, set_finger = frame.get_thumb_data, frame.set_thumb_data
     elif finger_type.find('Index') != -1:
-        frame.get_index_finger_data()[finger_type] = finger_data
+        get_finger_data, set_finger = frame.get_index_finger_data, frame.set_index_finger_data
     elif finger_type.find('Middle') != -1:
-        frame.get_middle_finger_data()[finger_type] = finger_data
+        get_finger_data, set_finger = frame.get_middle_finger_data, frame.set_middle_finger_data
     elif finger_type.find('Ring') != -1:
-        frame.get_ring_finger_data()[finger_type] = finger_data
+        get_finger_data, set_finger = frame.get_ring_finger_data, frame.set_ring_finger
     elif finger_type.find('Pinky') != -1:
-        frame.get_pinky_data()[finger_type] = finger_data
+        get_finger_data, set_finger = frame.get_pinky_data, frame.set_pinky
+    else:
+        return
+    finger_data_dict = dict(get_finger_data())
+    finger_data_dict[finger_type] = finger_data
+    set_finger(finger_data_dict)
 
 
 def is_root_pos(text_line: str):
@@ -76,6 +101,7 @@ def adding_frame(hand_frame_list: list, finger_name_list: list) -> list:
     return return_list
 
 
+@instrumented('extract_finger_frame')
 def extract_finger_frame(gesture_name: str, hand_side: str, finger_name_list: list,
                          gestures: Gestures) -> dict:
     """ Extract a list of Fingers' Data in all the frames of a list of hands for a gesture name
@@ -119,75 +145,232 @@ def extract_finger_frame(gesture_name: str, hand_side: str, finger_name_list: li
     return return_dict
 
 
-def read_gesture(file_name: str) -> Gesture:
-    """ Read a text file for a gesture
+def extract_finger_array(gesture_name: str, hand_side: str, finger_name_list: list, gestures: Gestures) -> tuple:
+    """ Extract an array of Fingers' Data in all the frames of a list of hands for a gesture name
     Parameters:
-        file_name(str): file name string
+        gesture_name(str) : input gesture name e.g Gesture 4,
+        hand_side(str) : hand side e.g 'R', 'L', or 'B',
+        finger_name_list(list) : list of finger names to extract its frame data ,
+        gestures(Gestures) : all gesture data
 
     Returns:
-        Gesture : an instance of Gesture object
+        tuple : (dict, joint_names) where dict maps each hand side to an array of shape (frames, joints, 3),
+                and joint_names is a tuple of joint names along the second axis of every array
 
-    this function is to read a given file line by line and generates a frame instance in accordance with finger type
-    then store the frame instance in the gesture instance
+    this function is an array version of 'extract_finger_frame'. Instead of walking every frame it slices
+    the joint array of each hand side, so for a gesture in compact storage the arrays are views without copying
+    (see 'HandFrames.select_fingers' for when a copy can not be avoided).
+    It looks like {'R': array of shape (frames, joints, 3), 'L': ...}
     """
+    gesture = gestures.get_list_of_gesture()[gesture_name]
+    if hand_side == Gesture.both_hand():
+        hand_side_list = [Gesture.left_hand(), Gesture.right_hand()]
+    else:
+        hand_side_list = [hand_side]
+
+    return_dict = dict()
+    joint_names = tuple()
+    for each_hand_side in hand_side_list:
+        finger_array, joint_names = gesture.get_hand_frames(each_hand_side).select_fingers(finger_name_list)
+        return_dict.update({each_hand_side: finger_array})
+    return return_dict, joint_names
+
 
-    # 'pathlib.Path(file_name).stem' will remove extension from the file_name
-    file_name_array = pathlib.Path(file_name).stem.split('_')
-    gesture_name = file_name_array[2] + ' ' + file_name_array[3]
+def create_frame(hand_type: str, frame_number: int, root_pos: list, joints: list) -> Frame:
+    """ Creating a frame instance from one row of parsed joint data
+    Parameters:
+        hand_type(str) : hand side e.g 'R' or 'L',
+        frame_number(int) : frame number starting from one,
+        root_pos(list) : 'RootPos' coordinate of the frame,
+        joints(list) : coordinates of each joint in the order of 'Frame.get_joint_names()'
+
+    Returns:
+        Frame : an instance of Frame object
+
+    each joint coordinate is stored in its finger dictionary as a tuple, the same way as 'set_finger_data' does.
+    joints missing in the data file (NaN coordinates) are not stored
+    """
+    frame = Frame(hand_type, frame_number, tuple(root_pos))
+    for (finger_data, joint_columns) in zip((frame.get_thumb_data(), frame.get_index_finger_data(),
+                                             frame.get_middle_finger_data(), frame.get_ring_finger_data(),
+                                             frame.get_pinky_data()), _FINGER_JOINT_COLUMNS):
+        for (joint_name, column) in joint_columns:
+            coordinate = joints[column]
+            if coordinate[0] == coordinate[0]:  # NaN is the only value which is not equal to itself
+                finger_data[joint_name] = tuple(coordinate)
+    return frame
+
+
+def read_gesture_arrays(file_name: str, dtype=np.float64, cache: GestureCache = None) -> tuple:
+    """ Read a text file for a gesture into arrays
+    Parameters:
+        file_name(str): file name string, a binary file of GestureCodec ('.gsb') is decoded instead of parsed,
+        dtype(numpy dtype): float type of the arrays,
+        cache(GestureCache): cache to load the parsed arrays from, the file is always parsed if it is None
+
+    Returns:
+        tuple : (root_pos, joints) as described in 'gesture_parser.parse_gesture_text'
+    """
+    if GestureCodec.is_encoded_file(file_name):  # a binary file is decoded straight into arrays
+        return GestureCodec.read_file(file_name, dtype)[2:]
+    if cache is not None:
+        return cache.load(file_name, dtype)
+    return parse_gesture_file(file_name, dtype)
+
+
+@instrumented('create_gesture')
+def create_gesture(gesture_name: str, hand_type: str, root_pos: np.ndarray, joints: np.ndarray,
+                   compact: bool = True) -> Gesture:
+    """ Creating a gesture instance from arrays of a hand side
+    Parameters:
+        gesture_name(str): gesture name e.g Gesture 4,
+        hand_type(str): hand side e.g 'R' or 'L',
+        root_pos(np.ndarray): 'RootPos' of each frame, shape (frames, 3),
+        joints(np.ndarray): joints of each frame, shape (frames, joints, 3),
+        compact(bool): True to keep the frames in contiguous arrays (HandFrames), False for a list of Frame objects
+
+    Returns:
+        Gesture : an instance of Gesture object
+
+    In compact storage the arrays are stored in the gesture instance as they are, otherwise it generates
+    a frame instance for each row of the arrays, then store the frame instance in the gesture instance
+    """
     gesture = Gesture(gesture_name)
-    hand_type = Gesture.left_hand() if file_name_array[0] == 'Left' else Gesture.right_hand()
-
-    import re
-    # this pattern will be used extract hands coordinate data from each lines of the given file
-    pattern = re.compile('(.*)(\s*,\s*)(\(.*\))')
-
-    with open(file_name) as fopen:
-        lines = fopen.readlines()
-        frame_number = 0
-        for line in lines:
-            match = pattern.search(line)
-            if match:  # line is in a format of '<finger_type>, (<coordinate data>)'
-                finger_type = match.group(1).strip()
-                # eval method will convert a string of '(<coordinate data>)' to a tuple
-                finger_data = eval(match.group(3).strip())
-                if is_root_pos(finger_type):  # the line is about 'RootPos'
-                    frame_number += 1  # a new frame starts so increase the frame number
-                    root_pos = finger_data
-                    frame = Frame(hand_type, frame_number, root_pos)  # declare and initialise an instance of Frame
-                    gesture.set_frames_data(frame)  # add the frame into a Gesture instance
-
-                # skip the line if it starts with 'Hand_Start' or 'Hand_ForearmStub',
-                # and the line is NOT about 'RootPos'
-                elif finger_type.find('Hand_Start') != 0 and finger_type.find('Hand_ForearmStub') != 0:
-                    set_finger_data(finger_type.split('_')[1], finger_data, frame)
+    if compact:
+        if len(root_pos) != 0:
+            gesture.set_hand_frames(HandFrames(hand_type, root_pos, joints))
+        return gesture
+
+    # 'tolist' converts the arrays into Python floats in a single call rather than per coordinate
+    for (frame_index, (frame_root_pos, frame_joints)) in enumerate(zip(root_pos.tolist(), joints.tolist())):
+        gesture.set_frames_data(create_frame(hand_type, frame_index + 1, frame_root_pos, frame_joints))
     return gesture
 
 
-def read_data_files():
+@instrumented('read_gesture')
+def read_gesture(file_name: str, compact: bool = True, dtype=np.float64, cache: GestureCache = None) -> Gesture:
+    """ Read a text file for a gesture
+    Parameters:
+        file_name(str): file name string,
+        compact(bool): True to keep the frames in contiguous arrays (HandFrames), False for a list of Frame objects,
+        dtype(numpy dtype): float type of the arrays in compact storage e.g np.float32 to halve the memory,
+        cache(GestureCache): cache to load the parsed arrays from, the file is always parsed if it is None
+
+    Returns:
+        Gesture : an instance of Gesture object
+
+    this function is to read a given file in bulk into arrays of coordinates, then creates a gesture instance
+    from the arrays (see 'create_gesture')
+    """
+    gesture_name, hand_type = parse_file_name(file_name)
+    root_pos, joints = read_gesture_arrays(file_name, dtype if compact else np.float64, cache)
+    return create_gesture(gesture_name, hand_type, root_pos, joints, compact)
+
+
+def _load_gesture_file(file_name: str, dtype, cache: GestureCache) -> tuple:
+    """ Loading a data file into arrays for 'read_data_files', it runs in a worker process in parallel loading.
+    Only arrays and an error message are returned so that the result is cheap to send back between processes
+
+    Returns:
+        tuple : (root_pos, joints, None) or (None, None, error message) when the file could not be loaded
+    """
+    try:
+        root_pos, joints = read_gesture_arrays(file_name, dtype, cache)
+        # memory-mapped arrays from the cache are turned into plain arrays before they are sent
+        return np.asarray(root_pos), np.asarray(joints), None
+    except IOError as ioe:
+        return None, None, f'{ioe}: File not found or unreadable'
+    except Exception as ie:
+        return None, None, f'{ie}: Data file is ill-formatted'
+
+
+@instrumented('read_data_files')
+def read_data_files(compact: bool = True, dtype=np.float64, use_cache: bool = None, workers: int = 1,
+                    data_dir: str = None):
     """
     This function should read all the hand gesture data files and map the data to your chosen model.
+    'compact' and 'dtype' are passed to 'read_gesture' for each file.
+    Parsed files are cached in binary form (see GestureCache) unless 'use_cache' is False,
+    if 'use_cache' is None the cache is used unless it is disabled by the 'GESTURE_CACHE' environment variable.
+    'workers' is the number of processes parsing files in parallel, 1 parses files one by one in this process
+    and 0 or less uses every CPU. Files are always merged into Gestures in the order of their names,
+    hence the result does not depend on which worker finishes first.
+    'data_dir' is a directory of data files to read instead of the 'data' directory next to this source code.
     """
 
     # Instead of listing all data file names, find out all data file names programmatically
-    # find out current directory where this python source code sit
-    dir_path = os.path.dirname(__file__)
+    # pointing data set directory, paths are absolute so the current directory of the process is left as it is
+    data_dir = _get_data_dir(data_dir)
 
-    # pointing data set directory
-    os.chdir(dir_path + '/data')
+    if use_cache is None:
+        use_cache = GestureCache.is_enabled()
+    cache = GestureCache(os.path.abspath(GestureCache.get_default_cache_dir(data_dir))) if use_cache else None
+    load_dtype = dtype if compact else np.float64
 
     gesture_list = Gestures()
     # selecting all files with '.txt' extension in the pointed data set directory, and iterate the list of files
-    for file in glob.glob("*.txt"):
+    files = sorted(glob.glob(os.path.join(glob.escape(data_dir), '*.txt')))
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if workers == 1 or len(files) <= 1:
+        results = map(_load_gesture_file, files, repeat(load_dtype), repeat(cache))
+        _merge_gesture_files(gesture_list, files, results, compact)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+            # 'map' yields results in the order of files no matter which worker finishes first
+            results = executor.map(_load_gesture_file, files, repeat(load_dtype), repeat(cache),
+                                    chunksize=max(1, len(files) // (workers * 4)))
+            _merge_gesture_files(gesture_list, files, results, compact)
+
+    return gesture_list
+
+
+def read_data_catalog(max_loaded_gestures: int = 16, count_frames: bool = True, compact: bool = True,
+                      dtype=np.float64, use_cache: bool = None, data_dir: str = None) -> LazyGestures:
+    """ Indexing all the hand gesture data files without reading them
+    Parameters:
+        max_loaded_gestures(int) : the maximum number of gestures kept in memory at the same time,
+        count_frames(bool) : True to count frames of each data file while indexing,
+        compact(bool), dtype(numpy dtype), use_cache(bool), data_dir(str) : the same as 'read_data_files'
+
+    Returns:
+        LazyGestures : a Gestures object which reads a gesture only when it is accessed for the first time
+    """
+    # pointing data set directory in the same way as 'read_data_files'
+    data_dir = _get_data_dir(data_dir)
+
+    if use_cache is None:
+        use_cache = GestureCache.is_enabled()
+    cache = GestureCache(os.path.abspath(GestureCache.get_default_cache_dir(data_dir))) if use_cache else None
+
+    files = sorted(glob.glob(os.path.join(glob.escape(data_dir), '*.txt')))
+    return LazyGestures(files, partial(read_gesture, compact=compact, dtype=dtype, cache=cache),
+                        max_loaded_gestures, count_frames)
+
+
+def _get_data_dir(data_dir: str = None) -> str:
+    """ Getting the absolute path of a data directory, the 'data' directory next to this source code if it is None """
+    if data_dir is None:
+        data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    return os.path.abspath(data_dir)
+
+
+def _merge_gesture_files(gesture_list: Gestures, files: list, results, compact: bool):
+    """ Merging loaded arrays of each file into 'gesture_list' in the order of files, and reporting files
+    which could not be loaded to stderr """
+    for (file, (root_pos, joints, error_message)) in zip(files, results):
+        if error_message is not None:
+            print(error_message, file=sys.stderr)
+            Instrumentation.count('files_failed')
+            continue
         try:
-            gesture_list.add_gesture(read_gesture(file))
-        except IOError as ioe:
-            print(f'{ioe}: File not found or unreadable', file=sys.stderr)
-            # sys.exit(1)
+            gesture_name, hand_type = parse_file_name(file)
+            gesture = create_gesture(gesture_name, hand_type, root_pos, joints, compact)
+            with Instrumentation.stage('Gestures.add_gesture'):
+                gesture_list.add_gesture(gesture)
         except Exception as ie:
             print(f'{ie}: Data file is ill-formatted', file=sys.stderr)
 
-    return gesture_list
-
 
 if __name__ == "__main__":
     all_gestures_data = read_data_files()
@@ -199,7 +382,5 @@ if __name__ == "__main__":
     both_thumb_index_finger_frame_list = extract_finger_frame('Gesture 3', Gesture.both_hand(),
                                                               [Frame.get_thumb_finger(), Frame.get_index_finger()],
                                                               all_gestures_data)
-    Visualization.animate_hand_gesture('Gesture 1', all_gestures_data)
-    Visualization.animate_hand_gesture('Gesture 2', all_gestures_data)
-    Visualization.animate_hand_gesture('Gesture 5', all_gestures_data)
-    Visualization.animate_hand_gesture('Gesture 3', all_gestures_data)
+    # the gestures are animated together in one window instead of one blocking window after another
+    Visualization.animate_dashboard(['Gesture 1', 'Gesture 2', 'Gesture 5', 'Gesture 3'], all_gestures_data)
@@ -1,8 +1,21 @@
+from types import MappingProxyType
+
+import numpy as np
+
+
 class Frame:
     """ This is a basic class for modelling a single hand and single frame data in the given data file.
     A single frame is represented by 25 rows in the given data file. Each frame has data relevant to all five fingers
 
-    At the time of its instantiation, it takes hand_type, frame_number and root_pos for its constructor"""
+    At the time of its instantiation, it takes hand_type, frame_number and root_pos for its constructor.
+    When it also takes a row of a joint array, the frame does not hold any finger dictionary but works as
+    a lightweight view of the row, and each finger getter builds a read-only dictionary from the row on demand.
+    Finger data of such a frame is changed by the finger setters, and 'on_change' is called after each of them
+    so that the owner of the row knows its data changed"""
+
+    # '__slots__' removes a per instance '__dict__' so that a frame costs only a handful of references
+    __slots__ = ('hand_type', 'frame_number', '__wrist_position', '__joints', '__on_change',
+                 '__thumb', '__index_finger', '__middle_finger', '__ring_finger', '__pinky')
 
     # these variable are set as a private constant to encapsulate the access
     # to the variable keeping the control of the object status.
@@ -14,6 +27,24 @@ class Frame:
     __RING_FINGER = 'RING'
     __PINKY_FINGER = 'PINKY'
 
+    # these variables represent every joint name recorded for a single frame in the given data file
+    # (without the 'Hand_' prefix). 'Start' and 'ForearmStub' are recorded but not assigned to any finger.
+    # joints are grouped by finger rather than following the data file, so that joints of a finger,
+    # and of neighbouring fingers, are next to each other in a joint array and can be selected by slicing
+    __JOINT_NAMES = ('Start', 'ForearmStub',
+                     'Thumb0', 'Thumb1', 'Thumb2', 'Thumb3', 'ThumbTip',
+                     'Index1', 'Index2', 'Index3', 'IndexTip',
+                     'Middle1', 'Middle2', 'Middle3', 'MiddleTip',
+                     'Ring1', 'Ring2', 'Ring3', 'RingTip',
+                     'Pinky0', 'Pinky1', 'Pinky2', 'Pinky3', 'PinkyTip')
+
+    # this variable represents columns of each finger's joints in a joint array which follows '__JOINT_NAMES'
+    __FINGER_JOINT_COLUMNS = {__THUMB_FINGER: (2, 3, 4, 5, 6),
+                              __INDEX_FINGER: (7, 8, 9, 10),
+                              __MIDDLE_FINGER: (11, 12, 13, 14),
+                              __RING_FINGER: (15, 16, 17, 18),
+                              __PINKY_FINGER: (19, 20, 21, 22, 23)}
+
     @classmethod
     def get_thumb_finger(cls):
         return cls.__THUMB_FINGER
@@ -34,53 +65,177 @@ class Frame:
     def get_pinky_finger(cls):
         return cls.__PINKY_FINGER
 
+    @classmethod
+    def get_joint_names(cls) -> tuple:
+        return cls.__JOINT_NAMES
+
+    @classmethod
+    def get_finger_joint_names(cls, finger_name: str) -> tuple:
+        """ Getting joint names belonging to a finger
+        Parameters:
+            finger_name(str) : finger name e.g Frame.get_thumb_finger()
+
+        Returns:
+            tuple : joint names of the finger e.g ('Thumb0', 'Thumb1', 'Thumb2', 'Thumb3', 'ThumbTip')
+
+        a joint belongs to a finger when the joint name contains the finger name, which is the same rule
+        that 'main.set_finger_data' uses to assign a joint to a finger dictionary
+        """
+        return tuple(name for name in cls.__JOINT_NAMES if name.upper().find(finger_name) != -1)
+
+    @classmethod
+    def get_finger_joint_columns(cls, finger_name: str) -> tuple:
+        """ Getting columns of a finger's joints in a joint array whose joint axis follows 'get_joint_names()'
+        Parameters:
+            finger_name(str) : finger name e.g Frame.get_thumb_finger()
+
+        Returns:
+            tuple : column indexes in the same order as 'get_finger_joint_names'
+        """
+        return cls.__FINGER_JOINT_COLUMNS[finger_name]
+
     # for each private variables (leading with two underscores) has its own setters and getters
-    def __init__(self, hand_type, frame_number, root_pos):
+    def __init__(self, hand_type, frame_number, root_pos, joints=None, on_change=None):
         self.hand_type = hand_type
         self.frame_number = frame_number
-        self.wrist_position = root_pos  # This is ths RootPos value in each frame
-        self.__thumb = dict()  # For example {Thumb0:(x,y,z), Thumb1:(x1,y1,z1), Thumb2:(x2,y2,z2), Thumb3:(x3,y3,z3)}
-        self.__index_finger = dict()
-        self.__middle_finger = dict()
-        self.__ring_finger = dict()
-        self.__pinky = dict()
+        self.__wrist_position = root_pos  # This is ths RootPos value in each frame
+        # a row of a joint array of shape (joints, 3) when the frame is a view of the row, None otherwise
+        self.__joints = joints
+        # a function called without arguments after a setter changed the frame, or None
+        self.__on_change = on_change
+        if joints is None:
+            self.__thumb = dict()  # For example {Thumb0:(x,y,z), Thumb1:(x1,y1,z1), Thumb2:(x2,y2,z2), Thumb3:(x3,y3,z3)}
+            self.__index_finger = dict()
+            self.__middle_finger = dict()
+            self.__ring_finger = dict()
+            self.__pinky = dict()
+        else:
+            self.__thumb = self.__index_finger = self.__middle_finger = self.__ring_finger = self.__pinky = None
+
+    # getter for wrist_position, it is always a tuple of coordinate no matter how the frame stores it
+    @property
+    def wrist_position(self):
+        if isinstance(self.__wrist_position, np.ndarray):
+            return tuple(self.__wrist_position.tolist())
+        return self.__wrist_position
+
+    # setter for wrist_position
+    @wrist_position.setter
+    def wrist_position(self, root_pos):
+        if isinstance(self.__wrist_position, np.ndarray):
+            self.__wrist_position[:] = root_pos
+        else:
+            self.__wrist_position = root_pos
+        self.__changed()
+
+    def __changed(self):
+        if self.__on_change is not None:
+            self.__on_change()
+
+    def is_array_view(self) -> bool:
+        return self.__joints is not None
+
+    def get_joint_array(self) -> np.ndarray:
+        """ Getting coordinates of all joints in the frame as an array
+        Parameters:
+
+        Returns:
+            np.ndarray : an array of shape (joints, 3) following 'get_joint_names()', joints without data are NaN
+
+        if the frame is a view of a joint array row, the row itself is returned without copying it
+        """
+        if self.__joints is not None:
+            return self.__joints
+        joints = np.full((len(self.get_joint_names()), 3), np.nan)
+        for finger_data in (self.__thumb, self.__index_finger, self.__middle_finger, self.__ring_finger, self.__pinky):
+            for (joint_name, coordinate) in finger_data.items():
+                if joint_name in self.get_joint_names():
+                    joints[self.get_joint_names().index(joint_name)] = coordinate
+        return joints
+
+    def __get_finger_view_data(self, finger_name: str) -> MappingProxyType:
+        """ Building a read-only finger dictionary from the joint array row, joints without data (NaN) are left out.
+        Changing it would not change the row, so it raises TypeError instead of being ignored """
+        columns = self.get_finger_joint_columns(finger_name)
+        return MappingProxyType({joint_name: tuple(coordinate)
+                                 for (joint_name, coordinate) in zip(self.get_finger_joint_names(finger_name),
+                                                                     self.__joints[list(columns)].tolist())
+                                 if coordinate[0] == coordinate[0]})  # NaN is the only value not equal to itself
+
+    def __set_finger_view_data(self, finger_name: str, finger_data: dict):
+        """ Writing a finger dictionary into the joint array row, joints left out of the dictionary become NaN """
+        for (joint_name, column) in zip(self.get_finger_joint_names(finger_name),
+                                        self.get_finger_joint_columns(finger_name)):
+            self.__joints[column] = finger_data.get(joint_name, np.nan)
 
     # setter for thumb_finger_data
     def set_thumb_data(self, thumb_data):
-        self.__thumb = thumb_data
+        if self.__joints is not None:
+            self.__set_finger_view_data(self.get_thumb_finger(), thumb_data)
+        else:
+            self.__thumb = thumb_data
+        self.__changed()
 
     # getter for thumb_finger_data
+    # if the frame is a view of a joint array row, the returned dictionary is a read-only copy,
+    # hence changing the dictionary raises TypeError. use the setter instead
     def get_thumb_data(self) -> dict:
+        if self.__joints is not None:
+            return self.__get_finger_view_data(self.get_thumb_finger())
         return self.__thumb
 
     # setter for index_finger_data
     def set_index_finger_data(self, index_finger):
-        self.__thumb = index_finger
+        if self.__joints is not None:
+            self.__set_finger_view_data(self.get_index_finger(), index_finger)
+        else:
+            self.__index_finger = index_finger
+        self.__changed()
 
     # getter for index_finger_data
     def get_index_finger_data(self) -> dict:
+        if self.__joints is not None:
+            return self.__get_finger_view_data(self.get_index_finger())
         return self.__index_finger
 
     # setter for middle_finger_data
     def set_middle_finger_data(self, middle_finger_data):
-        self.__middle_finger = middle_finger_data
+        if self.__joints is not None:
+            self.__set_finger_view_data(self.get_middle_finger(), middle_finger_data)
+        else:
+            self.__middle_finger = middle_finger_data
+        self.__changed()
 
     # getter for middle_finger_data
     def get_middle_finger_data(self) -> dict:
+        if self.__joints is not None:
+            return self.__get_finger_view_data(self.get_middle_finger())
         return self.__middle_finger
 
     # setter for ring_finger
     def set_ring_finger(self, ring_finger_data):
-        self.__ring_finger = ring_finger_data
+        if self.__joints is not None:
+            self.__set_finger_view_data(self.get_ring_finger(), ring_finger_data)
+        else:
+            self.__ring_finger = ring_finger_data
+        self.__changed()
 
     # getter for ring_finger
     def get_ring_finger_data(self) -> dict:
+        if self.__joints is not None:
+            return self.__get_finger_view_data(self.get_ring_finger())
         return self.__ring_finger
 
     # setter for pinky finger
     def set_pinky(self, pinky_data):
-        self.__pinky = pinky_data
+        if self.__joints is not None:
+            self.__set_finger_view_data(self.get_pinky_finger(), pinky_data)
+        else:
+            self.__pinky = pinky_data
+        self.__changed()
 
     # getter for pinky finger
     def get_pinky_data(self) -> dict:
+        if self.__joints is not None:
+            return self.__get_finger_view_data(self.get_pinky_finger())
         return self.__pinky
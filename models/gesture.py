@@ -1,3 +1,7 @@
+import numpy as np
+
+from models.hand_frames import HandFrames
+
 
 class Gesture:
     """ This is a basic class for modelling a single gesture. A gesture may consist of both left and right hands data or
@@ -6,6 +10,9 @@ class Gesture:
     The length of this collection could be different for each gesture.
 
     at the time of instantiation, it only takes a gesture name for its constructor
+
+    frames of each hand side are stored either in a list of Frame objects, or in a HandFrames object which keeps
+    all frames of the hand side in contiguous arrays (compact storage). Both behave as a list of frames
     """
 
     # set class(static) private constant variables to implement encapsulation concept.
@@ -36,6 +43,9 @@ class Gesture:
         # gesture_name 'Gesture 7'.
         self.gesture_name = gesture_name
         self.__frame_number = 0
+        # '__version' changes whenever frames are added or converted, so that results computed from the frames
+        # can be told apart from results of the current frames (see 'get_version' and 'QueryCache')
+        self.__version = 0
 
         # A gesture could involve either only one hand or both hands at the same time
         # Hence, dictionary would be a better option than just list due to the fact that
@@ -61,6 +71,7 @@ class Gesture:
             initial_dict = {self.right_hand(): [], self.left_hand(): []} # initialise dictionary for each hands
             self.__frames.update(initial_dict)
 
+        self.__version += 1
         if frame.hand_type == self.right_hand():
             self.__frames[self.right_hand()].append(frame)
         elif frame.hand_type == self.left_hand():
@@ -85,7 +96,7 @@ class Gesture:
 
     # setter for right-hand side frames only
     def set_right_hand_frame_data(self, right_hand_frame_data: list):
-        self.__frames[self.right_hand()] += right_hand_frame_data
+        self.__add_hand_frame_data(self.right_hand(), right_hand_frame_data)
 
     # getter for left-hand side frames in dict type
     def get_left_hand_frame_data_in_dict(self) -> dict:
@@ -97,7 +108,66 @@ class Gesture:
 
     # setter for left-hand side frames only
     def set_left_hand_frame_data(self, left_hand_frame_data: list):
-        self.__frames[self.left_hand()] += left_hand_frame_data
+        self.__add_hand_frame_data(self.left_hand(), left_hand_frame_data)
+
+    def __add_hand_frame_data(self, hand_side: str, frame_data):
+        """ Adding frames, given as a list of Frame objects or HandFrames, at the end of a hand side's frames
+
+        frames kept in HandFrames stay in contiguous arrays. If the hand side does not have any frame yet,
+        it takes over the compact storage of the given HandFrames
+        """
+        self.__version += 1
+        hand_frames = self.__frames[hand_side]
+        if isinstance(frame_data, HandFrames) and not isinstance(hand_frames, HandFrames) and len(hand_frames) == 0:
+            self.__frames[hand_side] = frame_data.copy()
+        else:
+            hand_frames += frame_data
+
+    def set_hand_frames(self, hand_frames: HandFrames):
+        """ Adding frames of a hand side stored in contiguous arrays
+        Parameters:
+            hand_frames(HandFrames) : all frames of a hand side
+
+        Returns:
+            void
+
+        it works the same as 'set_frames_data' for every frame in the given HandFrames,
+        but the frames stay in contiguous arrays instead of being turned into Frame objects
+        """
+        if len(self.__frames) == 0:  # '__frames' dictionary has no items in it yet
+            initial_dict = {self.right_hand(): [], self.left_hand(): []}  # initialise dictionary for each hands
+            self.__frames.update(initial_dict)
+        self.__add_hand_frame_data(hand_frames.hand_type, hand_frames)
+
+    def get_hand_frames(self, hand_side: str) -> HandFrames:
+        """ Getting frames of a hand side in contiguous arrays
+        Parameters:
+            hand_side(str) : hand side e.g 'R' or 'L'
+
+        Returns:
+            HandFrames : frames of the hand side. If they are stored in compact storage, the storage itself is
+                         returned, otherwise a HandFrames holding a copy of the frames is returned
+        """
+        hand_frames = self.get_frames_data_in_dict().get(hand_side, [])
+        if isinstance(hand_frames, HandFrames):
+            return hand_frames
+        return HandFrames.from_frames(hand_side, hand_frames)
+
+    def compact(self, dtype=np.float64):
+        """ Converting frames of each hand side into compact storage
+        Parameters:
+            dtype(numpy dtype) : float type of the arrays e.g np.float32 to halve the memory
+
+        Returns:
+            void
+        """
+        for (hand_side, hand_frames) in self.__frames.items():
+            if not isinstance(hand_frames, HandFrames) or hand_frames.get_joints().dtype != dtype:
+                # changes of the replaced storage are kept in '__version', so the version never goes back
+                if isinstance(hand_frames, HandFrames):
+                    self.__version += hand_frames.get_version()
+                self.__frames[hand_side] = HandFrames.from_frames(hand_side, hand_frames, dtype)
+                self.__version += 1
 
     def add_more_hands(self, gesture):
         """ Adding more frames data for another hand side
@@ -111,10 +181,25 @@ class Gesture:
         if this gesture has already hand gesture on right or left hand side, hence it requires more caution
         when call this method
         """
-        if len(list(gesture.get_right_hand_frame_data())) != 0:
-            self.set_right_hand_frame_data(gesture.get_right_hand_frame_data())
-        if len(list(gesture.get_left_hand_frame_data())) != 0:
-            self.set_left_hand_frame_data(gesture.get_left_hand_frame_data())
+        # the frames are taken from the dictionary directly rather than from the getters of each hand side,
+        # so that frames in compact storage are merged as arrays instead of a list of Frame objects
+        frames = gesture.get_frames_data_in_dict()
+        if len(frames.get(self.right_hand(), [])) != 0:
+            self.set_right_hand_frame_data(frames[self.right_hand()])
+        if len(frames.get(self.left_hand(), [])) != 0:
+            self.set_left_hand_frame_data(frames[self.left_hand()])
+
+    def get_version(self) -> int:
+        """ Getting the version of the frames, it changes whenever frames are added or converted, and whenever
+        frames in compact storage are changed by the setters of their Frame views (see 'HandFrames.get_version').
+        Frame objects in a list do not know their gesture, so changing them does not change the version """
+        return self.__version + sum(hand_frames.get_version() for hand_frames in self.__frames.values()
+                                    if isinstance(hand_frames, HandFrames))
+
+    def is_compact(self) -> bool:
+        """ Checking if frames of every hand side with any frame are in compact storage """
+        return all(isinstance(hand_frames, HandFrames) or len(hand_frames) == 0
+                   for hand_frames in self.__frames.values())
 
     # getter for '__frame_number'
     def get_frame_number(self):
@@ -7,6 +7,8 @@ class Gestures:
     # Gesture constructor
     def __init__(self):
         self.__list_of_gestures = dict()
+        # '__version' changes whenever a gesture is added, replaced or removed
+        self.__version = 0
 
     def get_gesture(self, list_of_gesture_name: list) -> list:
         """ Getting a list of gestures for a given list of gesture names
@@ -19,12 +21,18 @@ class Gestures:
 
         get all gesture object for gesture names in the given list
         """
-        return [value for (k, value) in self.__list_of_gestures.items() if k in list_of_gesture_name]
+        # a set checks each name in O(1) instead of scanning the given list for every gesture
+        gesture_name_set = set(list_of_gesture_name)
+        return [value for (k, value) in self.__list_of_gestures.items() if k in gesture_name_set]
 
     # getter for '__list_of_gestures'
     def get_list_of_gesture(self):
         return self.__list_of_gestures
 
+    # getter for '__version'
+    def get_version(self) -> int:
+        return self.__version
+
     def add_gesture(self, gesture: Gesture):
         """ Adding a gesture object to a list of gestures
         Parameters:
@@ -36,7 +44,25 @@ class Gestures:
         adding an object to '__list_of_gesture' dictionary. Even it is named as 'list' but it is actually a dictionary type.
         dictionary type has a O(1) to retrieve an element
         """
+        self.__version += 1
         if gesture.gesture_name not in self.__list_of_gestures.keys():
             self.__list_of_gestures.update({gesture.gesture_name: gesture})
         else:
             self.__list_of_gestures[gesture.gesture_name].add_more_hands(gesture)
+
+    def replace_gesture(self, gesture: Gesture):
+        """ Putting a gesture object in place of the gesture with the same name instead of merging them
+        Parameters:
+            gesture(Gesture) : input Gesture object
+
+        Returns:
+            void
+        """
+        self.__version += 1
+        self.__list_of_gestures.update({gesture.gesture_name: gesture})
+
+    def remove_gesture(self, gesture_name: str):
+        """ Removing a gesture object by its name, nothing happens if there is no gesture with the name """
+        if gesture_name in self.__list_of_gestures:
+            self.__version += 1
+            self.__list_of_gestures.pop(gesture_name)
@@ -0,0 +1,177 @@
+import numpy as np
+
+from models.frame import Frame
+
+
+class HandFrames:
+    """ This is a class for storing all frames of a single hand side of a gesture in contiguous arrays.
+    Instead of holding a Frame object per frame, it holds one array of 'RootPos' of shape (frames, 3),
+    one array of joints of shape (frames, joints, 3) following 'Frame.get_joint_names()'
+    and one array of frame numbers.
+
+    It behaves like a list of frames, therefore it can be used wherever a list of Frame objects is used.
+    A Frame object is only created as a view of an array row when a frame is accessed by index or iteration.
+    Frames added at the end are written into spare rows of the arrays, whose capacity doubles whenever it runs out,
+    so adding frames one by one takes amortised constant time per frame.
+    Its version changes whenever frames are added or changed through the setters of its frames (see 'get_version').
+
+    at the time of instantiation, it takes hand_type, root_pos and joints for its constructor
+    """
+
+    def __init__(self, hand_type: str, root_pos: np.ndarray, joints: np.ndarray, frame_numbers: np.ndarray = None):
+        if len(root_pos) != len(joints):
+            raise ValueError('root_pos and joints should have the same number of frames')
+        self.hand_type = hand_type
+        # the arrays may have more rows than frames, only the first '__length' rows are frames
+        self.__root_pos = np.ascontiguousarray(root_pos)
+        self.__joints = np.ascontiguousarray(joints)
+        # frame numbers start from one in each data file
+        if frame_numbers is None:
+            frame_numbers = np.arange(1, len(root_pos) + 1, dtype=np.int32)
+        self.__frame_numbers = np.asarray(frame_numbers, dtype=np.int32)
+        self.__length = len(self.__frame_numbers)
+        # '__version' counts changes of the frames, see 'get_version'
+        self.__version = 0
+
+    @classmethod
+    def from_frames(cls, hand_type: str, frames: list, dtype=np.float64):
+        """ Creating HandFrames from a list of Frame objects
+        Parameters:
+            hand_type(str) : hand side e.g 'R' or 'L',
+            frames(list) : list of Frame objects,
+            dtype(numpy dtype) : float type of the arrays
+
+        Returns:
+            HandFrames : an instance of HandFrames holding a copy of all frames data
+        """
+        if isinstance(frames, HandFrames):
+            return cls(hand_type, frames.get_root_pos().astype(dtype), frames.get_joints().astype(dtype),
+                       frames.get_frame_numbers())
+        joint_number = len(Frame.get_joint_names())
+        root_pos = np.empty((len(frames), 3), dtype=dtype)
+        joints = np.empty((len(frames), joint_number, 3), dtype=dtype)
+        frame_numbers = np.empty(len(frames), dtype=np.int32)
+        for (index, frame) in enumerate(frames):
+            root_pos[index] = frame.wrist_position
+            joints[index] = frame.get_joint_array()
+            frame_numbers[index] = frame.frame_number
+        return cls(hand_type, root_pos, joints, frame_numbers)
+
+    # getter for the 'RootPos' array of shape (frames, 3)
+    def get_root_pos(self) -> np.ndarray:
+        return self.__root_pos[:self.__length]
+
+    # getter for the joint array of shape (frames, joints, 3)
+    def get_joints(self) -> np.ndarray:
+        return self.__joints[:self.__length]
+
+    # getter for the frame number array of shape (frames,)
+    def get_frame_numbers(self) -> np.ndarray:
+        return self.__frame_numbers[:self.__length]
+
+    # getter for '__version', it changes when frames are added or changed by the setters of frames
+    # from 'get_frame'. Writing into the arrays of the getters directly is not noticed
+    def get_version(self) -> int:
+        return self.__version
+
+    def __changed(self):
+        self.__version += 1
+
+    def select_fingers(self, finger_name_list: list) -> tuple:
+        """ Selecting joints of fingers from the joint array
+        Parameters:
+            finger_name_list(list) : list of finger names e.g [Frame.get_ring_finger(), Frame.get_middle_finger()]
+
+        Returns:
+            tuple : (joints, joint_names) where 'joints' is an array of shape (frames, selected joints, 3) and
+                    'joint_names' is a tuple of joint names along the second axis of 'joints'
+
+        joints are always in the order of 'Frame.get_joint_names()' no matter the order of the given fingers.
+        Because joints of a finger are next to each other in that order, the returned array is a view
+        sharing its data with the joint array (no copy) when the given fingers are neighbours e.g ring and middle.
+        Otherwise, e.g thumb and ring, the joints are copied into a new array
+        """
+        columns = sorted({column for finger in finger_name_list for column in Frame.get_finger_joint_columns(finger)})
+        joint_names = tuple(Frame.get_joint_names()[column] for column in columns)
+        if len(columns) != 0 and columns[-1] - columns[0] + 1 == len(columns):  # a contiguous range of columns
+            return self.get_joints()[:, columns[0]:columns[-1] + 1], joint_names
+        return self.get_joints()[:, columns], joint_names
+
+    def get_frame(self, index: int) -> Frame:
+        """ Getting a frame as a view of an array row
+        Parameters:
+            index(int) : index of the frame, a negative index counts from the last frame
+
+        Returns:
+            Frame : a Frame object sharing its data with the arrays, so setters of the frame change the arrays
+                    and the version
+        """
+        if index < 0:
+            index += self.__length
+        if not 0 <= index < self.__length:
+            raise IndexError('frame index out of range')
+        return Frame(self.hand_type, int(self.__frame_numbers[index]), self.__root_pos[index], self.__joints[index],
+                     self.__changed)
+
+    def copy(self):
+        """ Creating another HandFrames sharing the same frames
+
+        frames are only ever written into rows past the frames of a HandFrames, and the copy has no spare rows,
+        hence appending frames to one of them does not affect the other
+        """
+        return HandFrames(self.hand_type, self.get_root_pos(), self.get_joints(), self.get_frame_numbers())
+
+    def __reserve(self, frame_count: int):
+        """ Making room for at least 'frame_count' frames, the capacity is at least doubled when it grows """
+        capacity = len(self.__frame_numbers)
+        if frame_count <= capacity:
+            return
+        capacity = max(frame_count, 2 * capacity, 16)
+        arrays = []
+        for array in (self.__root_pos, self.__joints, self.__frame_numbers):
+            grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.__length] = array[:self.__length]
+            arrays.append(grown)
+        self.__root_pos, self.__joints, self.__frame_numbers = arrays
+
+    def extend(self, frames):
+        """ Adding more frames at the end
+        Parameters:
+            frames(HandFrames or list) : HandFrames or a list of Frame objects
+
+        Returns:
+            void
+
+        frames are written into spare rows of the arrays, which are reallocated with twice their capacity
+        when there is not enough of them. Arrays returned by the getters before keep their frames
+        """
+        if not isinstance(frames, HandFrames):
+            frames = HandFrames.from_frames(self.hand_type, list(frames), self.__joints.dtype)
+        if len(frames) == 0:
+            return
+        length = self.__length + len(frames)
+        self.__reserve(length)
+        self.__root_pos[self.__length:length] = frames.get_root_pos()
+        self.__joints[self.__length:length] = frames.get_joints()
+        self.__frame_numbers[self.__length:length] = frames.get_frame_numbers()
+        self.__length = length
+        self.__changed()
+
+    def append(self, frame: Frame):
+        self.extend([frame])
+
+    def __iadd__(self, frames):
+        self.extend(frames)
+        return self
+
+    def __len__(self):
+        return self.__length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.get_frame(i) for i in range(*index.indices(len(self)))]
+        return self.get_frame(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.get_frame(index)
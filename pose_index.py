@@ -0,0 +1,321 @@
+import heapq
+
+import numpy as np
+
+from models.frame import Frame
+from models.gesture import Gesture
+from models.gestures import Gestures
+
+
+class PoseIndex:
+    """ This is a class for finding frames of any gesture which look like a given hand pose.
+
+    Each frame becomes a pose vector of the coordinates of the chosen fingers' joints. Joint coordinates are relative
+    to the wrist already, and with normalisation they are divided by the palm length of the frame (the distance from
+    the wrist to 'Middle1'), so that hands of different sizes are compared by their shape.
+    Pose vectors are kept in a KD-tree whose nodes split the vectors in two at the median of their widest dimension,
+    and every node keeps the bounding box of its vectors. A query visits nodes from the nearest bounding box and skips
+    every node whose bounding box is farther than the current k-th nearest vector (or the radius), and the vectors of
+    a leaf are compared at once.
+
+    Adding gestures is incremental: new vectors are compared by a full scan until there are enough of them,
+    then the tree is rebuilt with them. The index is saved to and loaded from a single '.npz' file.
+
+    at the time of instantiation, it takes a list of fingers, a hand side, whether to normalise poses and
+    the number of vectors in a leaf for its constructor
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # '__REBUILD_FRACTION' is how many new vectors, compared to the vectors in the tree, trigger a rebuild
+    __PALM_COLUMN = Frame.get_joint_names().index('Middle1')
+    __REBUILD_FRACTION = 0.25
+
+    def __init__(self, finger_name_list: list = None, hand_side: str = Gesture.both_hand(), normalize: bool = True,
+                 leaf_size: int = 32):
+        if finger_name_list is None:
+            finger_name_list = [Frame.get_thumb_finger(), Frame.get_index_finger(), Frame.get_middle_finger(),
+                                Frame.get_ring_finger(), Frame.get_pinky_finger()]
+        if leaf_size < 1:
+            raise ValueError('leaf_size should be at least one')
+        self.finger_name_list = list(finger_name_list)
+        self.hand_side = hand_side
+        self.normalize = normalize
+        self.leaf_size = leaf_size
+        self.__columns = sorted({column for finger in self.finger_name_list
+                                 for column in Frame.get_finger_joint_columns(finger)})
+
+        # '__labels' is a list of (gesture name, hand side), a vector refers to its label by an index
+        self.__labels = []
+        self.__label_index = dict()
+        # the number of frames of each label in the index, frames added to a hand side later are indexed from there
+        self.__label_frame_counts = []
+        # vectors in the tree, in the order of the tree, with the label index and the frame number of each vector
+        self.__points = np.empty((0, 3 * len(self.__columns)))
+        self.__point_labels = np.empty(0, dtype=np.int32)
+        self.__point_frame_numbers = np.empty(0, dtype=np.int32)
+        # nodes of the tree, a node covers points[start:end], and a leaf has no children (-1)
+        self.__node_start = np.empty(0, dtype=np.intp)
+        self.__node_end = np.empty(0, dtype=np.intp)
+        self.__node_children = np.empty((0, 2), dtype=np.intp)
+        self.__node_lower = np.empty((0, self.__points.shape[1]))
+        self.__node_upper = np.empty((0, self.__points.shape[1]))
+        # vectors added after the tree was built, (vectors, label indexes, frame numbers) of each hand side added
+        self.__pending = []
+        self.__pending_count = 0
+
+    def __len__(self):
+        return len(self.__points) + self.__pending_count
+
+    def get_labels(self) -> list:
+        return list(self.__labels)
+
+    def get_pose_vectors(self, joints: np.ndarray) -> np.ndarray:
+        """ Converting joints into pose vectors
+        Parameters:
+            joints(np.ndarray) : an array of shape (frames, joints, 3) or (joints, 3) following
+                                 'Frame.get_joint_names()'
+
+        Returns:
+            np.ndarray : an array of shape (frames, dimensions) or (dimensions,). Missing joints (NaN) become zero
+        """
+        joints = np.asarray(joints, dtype=np.float64)
+        single = joints.ndim == 2
+        joints = joints.reshape((-1,) + joints.shape[-2:])
+        vectors = joints[:, self.__columns].reshape(len(joints), -1)
+        if self.normalize:
+            palm_length = np.linalg.norm(joints[:, self.__PALM_COLUMN], axis=-1)
+            palm_length = np.where(np.isfinite(palm_length) & (palm_length > 0), palm_length, 1.0)
+            vectors = vectors / palm_length[:, np.newaxis]
+        vectors = np.nan_to_num(vectors)
+        return vectors[0] if single else vectors
+
+    def add_gesture(self, gesture: Gesture):
+        """ Adding frames of each hand side of a gesture. For a hand side already in the index, only frames beyond
+        the frames indexed before are added, because frames are only ever appended to a hand side
+        (e.g by GestureWatcher)
+        Parameters:
+            gesture(Gesture) : a gesture
+
+        Returns:
+            void
+        """
+        hand_sides = [Gesture.right_hand(), Gesture.left_hand()] if self.hand_side == Gesture.both_hand() \
+            else [self.hand_side]
+        for hand_side in hand_sides:
+            label = (gesture.gesture_name, hand_side)
+            hand_frames = gesture.get_hand_frames(hand_side)
+            label_index = self.__label_index.get(label)
+            indexed = self.__label_frame_counts[label_index] if label_index is not None else 0
+            if len(hand_frames) <= indexed:
+                continue
+            if label_index is None:
+                label_index = len(self.__labels)
+                self.__label_index.update({label: label_index})
+                self.__labels.append(label)
+                self.__label_frame_counts.append(0)
+            self.__pending.append((self.get_pose_vectors(hand_frames.get_joints()[indexed:]),
+                                   np.full(len(hand_frames) - indexed, label_index, dtype=np.int32),
+                                   hand_frames.get_frame_numbers()[indexed:].astype(np.int32)))
+            self.__pending_count += len(hand_frames) - indexed
+            self.__label_frame_counts[label_index] = len(hand_frames)
+        if self.__pending_count > max(self.leaf_size, self.__REBUILD_FRACTION * len(self.__points)):
+            self.build()
+
+    def add_gestures(self, gestures: Gestures):
+        """ Adding every gesture of a Gestures object, so calling it again after more gestures were added to the
+        Gestures object only adds the new gestures (and new hand sides and frames) """
+        for gesture in gestures.get_list_of_gesture().values():
+            self.add_gesture(gesture)
+
+    def build(self):
+        """ Building the tree from every vector, including vectors added after the last build """
+        if self.__pending_count != 0:
+            self.__points = np.concatenate([self.__points] + [vectors for (vectors, _, _) in self.__pending])
+            self.__point_labels = np.concatenate([self.__point_labels] + [labels for (_, labels, _) in self.__pending])
+            self.__point_frame_numbers = np.concatenate(
+                [self.__point_frame_numbers] + [frame_numbers for (_, _, frame_numbers) in self.__pending])
+            self.__pending, self.__pending_count = [], 0
+
+        order = np.arange(len(self.__points))
+        # (start, end, children, lower, upper) of each node, nodes are numbered in the order they are created
+        nodes = dict()
+        stack = [(0, 0, len(order))] if len(order) != 0 else []
+        while len(stack) != 0:
+            node, start, end = stack.pop()
+            node_points = self.__points[order[start:end]]
+            lower, upper = node_points.min(axis=0), node_points.max(axis=0)
+            spread = upper - lower
+            if end - start <= self.leaf_size or spread.max() == 0:
+                nodes.update({node: (start, end, (-1, -1), lower, upper)})
+                continue
+            # splitting at the median of the widest dimension keeps the tree balanced
+            dimension = int(np.argmax(spread))
+            middle = (end - start) // 2
+            order[start:end] = order[start:end][np.argpartition(node_points[:, dimension], middle)]
+            left = len(nodes) + len(stack) + 1
+            nodes.update({node: (start, end, (left, left + 1), lower, upper)})
+            stack += [(left, start, start + middle), (left + 1, start + middle, end)]
+
+        self.__points = self.__points[order]
+        self.__point_labels = self.__point_labels[order]
+        self.__point_frame_numbers = self.__point_frame_numbers[order]
+        node_list = [nodes[node] for node in range(len(nodes))]
+        dimensions = self.__points.shape[1]
+        self.__node_start = np.array([start for (start, _, _, _, _) in node_list], dtype=np.intp)
+        self.__node_end = np.array([end for (_, end, _, _, _) in node_list], dtype=np.intp)
+        self.__node_children = np.array([children for (_, _, children, _, _) in node_list],
+                                        dtype=np.intp).reshape(-1, 2)
+        self.__node_lower = np.array([lower for (_, _, _, lower, _) in node_list]).reshape(-1, dimensions)
+        self.__node_upper = np.array([upper for (_, _, _, _, upper) in node_list]).reshape(-1, dimensions)
+
+    def __to_vector(self, pose) -> np.ndarray:
+        """ Converting a query pose, a Frame or a joint array of shape (joints, 3), into a pose vector """
+        if isinstance(pose, Frame):
+            pose = pose.get_joint_array()
+        return self.get_pose_vectors(pose)
+
+    def __get_box_distance(self, node: int, vector: np.ndarray) -> float:
+        """ Getting the distance from a vector to the bounding box of a node """
+        excess = np.maximum(self.__node_lower[node] - vector, 0) + np.maximum(vector - self.__node_upper[node], 0)
+        return float(np.sqrt(np.dot(excess, excess)))
+
+    def __get_hand_mask(self, labels: np.ndarray, hand_side: str) -> np.ndarray:
+        label_hands = np.array([label_hand == hand_side for (_, label_hand) in self.__labels], dtype=bool)
+        return label_hands[labels]
+
+    def __get_distances(self, vectors: np.ndarray, labels: np.ndarray, vector: np.ndarray,
+                        hand_side: str) -> np.ndarray:
+        distances = np.sqrt(np.sum((vectors - vector) ** 2, axis=1))
+        if hand_side is not None:
+            distances[~self.__get_hand_mask(labels, hand_side)] = np.inf
+        return distances
+
+    def __to_results(self, candidates: list) -> list:
+        """ Converting (distance, label index, frame number) tuples into results sorted by distance """
+        return [(self.__labels[label][0], self.__labels[label][1], int(frame_number), float(distance))
+                for (distance, label, frame_number) in sorted(candidates) if np.isfinite(distance)]
+
+    def query(self, pose, k: int = 1, hand_side: str = None) -> list:
+        """ Finding the nearest frames of a pose
+        Parameters:
+            pose(Frame or np.ndarray) : a Frame, or a joint array of shape (joints, 3) following
+                                        'Frame.get_joint_names()',
+            k(int) : the number of nearest frames to return,
+            hand_side(str) : 'R' or 'L' to search only frames of the hand side, every frame if it is None
+
+        Returns:
+            list : up to k tuples of (gesture name, hand side, frame number, distance) from the nearest one
+        """
+        if k < 1:
+            raise ValueError('k should be at least one')
+        vector = self.__to_vector(pose)
+        # 'best' is a heap of (-distance, label index, frame number) of the k nearest frames found so far
+        best = []
+
+        def merge(distances, labels, frame_numbers):
+            if len(distances) > k:
+                nearest = np.argpartition(distances, k - 1)[:k]
+                distances, labels, frame_numbers = distances[nearest], labels[nearest], frame_numbers[nearest]
+            for (distance, label, frame_number) in zip(distances.tolist(), labels.tolist(), frame_numbers.tolist()):
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, label, frame_number))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, label, frame_number))
+
+        for (vectors, labels, frame_numbers) in self.__pending:
+            merge(self.__get_distances(vectors, labels, vector, hand_side), labels, frame_numbers)
+
+        if len(self.__node_start) != 0:
+            # nodes are visited from the nearest bounding box
+            queue = [(self.__get_box_distance(0, vector), 0)]
+            while len(queue) != 0:
+                box_distance, node = heapq.heappop(queue)
+                if len(best) == k and box_distance >= -best[0][0]:
+                    break
+                left, right = self.__node_children[node]
+                if left == -1:
+                    start, end = self.__node_start[node], self.__node_end[node]
+                    labels = self.__point_labels[start:end]
+                    merge(self.__get_distances(self.__points[start:end], labels, vector, hand_side), labels,
+                          self.__point_frame_numbers[start:end])
+                else:
+                    for child in (left, right):
+                        heapq.heappush(queue, (self.__get_box_distance(child, vector), child))
+
+        return self.__to_results([(-distance, label, frame_number) for (distance, label, frame_number) in best])
+
+    def query_radius(self, pose, radius: float, hand_side: str = None) -> list:
+        """ Finding every frame within a distance of a pose
+        Parameters:
+            pose(Frame or np.ndarray) : see 'query',
+            radius(float) : the maximum distance,
+            hand_side(str) : 'R' or 'L' to search only frames of the hand side, every frame if it is None
+
+        Returns:
+            list : tuples of (gesture name, hand side, frame number, distance) from the nearest one
+        """
+        vector = self.__to_vector(pose)
+        candidates = []
+
+        def collect(distances, labels, frame_numbers):
+            within = np.flatnonzero(distances <= radius)
+            candidates.extend(zip(distances[within].tolist(), labels[within].tolist(),
+                                  frame_numbers[within].tolist()))
+
+        for (vectors, labels, frame_numbers) in self.__pending:
+            collect(self.__get_distances(vectors, labels, vector, hand_side), labels, frame_numbers)
+
+        stack = [0] if len(self.__node_start) != 0 else []
+        while len(stack) != 0:
+            node = stack.pop()
+            if self.__get_box_distance(node, vector) > radius:
+                continue
+            left, right = self.__node_children[node]
+            if left == -1:
+                start, end = self.__node_start[node], self.__node_end[node]
+                labels = self.__point_labels[start:end]
+                collect(self.__get_distances(self.__points[start:end], labels, vector, hand_side), labels,
+                        self.__point_frame_numbers[start:end])
+            else:
+                stack += [left, right]
+
+        return self.__to_results(candidates)
+
+    def save(self, file_name: str):
+        """ Saving the index to a '.npz' file, vectors added after the last build are built into the tree first """
+        if self.__pending_count != 0:
+            self.build()
+        np.savez_compressed(file_name, finger_name_list=np.array(self.finger_name_list, dtype=str),
+                            settings=np.array([self.hand_side, str(int(self.normalize)), str(self.leaf_size)]),
+                            label_gesture_names=np.array([name for (name, _) in self.__labels], dtype=str),
+                            label_hand_sides=np.array([hand for (_, hand) in self.__labels], dtype=str),
+                            points=self.__points, point_labels=self.__point_labels,
+                            point_frame_numbers=self.__point_frame_numbers, node_start=self.__node_start,
+                            node_end=self.__node_end, node_children=self.__node_children,
+                            node_lower=self.__node_lower, node_upper=self.__node_upper)
+
+    @classmethod
+    def load(cls, file_name: str):
+        """ Loading an index saved by 'save'
+        Parameters:
+            file_name(str) : '.npz' file name
+
+        Returns:
+            PoseIndex : the index, more gestures can be added to it
+        """
+        with np.load(file_name, allow_pickle=False) as saved:
+            hand_side, normalize, leaf_size = saved['settings'].tolist()
+            pose_index = cls(saved['finger_name_list'].tolist(), hand_side, normalize == '1', int(leaf_size))
+            pose_index.__labels = list(zip(saved['label_gesture_names'].tolist(), saved['label_hand_sides'].tolist()))
+            pose_index.__label_index = {label: index for (index, label) in enumerate(pose_index.__labels)}
+            pose_index.__label_frame_counts = np.bincount(saved['point_labels'],
+                                                          minlength=len(pose_index.__labels)).tolist()
+            pose_index.__points = saved['points']
+            pose_index.__point_labels = saved['point_labels']
+            pose_index.__point_frame_numbers = saved['point_frame_numbers']
+            pose_index.__node_start = saved['node_start']
+            pose_index.__node_end = saved['node_end']
+            pose_index.__node_children = saved['node_children']
+            pose_index.__node_lower = saved['node_lower']
+            pose_index.__node_upper = saved['node_upper']
+        return pose_index
@@ -0,0 +1,166 @@
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+
+from instrumentation import Instrumentation
+from main import extract_finger_array, extract_finger_frame
+from models.gestures import Gestures
+
+
+class QueryCache:
+    """ This is a class for memoizing repeated queries of gestures in memory.
+
+    Results of 'extract_finger_frame', 'extract_finger_array' and 'Gestures.get_gesture' are kept by their arguments
+    in an LRU bounded by an estimated number of bytes, so that scripts asking for the same fingers of the same gesture
+    many times only pay for the first query. A result is kept together with the Gesture object it was computed from
+    and the version of that gesture, hence a gesture changed by 'Gestures.add_gesture', 'Gesture.add_more_hands' or
+    the setters of its frames, or replaced by another Gesture object, is queried again instead of returning
+    a stale result. Only results of gestures in compact storage are kept: Frame objects in a list do not know their
+    gesture, so a change of them could not be noticed, and queries of such gestures are not memoized.
+    Results of 'get_gesture' are kept until the version of Gestures changes.
+
+    Results are shared between callers, so they should not be modified. Arrays returned by 'extract_finger_array'
+    are read-only for that reason.
+
+    at the time of instantiation, it takes Gestures and the maximum number of bytes of kept results
+    for its constructor
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # each of them is the first item of a key, which represents the kind of query
+    __FINGER_FRAME = 'extract_finger_frame'
+    __FINGER_ARRAY = 'extract_finger_array'
+    __GESTURE = 'get_gesture'
+
+    def __init__(self, gestures: Gestures, max_bytes: int = 64 * 1024 * 1024):
+        if max_bytes < 0:
+            raise ValueError('max_bytes should not be negative')
+        self.gestures = gestures
+        self.max_bytes = max_bytes
+        # '__entries' is the LRU of results, the most recently used one is at the end
+        # {key: (Gesture or None, version, result, bytes)}
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+        self.__statistics = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0, 'uncached': 0}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __get_size(value, gesture=None) -> int:
+        """ Estimating the number of bytes of a result. An array viewing the frames of the gesture only counts
+        its own object because the frames are not kept alive by the cache alone, any other array counts
+        the memory it keeps alive, which is the whole base array of a view """
+        storage = [gesture.get_hand_frames(hand_side).get_joints()
+                   for hand_side in gesture.get_frames_data_in_dict()] if gesture is not None else []
+        size = 0
+        stack = [value]
+        while len(stack) != 0:
+            item = stack.pop()
+            if isinstance(item, np.ndarray):
+                size += sys.getsizeof(item)
+                if item.base is None:
+                    size += item.nbytes
+                elif not any(np.may_share_memory(item, joints) for joints in storage):
+                    size += item.base.nbytes if isinstance(item.base, np.ndarray) else item.nbytes
+                continue
+            size += sys.getsizeof(item)
+            if isinstance(item, Mapping):  # finger dictionaries of array views are read-only mappings
+                stack += item.values()
+            elif isinstance(item, (list, tuple)):
+                stack += item
+        return size
+
+    def __lookup(self, key: tuple, owner, version: int):
+        """ Getting a kept result which is still valid, or None """
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.__statistics['misses'] += 1
+            Instrumentation.count('query_cache_misses')
+            return None
+        if entry[0] is not owner or entry[1] != version:
+            self.__remove(key)
+            self.__statistics['invalidations'] += 1
+            self.__statistics['misses'] += 1
+            Instrumentation.count('query_cache_misses')
+            return None
+        self.__entries.move_to_end(key)
+        self.__statistics['hits'] += 1
+        Instrumentation.count('query_cache_hits')
+        return entry[2]
+
+    def __store(self, key: tuple, owner, version: int, result):
+        """ Keeping a result, evicting the least recently used ones beyond the maximum number of bytes.
+        A result larger than the maximum is not kept at all """
+        size = self.__get_size(result, owner)
+        if size > self.max_bytes:
+            return
+        self.__entries[key] = (owner, version, result, size)
+        self.__bytes += size
+        while self.__bytes > self.max_bytes:
+            self.__remove(next(iter(self.__entries)))
+            self.__statistics['evictions'] += 1
+
+    def __remove(self, key: tuple):
+        self.__bytes -= self.__entries.pop(key)[3]
+
+    def __query_gesture(self, kind: str, gesture_name: str, hand_side: str, finger_name_list: list, extract):
+        key = (kind, gesture_name, hand_side, tuple(finger_name_list))
+        with self.__lock:
+            # the gesture is looked up by its name in O(1) every time, so a replaced gesture is noticed
+            gesture = self.gestures.get_list_of_gesture()[gesture_name]
+            if not gesture.is_compact():
+                self.__statistics['uncached'] += 1
+                return extract(gesture_name, hand_side, finger_name_list, self.gestures)
+            version = gesture.get_version()
+            result = self.__lookup(key, gesture, version)
+            if result is None:
+                result = extract(gesture_name, hand_side, finger_name_list, self.gestures)
+                self.__store(key, gesture, version, result)
+            return result
+
+    def extract_finger_frame(self, gesture_name: str, hand_side: str, finger_name_list: list) -> dict:
+        """ Memoized 'main.extract_finger_frame' for the gestures of the cache, see its description """
+        return self.__query_gesture(self.__FINGER_FRAME, gesture_name, hand_side, finger_name_list,
+                                    extract_finger_frame)
+
+    def extract_finger_array(self, gesture_name: str, hand_side: str, finger_name_list: list) -> tuple:
+        """ Memoized 'main.extract_finger_array' for the gestures of the cache, see its description """
+        def extract(*arguments):
+            finger_arrays, joint_names = extract_finger_array(*arguments)
+            for finger_array in finger_arrays.values():
+                finger_array.flags.writeable = False  # the flag of a view does not change the gesture's arrays
+            return finger_arrays, joint_names
+        return self.__query_gesture(self.__FINGER_ARRAY, gesture_name, hand_side, finger_name_list, extract)
+
+    def get_gesture(self, list_of_gesture_name: list) -> list:
+        """ Memoized 'Gestures.get_gesture' for the gestures of the cache, see its description """
+        key = (self.__GESTURE, tuple(list_of_gesture_name))
+        with self.__lock:
+            version = self.gestures.get_version()
+            result = self.__lookup(key, None, version)
+            if result is None:
+                result = self.gestures.get_gesture(list_of_gesture_name)
+                self.__store(key, None, version, result)
+            return result
+
+    def clear(self):
+        """ Removing every kept result, the statistics are kept """
+        with self.__lock:
+            self.__entries.clear()
+            self.__bytes = 0
+
+    def get_statistics(self) -> dict:
+        """ Getting statistics of the cache
+        Returns:
+            dict : {'hits', 'misses', 'invalidations', 'evictions', 'uncached', 'hit_rate', 'entries', 'bytes',
+                    'max_bytes'}, 'invalidations' counts results queried again because their gesture had changed,
+                   'uncached' counts queries of gestures not in compact storage, which are not memoized
+        """
+        with self.__lock:
+            statistics = dict(self.__statistics)
+            queries = statistics['hits'] + statistics['misses']
+            statistics.update({'hit_rate': statistics['hits'] / queries if queries != 0 else 0.0,
+                               'entries': len(self.__entries), 'bytes': self.__bytes, 'max_bytes': self.max_bytes})
+            return statistics
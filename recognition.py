@@ -0,0 +1,239 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from models.frame import Frame
+from models.gesture import Gesture
+from models.gestures import Gestures
+from models.hand_frames import HandFrames
+from resampling import Resampler
+
+
+class GestureRecognizer:
+    """ This is a class for recognising a sequence of frames as one of the gestures it was built with.
+
+    At the time of its instantiation, it builds a reference index from a Gestures object. Each hand side of each
+    gesture becomes a reference sequence of per frame feature vectors (coordinates of the chosen fingers' joints),
+    resampled to a fixed length. A query sequence is compared with the references by dynamic time warping (DTW)
+    constrained to a Sakoe-Chiba band. Before DTW is computed, references are ranked by two cheap lower bounds,
+    LB_Kim and LB_Keogh, and a reference whose lower bound is already larger than the k-th best distance found
+    so far is skipped, so the query cost grows slowly with the number of references.
+
+    at the time of instantiation, it takes gestures, finger names, a hand side, a sequence length and
+    a band width (as a fraction of the length) for its constructor
+    """
+
+    def __init__(self, gestures: Gestures, finger_name_list: list = None, hand_side: str = Gesture.both_hand(),
+                 length: int = 64, window: float = 0.1):
+        if length < 2:
+            raise ValueError('length should be at least two')
+        if finger_name_list is None:
+            finger_name_list = [Frame.get_thumb_finger(), Frame.get_index_finger(), Frame.get_middle_finger(),
+                                Frame.get_ring_finger(), Frame.get_pinky_finger()]
+        self.finger_name_list = list(finger_name_list)
+        self.hand_side = hand_side
+        self.length = length
+        # width of the Sakoe-Chiba band in frames
+        self.band = max(0, int(round(window * length)))
+        self.__columns = sorted({column for finger in self.finger_name_list
+                                 for column in Frame.get_finger_joint_columns(finger)})
+
+        # '__labels' is a list of (gesture name, hand side) of each reference, and the arrays below are stacked in
+        # the same order, '__references' is of shape (references, length, features)
+        self.__labels = []
+        self.__reference_list = []
+        # number of frames of each reference before resampling
+        self.__frame_counts = []
+        self.__references = None
+        self.__upper_envelopes = None
+        self.__lower_envelopes = None
+        # statistics of the last query, how many references each stage dropped or computed
+        self.statistics = dict()
+
+        for gesture in gestures.get_list_of_gesture().values():
+            self.add_gesture(gesture)
+
+    def add_gesture(self, gesture: Gesture):
+        """ Adding hand sides of a gesture to the reference index
+        Parameters:
+            gesture(Gesture) : a gesture, hand sides without frames are skipped
+
+        Returns:
+            void
+        """
+        hand_sides = [Gesture.left_hand(), Gesture.right_hand()] if self.hand_side == Gesture.both_hand() \
+            else [self.hand_side]
+        for hand_side in hand_sides:
+            hand_frames = gesture.get_hand_frames(hand_side)
+            if len(hand_frames) > 0:
+                self.__labels.append((gesture.gesture_name, hand_side))
+                self.__reference_list.append(self.get_features(hand_frames))
+                self.__frame_counts.append(len(hand_frames))
+                self.__references = None  # stacked arrays are rebuilt at the next query
+
+    def get_labels(self) -> list:
+        return list(self.__labels)
+
+    def get_longest_reference(self, hand_side: str = None) -> int:
+        """ Getting the number of frames of the longest reference (before resampling), 0 if there is no reference
+        Parameters:
+            hand_side(str) : 'R' or 'L' to consider only references of the hand side, every reference if None
+
+        Returns:
+            int : the number of frames
+        """
+        return max([frame_count for (label, frame_count) in zip(self.__labels, self.__frame_counts)
+                    if hand_side is None or label[1] == hand_side], default=0)
+
+    def get_separation(self, hand_side: str = None) -> float:
+        """ Getting the DTW distance between the two nearest references of different gestures
+        Parameters:
+            hand_side(str) : 'R' or 'L' to consider only references of the hand side, every reference if None
+
+        Returns:
+            float : the distance, in the same unit as the distances of 'recognize',
+                    inf if there are references of fewer than two gestures
+        """
+        candidates = [index for (index, label) in enumerate(self.__labels)
+                      if hand_side is None or label[1] == hand_side]
+        separation = np.inf  # squared, as returned by '_banded_dtw'
+        for (position, index) in enumerate(candidates):
+            others = [other for other in candidates[position + 1:]
+                      if self.__labels[other][0] != self.__labels[index][0]]
+            if len(others) == 0:
+                continue
+            references = np.stack([self.__reference_list[other] for other in others])
+            distances = _banded_dtw(self.__reference_list[index], references, self.band, separation)
+            separation = min(separation, float(distances.min()))
+        return float(np.sqrt(separation))
+
+    def get_features(self, frames) -> np.ndarray:
+        """ Converting frames into a sequence of feature vectors
+        Parameters:
+            frames(HandFrames, list or np.ndarray) : HandFrames, a list of Frame objects or a joint array of shape
+                                                     (frames, joints, 3) following 'Frame.get_joint_names()'
+
+        Returns:
+            np.ndarray : an array of shape (length, features), joint coordinates of the chosen fingers of each frame
+                         linearly resampled to 'length' frames. Missing joints (NaN) become zero
+        """
+        if isinstance(frames, np.ndarray):
+            joints = frames
+        else:
+            if not isinstance(frames, HandFrames):
+                frames = HandFrames.from_frames(None, list(frames))
+            joints = frames.get_joints()
+        if len(joints) == 0:
+            raise ValueError('a sequence should have at least one frame')
+        features = np.nan_to_num(joints[:, self.__columns].reshape(len(joints), -1).astype(np.float64))
+        return Resampler.resample_to_length(features, self.length)
+
+    def __stack_references(self):
+        """ Stacking references into one array and computing their LB_Keogh envelopes """
+        self.__references = np.stack(self.__reference_list)
+        # the envelope of a reference at frame i is the maximum/minimum of the frames within the band around i
+        padded = np.pad(self.__references, ((0, 0), (self.band, self.band), (0, 0)), mode='edge')
+        windows = sliding_window_view(padded, 2 * self.band + 1, axis=1)
+        self.__upper_envelopes = windows.max(axis=-1)
+        self.__lower_envelopes = windows.min(axis=-1)
+
+    def recognize(self, query, k: int = 1, hand_side: str = None) -> list:
+        """ Finding the nearest gestures of a query sequence
+        Parameters:
+            query(HandFrames, list or np.ndarray) : frames to recognise, see 'get_features',
+            k(int) : the number of nearest references to return,
+            hand_side(str) : 'R' or 'L' to compare only with references of the hand side, every reference if None
+
+        Returns:
+            list : up to k tuples of (gesture name, hand side, DTW distance), from the nearest one.
+                   The distance is the square root of the sum of squared frame distances along the warping path
+        """
+        if k < 1:
+            raise ValueError('k should be at least one')
+        if len(self.__reference_list) == 0:
+            return []
+        if self.__references is None:
+            self.__stack_references()
+        query_features = self.get_features(query)
+
+        candidates = np.arange(len(self.__labels))
+        if hand_side is not None:
+            candidates = np.array([index for index in candidates if self.__labels[index][1] == hand_side],
+                                  dtype=np.intp)
+        references = self.__references[candidates]
+
+        # LB_Kim: every warping path starts at the first frames and ends at the last frames of both sequences
+        lb_kim = np.sum((references[:, 0] - query_features[0]) ** 2, axis=1) \
+            + np.sum((references[:, -1] - query_features[-1]) ** 2, axis=1)
+        # LB_Keogh: a query frame is at least as far as the closest edge of the reference envelope around it
+        upper = self.__upper_envelopes[candidates]
+        lower = self.__lower_envelopes[candidates]
+        excess = np.maximum(query_features - upper, 0) + np.maximum(lower - query_features, 0)
+        lb_keogh = np.sum(excess ** 2, axis=(1, 2))
+        lower_bounds = np.maximum(lb_kim, lb_keogh)
+
+        order = np.argsort(lower_bounds, kind='stable')
+        best = []  # (distance, candidate index) of the nearest references so far, at most k items
+        computed = 0
+        # the first batch only fills 'best' so that later batches are pruned as early as possible
+        start, batch_size = 0, k
+        while start < len(order):
+            threshold = best[-1][0] if len(best) == k else np.inf
+            batch = [index for index in order[start:start + batch_size] if lower_bounds[index] <= threshold]
+            if len(batch) == 0:  # lower bounds are sorted, so every remaining reference is pruned as well
+                break
+            distances = _banded_dtw(query_features, references[batch], self.band, threshold)
+            computed += len(batch)
+            best = sorted(best + list(zip(distances.tolist(), batch)))[:k]
+            start, batch_size = start + batch_size, max(k, 8)
+
+        self.statistics = {'references': len(candidates), 'dtw_computed': computed,
+                           'pruned': len(candidates) - computed}
+        return [(self.__labels[candidates[index]][0], self.__labels[candidates[index]][1], float(np.sqrt(distance)))
+                for (distance, index) in best if np.isfinite(distance)]
+
+
+def _banded_dtw(query: np.ndarray, references: np.ndarray, band: int, threshold: float = np.inf) -> np.ndarray:
+    """ Computing DTW between a query and a batch of references of the same length within a Sakoe-Chiba band
+    Parameters:
+        query(np.ndarray) : an array of shape (length, features), or of shape (references, length, features)
+                            to compare each reference with its own query,
+        references(np.ndarray) : an array of shape (references, length, features),
+        band(int) : the maximum distance between aligned frame indexes,
+        threshold(float) : a reference is abandoned (inf) once its distance can not be below the threshold
+
+    Returns:
+        np.ndarray : sum of squared frame distances along the best warping path of each reference
+
+    cells on an anti-diagonal (i + j constant) only depend on the previous two anti-diagonals,
+    so each anti-diagonal is computed for every reference at once. A warping path can not skip two anti-diagonals
+    in a row, hence the minimum of the last two anti-diagonals is a lower bound used for early abandoning
+    """
+    length = query.shape[-2]
+    # squared distances between every query frame and every reference frame, shape (references, length, length)
+    if query.ndim == 2:
+        query_norms = np.sum(query ** 2, axis=1)[np.newaxis, :, np.newaxis]
+        products = np.einsum('id,rjd->rij', query, references)
+    else:
+        query_norms = np.sum(query ** 2, axis=2)[:, :, np.newaxis]
+        products = np.einsum('rid,rjd->rij', query, references)
+    cost = query_norms + np.sum(references ** 2, axis=2)[:, np.newaxis, :] - 2 * products
+    np.maximum(cost, 0, out=cost)
+
+    # accumulated cost with a border of infinity, accumulated[:, i + 1, j + 1] is for query frame i, reference frame j
+    accumulated = np.full((len(references), length + 1, length + 1), np.inf)
+    accumulated[:, 0, 0] = 0
+    previous_minimum = np.zeros(len(references))
+    for diagonal in range(2, 2 * length + 1):
+        i = np.arange(max(1, diagonal - length), min(length, diagonal - 1) + 1)
+        j = diagonal - i
+        inside = np.abs(i - j) <= band
+        i, j = i[inside], j[inside]
+        if len(i) == 0:
+            continue
+        accumulated[:, i, j] = cost[:, i - 1, j - 1] + np.minimum(
+            np.minimum(accumulated[:, i - 1, j - 1], accumulated[:, i - 1, j]), accumulated[:, i, j - 1])
+        current_minimum = accumulated[:, i, j].min(axis=1)
+        if np.all(np.minimum(previous_minimum, current_minimum) > threshold):
+            return np.full(len(references), np.inf)
+        previous_minimum = current_minimum
+    return accumulated[:, length, length]
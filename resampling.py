@@ -0,0 +1,209 @@
+import numpy as np
+
+from models.gesture import Gesture
+from models.hand_frames import HandFrames
+
+
+class Resampler:
+    """ This is a class to change the number of frames of gestures.
+
+    Resampling puts every frame of a hand side on a timeline and linearly interpolates all joints of all new frames
+    at once. Hand sides of a gesture are recorded in separate files of different lengths, so they are aligned onto
+    one timeline in one of two ways
+        'stretch' : both hand sides span the whole gesture, so each of them is stretched to the same number of frames,
+        'start'   : both hand sides start together at the same frame rate, so the timeline is as long as the longer
+                    hand side and the shorter one keeps its last frame until the end, the same way
+                    'Visualization.update_precomputed' plays them.
+
+    Decimation keeps only the frames needed to reconstruct the others by linear interpolation within a tolerance,
+    which is useful for rendering and storing long takes. Kept frames keep their original frame numbers, so the
+    timeline of a decimated hand side is not changed.
+    In the program, all methods are class methods, and therefore this class will NOT be instantiated.
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # each of them represents a way to align hand sides
+    __STRETCH = 'stretch'
+    __START = 'start'
+    __ALIGNMENTS = (__STRETCH, __START)
+
+    @classmethod
+    def get_alignments(cls) -> tuple:
+        return cls.__ALIGNMENTS
+
+    @classmethod
+    def resample_array(cls, values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """ Linearly interpolating an array along its first axis
+        Parameters:
+            values(np.ndarray) : an array of shape (frames, ...),
+            positions(np.ndarray) : fractional frame indexes to interpolate at, clipped to the range of frames
+
+        Returns:
+            np.ndarray : an array of shape (len(positions), ...) in float64.
+                         A value next to a missing value (NaN) is NaN unless it is exactly on a frame
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            raise ValueError('values should have at least one frame')
+        positions = np.clip(np.asarray(positions, dtype=np.float64), 0, len(values) - 1)
+        left = np.floor(positions).astype(np.intp)
+        right = np.minimum(left + 1, len(values) - 1)
+        # the weight is broadcast over every axis after the first one
+        weight = (positions - left).reshape((-1,) + (1,) * (values.ndim - 1))
+        resampled = values[left] * (1 - weight) + values[right] * weight
+        on_frame = weight.ravel() == 0
+        resampled[on_frame] = values[left[on_frame]]  # a frame position does not depend on its neighbour
+        return resampled
+
+    @classmethod
+    def resample_to_length(cls, values: np.ndarray, length: int) -> np.ndarray:
+        """ Resampling an array of shape (frames, ...) to 'length' frames evenly spread from the first frame
+        to the last one """
+        if length < 1:
+            raise ValueError('length should be at least one')
+        return cls.resample_array(values, np.linspace(0, len(values) - 1, length))
+
+    @classmethod
+    def resample_hand_frames(cls, hand_frames: HandFrames, positions: np.ndarray) -> HandFrames:
+        """ Interpolating frames of a hand side at fractional frame indexes, see 'resample_array'
+
+        Returns:
+            HandFrames : new frames in the dtype of the given frames, numbered from one
+        """
+        dtype = hand_frames.get_joints().dtype
+        return HandFrames(hand_frames.hand_type,
+                          cls.resample_array(hand_frames.get_root_pos(), positions).astype(dtype, copy=False),
+                          cls.resample_array(hand_frames.get_joints(), positions).astype(dtype, copy=False))
+
+    @classmethod
+    def resample_gesture(cls, gesture: Gesture, length: int = None, frame_rate: float = None,
+                         source_frame_rate: float = None, alignment: str = 'stretch') -> Gesture:
+        """ Resampling hand sides of a gesture onto one timeline
+        Parameters:
+            gesture(Gesture) : a gesture,
+            length(int) : the number of frames of every hand side of the new gesture,
+            frame_rate(float) : frames per second of the new gesture instead of 'length',
+            source_frame_rate(float) : frames per second of the recording, required with 'frame_rate',
+            alignment(str) : 'stretch' or 'start', see the class description
+
+        Returns:
+            Gesture : a new gesture in compact storage whose hand sides have the same number of frames.
+                      With 'frame_rate' the length follows the duration of the longer hand side
+        """
+        if alignment not in cls.__ALIGNMENTS:
+            raise ValueError(f'{alignment} is not one of {cls.__ALIGNMENTS}')
+        if (length is None) == (frame_rate is None):
+            raise ValueError('either length or frame_rate should be given')
+        if frame_rate is not None and (source_frame_rate is None or source_frame_rate <= 0 or frame_rate <= 0):
+            raise ValueError('frame_rate and source_frame_rate should be positive')
+
+        hand_frames_list = [gesture.get_hand_frames(hand_side)
+                            for hand_side in (Gesture.right_hand(), Gesture.left_hand())]
+        hand_frames_list = [hand_frames for hand_frames in hand_frames_list if len(hand_frames) > 0]
+        resampled_gesture = Gesture(gesture.gesture_name)
+        if len(hand_frames_list) == 0:
+            return resampled_gesture
+
+        longest = max(len(hand_frames) for hand_frames in hand_frames_list)
+        if length is None:
+            # the duration of the longer hand side is (frames - 1) / source_frame_rate seconds
+            length = int(round((longest - 1) * frame_rate / source_frame_rate)) + 1
+        if length < 1:
+            raise ValueError('length should be at least one')
+
+        # a timeline of 'length' points in frames of the longer hand side
+        timeline = np.linspace(0, longest - 1, length)
+        for hand_frames in hand_frames_list:
+            if alignment == cls.__STRETCH and longest > 1:
+                positions = timeline * (len(hand_frames) - 1) / (longest - 1)
+            else:  # positions past the last frame are clipped to it
+                positions = timeline
+            resampled_gesture.set_hand_frames(cls.resample_hand_frames(hand_frames, positions))
+        return resampled_gesture
+
+    @classmethod
+    def get_decimation_indexes(cls, joints: np.ndarray, tolerance: float) -> np.ndarray:
+        """ Choosing frames to keep so that every other frame is reconstructed within a tolerance
+        Parameters:
+            joints(np.ndarray) : an array of shape (frames, joints, 3), e.g 'HandFrames.get_joints()'
+                                 or the points drawn for each frame (see 'decimate_hand_frames'),
+            tolerance(float) : the maximum distance between a joint of a dropped frame and the same joint
+                               interpolated from the kept frames around it
+
+        Returns:
+            np.ndarray : sorted indexes of frames to keep, the first and the last frame are always kept
+
+        frames are chosen by the Ramer-Douglas-Peucker algorithm over time: a segment between two kept frames is
+        split at its worst reconstructed frame until no frame in it is beyond the tolerance. The error of every
+        frame of a segment is computed at once. Missing joints (NaN) are not taken into account
+        """
+        joints = np.asarray(joints, dtype=np.float64)
+        frame_count = len(joints)
+        if frame_count <= 2:
+            return np.arange(frame_count)
+
+        keep = np.zeros(frame_count, dtype=bool)
+        keep[[0, -1]] = True
+        segments = [(0, frame_count - 1)]
+        while len(segments) != 0:
+            start, end = segments.pop()
+            if end - start < 2:
+                continue
+            weight = (np.arange(start + 1, end) - start)[:, np.newaxis, np.newaxis] / (end - start)
+            interpolated = joints[start] * (1 - weight) + joints[end] * weight
+            error = np.sqrt(np.nanmax(np.sum((joints[start + 1:end] - interpolated) ** 2, axis=-1), axis=-1,
+                                      initial=0.0))
+            worst = int(np.argmax(error))
+            if error[worst] > tolerance:
+                split = start + 1 + worst
+                keep[split] = True
+                segments += [(start, split), (split, end)]
+        return np.flatnonzero(keep)
+
+    @classmethod
+    def decimate_hand_frames(cls, hand_frames: HandFrames, tolerance: float) -> HandFrames:
+        """ Dropping frames of a hand side which are reconstructed within a tolerance by their neighbours,
+        see 'get_decimation_indexes'. The tolerance holds for the points 'Visualization' draws, i.e the wrist
+        ('RootPos') and every joint subtracted from the wrist
+
+        Returns:
+            HandFrames : kept frames with their original frame numbers
+        """
+        root_pos = hand_frames.get_root_pos()
+        wrist_position = root_pos[:, np.newaxis, :]
+        # the points drawn for each frame, the wrist followed by the joints (see 'Visualization.precompute_line_data')
+        drawn_points = np.concatenate((wrist_position, wrist_position - hand_frames.get_joints()), axis=1)
+        indexes = cls.get_decimation_indexes(drawn_points, tolerance)
+        return HandFrames(hand_frames.hand_type, root_pos[indexes], hand_frames.get_joints()[indexes],
+                          hand_frames.get_frame_numbers()[indexes])
+
+    @classmethod
+    def decimate_gesture(cls, gesture: Gesture, tolerance: float) -> Gesture:
+        """ Decimating every hand side of a gesture, see 'decimate_hand_frames'
+
+        Returns:
+            Gesture : a new gesture in compact storage
+        """
+        decimated_gesture = Gesture(gesture.gesture_name)
+        for hand_side in (Gesture.right_hand(), Gesture.left_hand()):
+            hand_frames = gesture.get_hand_frames(hand_side)
+            if len(hand_frames) > 0:
+                decimated_gesture.set_hand_frames(cls.decimate_hand_frames(hand_frames, tolerance))
+        return decimated_gesture
+
+    @classmethod
+    def restore_hand_frames(cls, hand_frames: HandFrames) -> HandFrames:
+        """ Interpolating the frames dropped by decimation back from the kept frames
+
+        Returns:
+            HandFrames : a frame for every frame number from the first to the last kept frame
+        """
+        frame_numbers = hand_frames.get_frame_numbers()
+        if len(frame_numbers) == 0:
+            return hand_frames.copy()
+        # fractional index of every frame number between the kept frames around it
+        positions = np.interp(np.arange(frame_numbers[0], frame_numbers[-1] + 1), frame_numbers,
+                              np.arange(len(frame_numbers)))
+        restored = cls.resample_hand_frames(hand_frames, positions)
+        return HandFrames(hand_frames.hand_type, restored.get_root_pos(), restored.get_joints(),
+                          np.arange(frame_numbers[0], frame_numbers[-1] + 1, dtype=np.int32))
@@ -0,0 +1,264 @@
+import numpy as np
+
+from gesture_parser import iter_hand_frames
+from models.gesture import Gesture
+from models.hand_frames import HandFrames
+
+
+class GestureSegmenter:
+    """ This is a class for splitting a continuous recording of a hand side into gestures separated by idle periods.
+
+    The motion energy of a frame is the mean speed of its joints. Joint coordinates in the data files are relative
+    to the wrist ('RootPos'), so moving the whole hand without moving the fingers is not taken as a gesture.
+    The energy is averaged over the last 'smoothing_frames' frames and then goes through hysteresis: the hand becomes
+    active when the energy rises above 'start_threshold' and idle when it falls below 'end_threshold', so noise
+    around a single threshold does not split a gesture. Active periods separated by fewer than 'min_idle_frames'
+    idle frames belong to the same gesture, gestures shorter than 'min_gesture_frames' active frames are dropped,
+    and every gesture is extended by 'padding_frames' frames on both sides without overlapping the previous one.
+
+    Frames are processed in batches of arrays as they arrive (see 'process'), and the energy of a batch is computed
+    at once, hence a recording is segmented in the same way whether it is loaded or streamed. A gesture is reported
+    once it is followed by enough idle frames, or by 'finish' at the end of the recording.
+    Segments are frame ranges (start, end) of zero based frame indexes where the end is excluded.
+
+    at the time of instantiation, it takes the thresholds (distance per second, or per frame with the default
+    frame rate of one), the numbers of frames described above and a frame rate for its constructor
+    """
+
+    def __init__(self, start_threshold: float = 0.0006, end_threshold: float = 0.0004, smoothing_frames: int = 9,
+                 min_idle_frames: int = 60, min_gesture_frames: int = 10, padding_frames: int = 10,
+                 frame_rate: float = 1.0):
+        if end_threshold > start_threshold:
+            raise ValueError('end_threshold should not be greater than start_threshold')
+        if smoothing_frames < 1 or min_idle_frames < 1 or min_gesture_frames < 1:
+            raise ValueError('smoothing_frames, min_idle_frames and min_gesture_frames should be at least one')
+        if padding_frames < 0:
+            raise ValueError('padding_frames should not be negative')
+        if frame_rate <= 0:
+            raise ValueError('frame_rate should be positive')
+        self.start_threshold = start_threshold
+        self.end_threshold = end_threshold
+        self.smoothing_frames = smoothing_frames
+        self.min_idle_frames = min_idle_frames
+        self.min_gesture_frames = min_gesture_frames
+        self.padding_frames = padding_frames
+        self.frame_rate = frame_rate
+        self.reset()
+
+    def reset(self):
+        """ Forgetting every frame processed so far to segment another recording """
+        self.__frame_count = 0
+        self.__last_joints = None
+        self.__energy_tail = np.empty(0)
+        self.__is_active = False
+        # start of the gesture being recorded and the end of its last active period, None while idle
+        self.__segment_start = None
+        self.__active_end = None
+        self.__previous_end = 0
+
+    def get_frame_count(self) -> int:
+        """ Getting the number of frames processed so far """
+        return self.__frame_count
+
+    def get_open_segment_start(self):
+        """ Getting the first frame index a gesture being recorded may start at (including padding), None if
+        there is no such gesture. Frames before it are never part of a segment reported later """
+        if self.__segment_start is None:
+            return None
+        return max(self.__segment_start - self.padding_frames, self.__previous_end, 0)
+
+    def get_motion_energy(self, joints: np.ndarray, previous_joints: np.ndarray = None) -> np.ndarray:
+        """ Computing the motion energy of each frame, before smoothing
+        Parameters:
+            joints(np.ndarray) : a joint array of shape (frames, joints, 3),
+            previous_joints(np.ndarray) : joints of the frame before the first one of shape (joints, 3), if any
+
+        Returns:
+            np.ndarray : the mean speed of the joints in each frame of shape (frames,). Missing joints (NaN) are
+                         not taken into account, and the energy of the first frame of a recording is zero
+        """
+        joints = np.asarray(joints, dtype=np.float64)
+        if previous_joints is None:
+            previous_joints = joints[:1]
+        else:
+            previous_joints = np.asarray(previous_joints, dtype=np.float64)[np.newaxis]
+        speeds = np.linalg.norm(np.diff(np.concatenate([previous_joints, joints]), axis=0), axis=-1)
+        is_valid = ~np.isnan(speeds)
+        valid_count = is_valid.sum(axis=-1)
+        energy = np.where(is_valid, speeds, 0.0).sum(axis=-1) / np.maximum(valid_count, 1)
+        return energy * self.frame_rate
+
+    def __smooth(self, energy: np.ndarray) -> np.ndarray:
+        """ Averaging the energy of each frame with the frames before it, carried over from the previous batch """
+        extended = np.concatenate([self.__energy_tail, energy])
+        cumulative = np.concatenate([[0.0], np.cumsum(extended)])
+        ends = np.arange(len(self.__energy_tail), len(extended)) + 1
+        starts = np.maximum(ends - self.smoothing_frames, 0)
+        self.__energy_tail = extended[-(self.smoothing_frames - 1):] if self.smoothing_frames > 1 else np.empty(0)
+        return (cumulative[ends] - cumulative[starts]) / (ends - starts)
+
+    def __get_active(self, energy: np.ndarray) -> np.ndarray:
+        """ Applying hysteresis to smoothed energy: a frame between the thresholds keeps the state of the frame
+        before it, which is found for every frame at once by carrying forward the index of the last decisive one """
+        decision = np.where(energy > self.start_threshold, 1, np.where(energy < self.end_threshold, 0, -1))
+        decisive_index = np.maximum.accumulate(np.where(decision >= 0, np.arange(len(decision)), -1))
+        return np.where(decisive_index >= 0, decision[np.maximum(decisive_index, 0)], int(self.__is_active)) == 1
+
+    def __close_segment(self, segments: list):
+        if self.__active_end - self.__segment_start >= self.min_gesture_frames:
+            start = max(self.__segment_start - self.padding_frames, self.__previous_end, 0)
+            end = min(self.__active_end + self.padding_frames, self.__frame_count)
+            segments.append((start, end))
+            self.__previous_end = end
+        self.__segment_start = None
+        self.__active_end = None
+
+    def process(self, joints: np.ndarray) -> list:
+        """ Processing the next frames of a recording
+        Parameters:
+            joints(np.ndarray) : a joint array of shape (frames, joints, 3)
+
+        Returns:
+            list : segments completed by these frames, see the class description
+        """
+        if len(joints) == 0:
+            return []
+        active = self.__get_active(self.__smooth(self.get_motion_energy(joints, self.__last_joints)))
+        self.__last_joints = np.array(joints[-1], dtype=np.float64)
+        first_index = self.__frame_count
+
+        segments = []
+        # only the frames where the state changes are visited, there are few of them compared to frames
+        changes = np.flatnonzero(np.diff(np.concatenate([[self.__is_active], active]).astype(np.int8)))
+        for change in changes.tolist():
+            frame_index = first_index + change
+            if active[change]:
+                if self.__segment_start is not None and frame_index - self.__active_end >= self.min_idle_frames:
+                    self.__frame_count = frame_index  # padding after the previous gesture stops at this frame
+                    self.__close_segment(segments)
+                if self.__segment_start is None:
+                    self.__segment_start = frame_index
+            else:
+                self.__active_end = frame_index
+        self.__is_active = bool(active[-1])
+        self.__frame_count = first_index + len(active)
+
+        if not self.__is_active and self.__segment_start is not None and \
+                self.__frame_count - self.__active_end >= max(self.min_idle_frames, self.padding_frames):
+            self.__close_segment(segments)
+        return segments
+
+    def finish(self) -> list:
+        """ Ending the recording
+        Returns:
+            list : the segment being recorded if there is one, see the class description
+        """
+        segments = []
+        if self.__segment_start is not None:
+            if self.__is_active:
+                self.__active_end = self.__frame_count
+            self.__close_segment(segments)
+        return segments
+
+    def segment(self, joints: np.ndarray) -> list:
+        """ Segmenting a whole recording from the beginning
+        Parameters:
+            joints(np.ndarray) : a joint array of shape (frames, joints, 3), e.g 'HandFrames.get_joints()'
+
+        Returns:
+            list : every segment of the recording, see the class description
+        """
+        self.reset()
+        segments = self.process(joints) + self.finish()
+        self.reset()
+        return segments
+
+    @classmethod
+    def create_gestures(cls, hand_frames: HandFrames, segments: list, name_format: str = 'Gesture {}') -> list:
+        """ Cutting frames of a hand side into standalone gestures
+        Parameters:
+            hand_frames(HandFrames) : frames of a hand side,
+            segments(list) : frame ranges, e.g returned by 'segment',
+            name_format(str) : a format of gesture names taking the number of the segment counted from one
+
+        Returns:
+            list : a Gesture in compact storage for each segment, whose frames are numbered from one
+        """
+        gesture_list = []
+        for (number, (start, end)) in enumerate(segments, 1):
+            gesture = Gesture(name_format.format(number))
+            gesture.set_hand_frames(HandFrames(hand_frames.hand_type, hand_frames.get_root_pos()[start:end],
+                                               hand_frames.get_joints()[start:end]))
+            gesture_list.append(gesture)
+        return gesture_list
+
+    def segment_gesture(self, gesture: Gesture, hand_side: str, name_format: str = 'Gesture {}') -> list:
+        """ Segmenting a hand side of a loaded recording into gestures, see 'create_gestures' """
+        hand_frames = gesture.get_hand_frames(hand_side)
+        return self.create_gestures(hand_frames, self.segment(hand_frames.get_joints()), name_format)
+
+    def iter_gestures(self, source, hand_type: str = None, name_format: str = 'Gesture {}',
+                      batch_size: int = 256, dtype=np.float64):
+        """ Segmenting a data file or a stream as it is read
+        Parameters:
+            source(str or file object), hand_type(str), batch_size(int), dtype(numpy dtype) : the same as
+                                                                                  'gesture_parser.iter_hand_frames',
+            name_format(str) : see 'create_gestures'
+
+        Returns:
+            generator : (Gesture, segment) for each segment as soon as it is completed, where the segment is
+                        a frame range of the recording
+
+        only frames which may still belong to a segment are kept, so a recording of any length is segmented
+        in bounded memory as long as its gestures are
+        """
+        self.reset()
+        # frames kept from the frame index 'kept_start'
+        kept_frames = None
+        kept_start = 0
+        number = 0
+        for hand_frames in iter_hand_frames(source, hand_type, batch_size, dtype):
+            if kept_frames is None:
+                kept_frames = hand_frames.copy()
+            else:
+                kept_frames += hand_frames
+            segments = self.process(hand_frames.get_joints())
+            for (start, end) in segments:
+                number += 1
+                yield self.create_gestures(kept_frames, [(start - kept_start, end - kept_start)],
+                                           name_format.format(number))[0], (start, end)
+            # a segment reported later starts at the open segment, or at least 'padding_frames' before the next one
+            open_start = self.get_open_segment_start()
+            if open_start is None:
+                open_start = self.get_frame_count() - self.padding_frames
+            drop = max(open_start - kept_start, 0)
+            if drop != 0:
+                kept_frames = HandFrames(kept_frames.hand_type, kept_frames.get_root_pos()[drop:],
+                                         kept_frames.get_joints()[drop:], kept_frames.get_frame_numbers()[drop:])
+                kept_start += drop
+
+        for (start, end) in self.finish():
+            number += 1
+            yield self.create_gestures(kept_frames, [(start - kept_start, end - kept_start)],
+                                       name_format.format(number))[0], (start, end)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Split a continuous recording into gestures')
+    parser.add_argument('file_name', help='a data file, e.g Right_Hand_Gesture_1.txt')
+    parser.add_argument('--start-threshold', type=float, default=0.0006)
+    parser.add_argument('--end-threshold', type=float, default=0.0004)
+    parser.add_argument('--min-idle-frames', type=int, default=60)
+    parser.add_argument('--min-gesture-frames', type=int, default=10)
+    parser.add_argument('--padding-frames', type=int, default=10)
+    parser.add_argument('--frame-rate', type=float, default=1.0)
+    arguments = parser.parse_args()
+
+    gesture_segmenter = GestureSegmenter(arguments.start_threshold, arguments.end_threshold,
+                                         min_idle_frames=arguments.min_idle_frames,
+                                         min_gesture_frames=arguments.min_gesture_frames,
+                                         padding_frames=arguments.padding_frames, frame_rate=arguments.frame_rate)
+    for (gesture, (start, end)) in gesture_segmenter.iter_gestures(arguments.file_name):
+        print(f'{gesture.gesture_name}: frames {start + 1} to {end}')
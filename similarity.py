@@ -0,0 +1,216 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from models.gesture import Gesture
+from models.gestures import Gestures
+from recognition import GestureRecognizer, _banded_dtw
+
+
+class GestureSimilarity:
+    """ This is a class for computing distances between every pair of hand sides of gestures in a corpus.
+
+    Each hand side of each gesture is converted into a sequence of feature vectors resampled to the same length
+    by 'GestureRecognizer.get_features', and every pair is compared with one of two metrics
+        'euclidean' : the distance between the sequences frame by frame, i.e the square root of the sum of squared
+                      distances of aligned frames. Each tile is computed with one matrix product,
+        'dtw'       : dynamic time warping within a Sakoe-Chiba band, the same distance as 'GestureRecognizer'
+
+    The matrix is split into square tiles of 'tile_size' rows, and only tiles on and above the diagonal are computed
+    because both metrics are symmetric. With more than one worker, tiles are computed by a process pool. Sequences
+    and the result are kept in shared memory, so each worker reads every sequence and writes its tiles in place
+    instead of having arrays pickled for every tile.
+    In the program, all methods are class methods, and therefore this class will NOT be instantiated.
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # each of them represents a metric
+    __EUCLIDEAN = 'euclidean'
+    __DTW = 'dtw'
+    __METRICS = (__EUCLIDEAN, __DTW)
+
+    @classmethod
+    def get_metrics(cls) -> tuple:
+        return cls.__METRICS
+
+    @classmethod
+    def get_sequences(cls, gestures: Gestures, finger_name_list: list = None, hand_side: str = Gesture.both_hand(),
+                      length: int = 64, window: float = 0.1) -> tuple:
+        """ Converting every hand side of the gestures into sequences of feature vectors
+        Parameters:
+            gestures(Gestures) : gestures to compare,
+            finger_name_list(list), hand_side(str), length(int), window(float) : the same as 'GestureRecognizer'
+
+        Returns:
+            tuple : (sequences, labels, band) where sequences is an array of shape (sequences, length, features),
+                    labels is a list of (gesture name, hand side) of each sequence and band is the width of
+                    the Sakoe-Chiba band in frames
+        """
+        recognizer = GestureRecognizer(gestures, finger_name_list, hand_side, length, window)
+        labels = recognizer.get_labels()
+        sequences = [recognizer.get_features(gestures.get_list_of_gesture()[gesture_name].get_hand_frames(each_side))
+                     for (gesture_name, each_side) in labels]
+        if len(sequences) == 0:
+            return np.empty((0, length, 0)), labels, recognizer.band
+        return np.stack(sequences), labels, recognizer.band
+
+    @classmethod
+    def get_tiles(cls, count: int, tile_size: int) -> list:
+        """ Getting (row start, row end, column start, column end) of every tile on and above the diagonal """
+        starts = range(0, count, tile_size)
+        return [(row, min(row + tile_size, count), column, min(column + tile_size, count))
+                for row in starts for column in starts if column >= row]
+
+    @classmethod
+    def compute_tile(cls, sequences: np.ndarray, tile: tuple, metric: str, band: int) -> np.ndarray:
+        """ Computing distances of a tile
+        Returns:
+            np.ndarray : an array of shape (row end - row start, column end - column start), only distances above
+                         the diagonal of the matrix are computed and the others are zero
+        """
+        row_start, row_end, column_start, column_end = tile
+        distances = np.zeros((row_end - row_start, column_end - column_start))
+        if metric == cls.__EUCLIDEAN:
+            rows = sequences[row_start:row_end].reshape(row_end - row_start, -1)
+            columns = sequences[column_start:column_end].reshape(column_end - column_start, -1)
+            squared = np.sum(rows ** 2, axis=1)[:, np.newaxis] + np.sum(columns ** 2, axis=1)[np.newaxis, :] \
+                - 2 * rows @ columns.T
+            distances = np.sqrt(np.maximum(squared, 0))
+        else:
+            # every pair above the diagonal is computed at once, along the anti-diagonals of their DTW matrices
+            rows, columns = np.nonzero(np.arange(column_start, column_end)[np.newaxis, :]
+                                       > np.arange(row_start, row_end)[:, np.newaxis])
+            if len(rows) != 0:
+                distances[rows, columns] = np.sqrt(_banded_dtw(sequences[row_start + rows],
+                                                               sequences[column_start + columns], band))
+        # the diagonal and the cells below it belong to the mirrored tile or are zero
+        row_indexes = np.arange(row_start, row_end)[:, np.newaxis]
+        column_indexes = np.arange(column_start, column_end)[np.newaxis, :]
+        distances[column_indexes <= row_indexes] = 0
+        return distances
+
+    @classmethod
+    def compute_matrix(cls, gestures: Gestures, metric: str = 'euclidean', finger_name_list: list = None,
+                       hand_side: str = Gesture.both_hand(), length: int = 64, window: float = 0.1,
+                       workers: int = 1, tile_size: int = 32, condensed: bool = False, progress=None) -> tuple:
+        """ Computing distances between every pair of hand sides of gestures
+        Parameters:
+            gestures(Gestures) : gestures to compare,
+            metric(str) : one of 'get_metrics()',
+            finger_name_list(list), hand_side(str), length(int), window(float) : see 'get_sequences',
+            workers(int) : the number of processes, 1 computes every tile in this process
+                           and 0 or less uses every CPU,
+            tile_size(int) : the number of rows and columns of each tile,
+            condensed(bool) : True to return distances above the diagonal only, row by row,
+            progress(function) : a function called with (computed tiles, all tiles) whenever a tile is computed
+
+        Returns:
+            tuple : (matrix, labels) where matrix is a symmetric array of shape (sequences, sequences), or of shape
+                    (sequences * (sequences - 1) / 2,) if 'condensed' is True, and labels is a list of
+                    (gesture name, hand side) of each sequence
+        """
+        if metric not in cls.__METRICS:
+            raise ValueError(f'{metric} is not one of {cls.__METRICS}')
+        if tile_size < 1:
+            raise ValueError('tile_size should be at least one')
+        sequences, labels, band = cls.get_sequences(gestures, finger_name_list, hand_side, length, window)
+        count = len(sequences)
+        tiles = cls.get_tiles(count, tile_size)
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+
+        if workers == 1 or len(tiles) <= 1:
+            matrix = np.zeros((count, count))
+            for (done, tile) in enumerate(tiles, 1):
+                matrix[tile[0]:tile[1], tile[2]:tile[3]] = cls.compute_tile(sequences, tile, metric, band)
+                if progress is not None:
+                    progress(done, len(tiles))
+        else:
+            matrix = cls.__compute_in_processes(sequences, tiles, metric, band, workers, progress)
+
+        # only the cells above the diagonal were computed
+        matrix += matrix.T
+        if condensed:
+            return matrix[np.triu_indices(count, k=1)], labels
+        return matrix, labels
+
+    @classmethod
+    def __compute_in_processes(cls, sequences: np.ndarray, tiles: list, metric: str, band: int, workers: int,
+                               progress) -> np.ndarray:
+        """ Computing tiles in a process pool, with the sequences and the matrix in shared memory """
+        count = len(sequences)
+        sequence_memory = shared_memory.SharedMemory(create=True, size=max(sequences.nbytes, 1))
+        matrix_memory = shared_memory.SharedMemory(create=True, size=max(count * count * 8, 1))
+        try:
+            np.ndarray(sequences.shape, dtype=np.float64, buffer=sequence_memory.buf)[:] = sequences
+            shared_matrix = np.ndarray((count, count), dtype=np.float64, buffer=matrix_memory.buf)
+            shared_matrix[:] = 0
+            with ProcessPoolExecutor(max_workers=min(workers, len(tiles)), initializer=_attach_shared_arrays,
+                                     initargs=(sequence_memory.name, sequences.shape, matrix_memory.name, count,
+                                               metric, band)) as executor:
+                futures = [executor.submit(_compute_shared_tile, tile) for tile in tiles]
+                for (done, future) in enumerate(as_completed(futures), 1):
+                    future.result()  # an error of a worker is raised here
+                    if progress is not None:
+                        progress(done, len(tiles))
+            matrix = shared_matrix.copy()
+            del shared_matrix
+            return matrix
+        finally:
+            sequence_memory.close()
+            sequence_memory.unlink()
+            matrix_memory.close()
+            matrix_memory.unlink()
+
+
+# shared memory and arrays a worker process attached to, set by '_attach_shared_arrays'
+_shared_state = dict()
+
+
+def _attach_shared_arrays(sequence_name: str, sequence_shape: tuple, matrix_name: str, count: int, metric: str,
+                          band: int):
+    """ Attaching a worker process to the shared sequences and matrix once, when the process starts """
+    sequence_memory = shared_memory.SharedMemory(name=sequence_name)
+    matrix_memory = shared_memory.SharedMemory(name=matrix_name)
+    _shared_state.update({'memories': (sequence_memory, matrix_memory),
+                          'sequences': np.ndarray(sequence_shape, dtype=np.float64, buffer=sequence_memory.buf),
+                          'matrix': np.ndarray((count, count), dtype=np.float64, buffer=matrix_memory.buf),
+                          'metric': metric, 'band': band})
+
+
+def _compute_shared_tile(tile: tuple):
+    """ Computing a tile in a worker process and writing it into the shared matrix, tiles never overlap """
+    _shared_state['matrix'][tile[0]:tile[1], tile[2]:tile[3]] = GestureSimilarity.compute_tile(
+        _shared_state['sequences'], tile, _shared_state['metric'], _shared_state['band'])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compute distances between every pair of gestures')
+    parser.add_argument('--data-dir', default=None, help='directory of data files, the data directory by default')
+    parser.add_argument('--metric', default='euclidean', choices=list(GestureSimilarity.get_metrics()))
+    parser.add_argument('--length', type=int, default=64, help='number of frames each sequence is resampled to')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes, 0 uses every CPU')
+    parser.add_argument('--tile-size', type=int, default=32)
+    parser.add_argument('--condensed', action='store_true', help='save distances above the diagonal only')
+    parser.add_argument('--output', help='.npy file to save the matrix in, it is printed otherwise')
+    arguments = parser.parse_args()
+
+    import main
+
+    gesture_list = main.read_data_files(data_dir=arguments.data_dir)
+    distance_matrix, sequence_labels = GestureSimilarity.compute_matrix(
+        gesture_list, arguments.metric, length=arguments.length, workers=arguments.workers,
+        tile_size=arguments.tile_size, condensed=arguments.condensed,
+        progress=lambda done, total: print(f'\r{done}/{total} tiles', end='', file=sys.stderr, flush=True))
+    print(file=sys.stderr)
+    if arguments.output is not None:
+        np.save(arguments.output, distance_matrix)
+    else:
+        np.set_printoptions(precision=3, suppress=True, linewidth=200)
+        print([f'{gesture_name} {each_side}' for (gesture_name, each_side) in sequence_labels])
+        print(distance_matrix)
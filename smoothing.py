@@ -0,0 +1,299 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from models.gesture import Gesture
+from models.hand_frames import HandFrames
+
+
+class BatchSmoother:
+    """ This is a class for smoothing whole recordings to remove tracking jitter.
+
+    Filters run along the first axis of an array of shape (frames, ...), e.g joints of shape (frames, joints, 3),
+    so every joint coordinate of a hand side is filtered in one pass. Both filters keep the timing of the movement,
+    i.e they do not delay it
+        'savitzky_golay' : fits a polynomial to a window around each frame by least squares, which keeps peaks of
+                           fast movements better than averaging. Frames near both ends are taken from the polynomial
+                           fitted to the first and the last window,
+        'butterworth'    : a low-pass Butterworth filter run forwards and backwards (zero phase), applied as its
+                           squared magnitude response in the frequency domain. The recording is extended by its
+                           point reflection at both ends without end, so that the ends do not wrap around and
+                           a straight movement is kept as it is
+
+    Missing joints (NaN) are linearly interpolated from the frames around them while filtering and stay missing
+    in the result.
+    In the program, all methods are class methods, and therefore this class will NOT be instantiated.
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # each of them represents a filter
+    __SAVITZKY_GOLAY = 'savitzky_golay'
+    __BUTTERWORTH = 'butterworth'
+    __METHODS = (__SAVITZKY_GOLAY, __BUTTERWORTH)
+
+    @classmethod
+    def get_methods(cls) -> tuple:
+        return cls.__METHODS
+
+    @classmethod
+    def __fill_missing(cls, values: np.ndarray) -> tuple:
+        """ Interpolating missing values of each series along the first axis
+        Returns:
+            tuple : (filled values, mask of missing values), a series without any value is filled with zeros
+        """
+        missing = np.isnan(values)
+        if not missing.any():
+            return values, missing
+        filled = values.reshape(len(values), -1).copy()
+        flat_missing = missing.reshape(len(values), -1)
+        frame_indexes = np.arange(len(values))
+        # only series with a missing value are visited, most of them are complete
+        for column in np.flatnonzero(flat_missing.any(axis=0)):
+            present = ~flat_missing[:, column]
+            filled[:, column] = np.interp(frame_indexes, frame_indexes[present], filled[present, column]) \
+                if present.any() else 0.0
+        return filled.reshape(values.shape), missing
+
+    @classmethod
+    def get_savitzky_golay_coefficients(cls, window_length: int, polyorder: int) -> np.ndarray:
+        """ Getting a matrix of shape (window_length, window_length) whose row i gives the value of the polynomial
+        fitted to a window at its i-th frame as a weighted sum of the frames of the window """
+        offsets = np.arange(window_length) - window_length // 2
+        vandermonde = np.vander(offsets, polyorder + 1, increasing=True)
+        return vandermonde @ np.linalg.pinv(vandermonde)
+
+    @classmethod
+    def savitzky_golay(cls, values: np.ndarray, window_length: int = 9, polyorder: int = 2) -> np.ndarray:
+        """ Smoothing an array along its first axis with a Savitzky-Golay filter
+        Parameters:
+            values(np.ndarray) : an array of shape (frames, ...),
+            window_length(int) : an odd number of frames of each window, it is reduced to the number of frames
+                                 of a shorter recording,
+            polyorder(int) : the order of the fitted polynomials, smaller than 'window_length'
+
+        Returns:
+            np.ndarray : a smoothed array of the same shape in float64
+        """
+        if window_length < 1 or window_length % 2 == 0:
+            raise ValueError('window_length should be a positive odd number')
+        if not 0 <= polyorder < window_length:
+            raise ValueError('polyorder should be between zero and window_length - 1')
+        values, missing = cls.__fill_missing(np.asarray(values, dtype=np.float64))
+        frame_count = len(values)
+        if frame_count < window_length:
+            window_length = frame_count if frame_count % 2 == 1 else frame_count - 1
+            polyorder = min(polyorder, window_length - 1)
+        if window_length <= 1:
+            return np.where(missing, np.nan, values)
+
+        coefficients = cls.get_savitzky_golay_coefficients(window_length, polyorder)
+        half = window_length // 2
+        smoothed = np.empty_like(values)
+        # every window in the middle is weighted at once, windows are views without copying
+        smoothed[half:frame_count - half] = sliding_window_view(values, window_length, axis=0) @ coefficients[half]
+        smoothed[:half] = np.tensordot(coefficients[:half], values[:window_length], axes=1)
+        smoothed[frame_count - half:] = np.tensordot(coefficients[half + 1:], values[-window_length:], axes=1)
+        smoothed[missing] = np.nan
+        return smoothed
+
+    @classmethod
+    def butterworth(cls, values: np.ndarray, cutoff: float = 0.1, frame_rate: float = 1.0,
+                    order: int = 2) -> np.ndarray:
+        """ Smoothing an array along its first axis with a zero phase low-pass Butterworth filter
+        Parameters:
+            values(np.ndarray) : an array of shape (frames, ...),
+            cutoff(float) : the cutoff frequency, in cycles per frame with the default frame rate,
+            frame_rate(float) : frames per second, with which 'cutoff' is in Hz,
+            order(int) : the order of the filter, the filter run forwards and backwards has twice the order
+
+        Returns:
+            np.ndarray : a smoothed array of the same shape in float64
+        """
+        if not 0 < cutoff < frame_rate / 2:
+            raise ValueError('cutoff should be between zero and half of frame_rate')
+        if order < 1:
+            raise ValueError('order should be at least one')
+        values, missing = cls.__fill_missing(np.asarray(values, dtype=np.float64))
+        frame_count = len(values)
+        if frame_count < 2:
+            return np.where(missing, np.nan, values)
+
+        # the straight line between the first and the last frame is taken out, and added back after filtering,
+        # so that the rest starts and ends at zero. Its point reflection at both ends repeated without end is then
+        # a periodic series of 2 * (frames - 1) frames, the recording followed by its negated reverse, which the
+        # transform filters without any wrap around. A straight line is kept as it is by the filter
+        shape = (-1,) + (1,) * (values.ndim - 1)
+        line = values[:1] + (values[-1:] - values[:1]) * (np.arange(frame_count) / (frame_count - 1)).reshape(shape)
+        rest = values - line
+        period = np.concatenate([rest, -rest[-2:0:-1]])
+        frequencies = np.fft.rfftfreq(len(period), d=1 / frame_rate)
+        # squared magnitude of the digital filter designed by the bilinear transform
+        ratio = np.tan(np.pi * frequencies / frame_rate) / np.tan(np.pi * cutoff / frame_rate)
+        gain = 1 / (1 + ratio ** (2 * order))
+        spectrum = np.fft.rfft(period, axis=0) * gain.reshape(shape)
+        smoothed = np.fft.irfft(spectrum, n=len(period), axis=0)[:frame_count] + line
+        smoothed[missing] = np.nan
+        return smoothed
+
+    @classmethod
+    def smooth(cls, values: np.ndarray, method: str = 'savitzky_golay', **parameters) -> np.ndarray:
+        """ Smoothing an array along its first axis with one of 'get_methods()', taking the parameters
+        of the method """
+        if method == cls.__SAVITZKY_GOLAY:
+            return cls.savitzky_golay(values, **parameters)
+        elif method == cls.__BUTTERWORTH:
+            return cls.butterworth(values, **parameters)
+        raise ValueError(f'{method} is not one of {cls.__METHODS}')
+
+    @classmethod
+    def smooth_hand_frames(cls, hand_frames: HandFrames, method: str = 'savitzky_golay',
+                           smooth_root_pos: bool = True, **parameters) -> HandFrames:
+        """ Smoothing joints, and 'RootPos' unless 'smooth_root_pos' is False, of a hand side, see 'smooth'
+        Returns:
+            HandFrames : smoothed frames in the dtype of the given frames with the same frame numbers
+        """
+        dtype = hand_frames.get_joints().dtype
+        root_pos = hand_frames.get_root_pos()
+        if smooth_root_pos and len(root_pos) != 0:
+            root_pos = cls.smooth(root_pos, method, **parameters).astype(dtype, copy=False)
+        joints = hand_frames.get_joints()
+        if len(joints) != 0:
+            joints = cls.smooth(joints, method, **parameters).astype(dtype, copy=False)
+        return HandFrames(hand_frames.hand_type, root_pos, joints, hand_frames.get_frame_numbers().copy())
+
+    @classmethod
+    def smooth_gesture(cls, gesture: Gesture, method: str = 'savitzky_golay', smooth_root_pos: bool = True,
+                       **parameters) -> Gesture:
+        """ Smoothing every hand side of a gesture, see 'smooth_hand_frames'
+        Returns:
+            Gesture : a new gesture in compact storage
+        """
+        smoothed_gesture = Gesture(gesture.gesture_name)
+        for hand_side in (Gesture.right_hand(), Gesture.left_hand()):
+            hand_frames = gesture.get_hand_frames(hand_side)
+            if len(hand_frames) > 0:
+                smoothed_gesture.set_hand_frames(cls.smooth_hand_frames(hand_frames, method, smooth_root_pos,
+                                                                        **parameters))
+        return smoothed_gesture
+
+
+class ExponentialFilter:
+    """ This is a class for smoothing frames one by one as they arrive with an exponential moving average.
+
+    Each call takes a whole frame, e.g joints of shape (joints, 3), and the filter keeps the previous output of
+    every joint coordinate, so each frame costs the same whatever has been filtered before. A missing value (NaN)
+    leaves the state of its coordinate unchanged and stays missing in the output.
+
+    at the time of instantiation, it takes the weight of a new frame (0 < alpha <= 1, one does not smooth)
+    for its constructor
+    """
+
+    def __init__(self, alpha: float = 0.5):
+        if not 0 < alpha <= 1:
+            raise ValueError('alpha should be greater than zero and at most one')
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        """ Forgetting the state to filter another recording """
+        self.__previous = None
+
+    def filter_frame(self, values: np.ndarray) -> np.ndarray:
+        """ Filtering the next frame
+        Parameters:
+            values(np.ndarray) : values of a frame of any shape, the same for every frame
+
+        Returns:
+            np.ndarray : filtered values of the same shape in float64
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if self.__previous is None:
+            self.__previous = np.where(np.isnan(values), np.nan, values)
+            return self.__previous.copy()
+        # a coordinate without a previous value starts from its first value
+        previous = np.where(np.isnan(self.__previous), values, self.__previous)
+        filtered = previous + self.alpha * (values - previous)
+        self.__previous = np.where(np.isnan(values), self.__previous, filtered)
+        return filtered
+
+    def filter(self, values: np.ndarray) -> np.ndarray:
+        """ Filtering frames of an array of shape (frames, ...) one by one, continuing from the state """
+        return np.array([self.filter_frame(frame_values) for frame_values in values]).reshape(np.shape(values))
+
+
+class OneEuroFilter:
+    """ This is a class for smoothing frames one by one as they arrive with the One Euro filter.
+
+    The One Euro filter is an exponential moving average whose cutoff frequency rises with the speed of movement:
+    a joint holding still is smoothed strongly to remove jitter, and a fast moving joint is smoothed little to keep
+    lag low. The speed of a joint is the length of its filtered velocity vector, so x, y and z of a joint are
+    smoothed alike. Each call takes a whole frame, e.g joints of shape (joints, 3), and the filter keeps the previous
+    output and velocity of every joint, so each frame costs the same whatever has been filtered before.
+    A missing joint (NaN) leaves its state unchanged and stays missing in the output.
+
+    at the time of instantiation, it takes the minimum cutoff frequency, the increase of the cutoff per unit of speed
+    (beta), the cutoff frequency of the velocity and a frame rate for its constructor.
+    Frequencies are in cycles per frame with the default frame rate of one
+    """
+
+    def __init__(self, min_cutoff: float = 0.05, beta: float = 20.0, derivative_cutoff: float = 0.1,
+                 frame_rate: float = 1.0):
+        if min_cutoff <= 0 or derivative_cutoff <= 0 or beta < 0 or frame_rate <= 0:
+            raise ValueError('cutoffs and frame_rate should be positive and beta should not be negative')
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.derivative_cutoff = derivative_cutoff
+        self.frame_rate = frame_rate
+        self.reset()
+
+    def reset(self):
+        """ Forgetting the state to filter another recording """
+        self.__previous = None
+        self.__previous_velocity = None
+        self.__previous_timestamp = None
+
+    @staticmethod
+    def __get_alpha(cutoff, period: float):
+        """ Getting the weight of a new value of an exponential moving average with a cutoff frequency """
+        time_constant = 1 / (2 * np.pi * cutoff)
+        return 1 / (1 + time_constant / period)
+
+    def filter_frame(self, values: np.ndarray, timestamp: float = None) -> np.ndarray:
+        """ Filtering the next frame
+        Parameters:
+            values(np.ndarray) : values of a frame of shape (..., 3) e.g joints of shape (joints, 3),
+                                 the same for every frame,
+            timestamp(float) : time of the frame in seconds, frames are '1 / frame_rate' apart if it is None
+
+        Returns:
+            np.ndarray : filtered values of the same shape in float64
+        """
+        values = np.asarray(values, dtype=np.float64)
+        period = 1 / self.frame_rate
+        if timestamp is not None:
+            if self.__previous_timestamp is not None and timestamp > self.__previous_timestamp:
+                period = timestamp - self.__previous_timestamp
+            self.__previous_timestamp = timestamp
+        if self.__previous is None:
+            self.__previous = values.copy()
+            self.__previous_velocity = np.zeros_like(values)
+            return values.copy()
+
+        missing = np.isnan(values).any(axis=-1, keepdims=True)
+        # a joint without a previous value starts from its first value
+        previous = np.where(np.isnan(self.__previous), values, self.__previous)
+        velocity = (values - previous) / period
+        velocity_alpha = self.__get_alpha(self.derivative_cutoff, period)
+        velocity = self.__previous_velocity + velocity_alpha * (velocity - self.__previous_velocity)
+        cutoff = self.min_cutoff + self.beta * np.linalg.norm(velocity, axis=-1, keepdims=True)
+        filtered = previous + self.__get_alpha(cutoff, period) * (values - previous)
+
+        self.__previous = np.where(missing, self.__previous, filtered)
+        self.__previous_velocity = np.where(missing, self.__previous_velocity, velocity)
+        return np.where(missing, np.nan, filtered)
+
+    def filter(self, values: np.ndarray, timestamps: np.ndarray = None) -> np.ndarray:
+        """ Filtering frames of an array of shape (frames, ..., 3) one by one, continuing from the state """
+        if timestamps is None:
+            timestamps = [None] * len(values)
+        return np.array([self.filter_frame(frame_values, timestamp)
+                         for (frame_values, timestamp) in zip(values, timestamps)]).reshape(np.shape(values))
@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+import main
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+@pytest.fixture(scope='session')
+def data_files() -> list:
+    """ Paths of every data file of the repository """
+    return sorted(os.path.join(DATA_DIR, file_name) for file_name in os.listdir(DATA_DIR)
+                  if file_name.endswith('.txt'))
+
+
+@pytest.fixture(scope='session')
+def gestures():
+    """ Every gesture of the repository in compact storage, it should not be changed by tests """
+    return main.read_data_files(use_cache=False)
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from augmentation import GestureAugmenter
+from models.frame import Frame
+from models.gesture import Gesture
+from models.gestures import Gestures
+
+
+def create_arrays(frame_count: int = 40) -> tuple:
+    """ Random arrays of a hand side, with a joint missing in two frames and a joint missing in every frame """
+    rng = np.random.default_rng(frame_count)
+    root_pos = rng.normal(size=(frame_count, 3)).cumsum(axis=0)
+    joints = rng.normal(size=(frame_count, len(Frame.get_joint_names()), 3))
+    joints[[5, 6], 3] = np.nan
+    joints[:, 8] = np.nan
+    return root_pos, joints
+
+
+def test_the_same_seed_generates_the_same_samples(gestures):
+    hand_frames = gestures.get_list_of_gesture()['Gesture 3'].get_hand_frames('L')
+    samples = [GestureAugmenter(mirror_probability=0.5, seed=7).augment_hand_frames(hand_frames, 5, 32)
+               for _ in range(2)]
+    for (first, second) in zip(*samples):
+        np.testing.assert_array_equal(first, second)
+    other_seed = GestureAugmenter(mirror_probability=0.5, seed=8).augment_hand_frames(hand_frames, 5, 32)
+    assert not np.array_equal(samples[0][1], other_seed[1])
+
+
+def test_the_same_seed_generates_the_same_batches(gestures):
+    batches = [list(GestureAugmenter(seed=3).iter_batches(gestures, batch_size=6, length=16, batch_count=3))
+               for _ in range(2)]
+    for (first, second) in zip(*batches):
+        for (first_array, second_array) in zip(first, second):
+            np.testing.assert_array_equal(first_array, second_array)
+    # a generator goes on drawing, so its batches differ from each other
+    assert not np.array_equal(batches[0][0][1], batches[0][1][1])
+
+
+def test_mirroring_keeps_shapes_and_missing_joints():
+    root_pos, joints = create_arrays()
+    mirrored_root_pos, mirrored_joints = GestureAugmenter.mirror_arrays(root_pos, joints)
+    assert (mirrored_root_pos.shape, mirrored_joints.shape) == (root_pos.shape, joints.shape)
+    np.testing.assert_array_equal(np.isnan(mirrored_joints), np.isnan(joints))
+    np.testing.assert_array_equal(mirrored_root_pos[:, 1:], root_pos[:, 1:])
+    np.testing.assert_array_equal(mirrored_root_pos[:, 0], -root_pos[:, 0])
+    # mirroring twice gives the hand side back
+    np.testing.assert_array_equal(GestureAugmenter.mirror_arrays(mirrored_root_pos, mirrored_joints)[1], joints)
+
+
+def test_mirrored_hand_frames_are_of_the_other_hand_side(gestures):
+    hand_frames = gestures.get_list_of_gesture()['Gesture 9'].get_hand_frames('L')
+    mirrored = GestureAugmenter.mirror_hand_frames(hand_frames)
+    assert mirrored.hand_type == 'R' and len(mirrored) == len(hand_frames) == 66
+    assert mirrored.get_joints().shape == hand_frames.get_joints().shape
+    np.testing.assert_array_equal(mirrored.get_frame_numbers(), hand_frames.get_frame_numbers())
+    np.testing.assert_array_equal(mirrored.get_joints(), -hand_frames.get_joints())
+
+
+def test_augmenting_without_changes_only_mirrors_and_keeps_missing_joints():
+    root_pos, joints = create_arrays()
+    augmenter = GestureAugmenter(rotation_degrees=0, scale_range=(1, 1), time_warp=0, jitter=0, seed=0)
+    sample_root_pos, sample_joints, hand_sides = augmenter.augment(root_pos, joints, 3, 'L', target_hand_side='R')
+    assert sample_root_pos.shape == (3,) + root_pos.shape and sample_joints.shape == (3,) + joints.shape
+    assert list(hand_sides) == ['R', 'R', 'R']
+    mirrored_root_pos, mirrored_joints = GestureAugmenter.mirror_arrays(root_pos, joints)
+    for sample_index in range(3):
+        np.testing.assert_array_equal(np.isnan(sample_joints[sample_index]), np.isnan(joints))
+        np.testing.assert_allclose(sample_joints[sample_index], mirrored_joints, atol=1e-12)
+        np.testing.assert_allclose(sample_root_pos[sample_index], mirrored_root_pos, atol=1e-12)
+
+
+def test_random_mirroring_labels_each_sample_with_its_hand_side():
+    root_pos, joints = create_arrays()
+    augmenter = GestureAugmenter(jitter=0.01, mirror_probability=0.5, seed=11)
+    _, sample_joints, hand_sides = augmenter.augment(root_pos, joints, 40, 'R', length=25)
+    assert sample_joints.shape == (40, 25) + joints.shape[1:]
+    assert set(hand_sides) == {'R', 'L'}
+    # a joint missing in every frame stays missing whatever the changes, and the others are never missing
+    assert np.isnan(sample_joints[:, :, 8]).all()
+    assert not np.isnan(np.delete(sample_joints, [3, 8], axis=2)).any()
+
+
+def test_augmented_gestures_and_batches_have_the_requested_shapes(gestures):
+    augmenter = GestureAugmenter(seed=1)
+    sample_dict = augmenter.augment_gesture(gestures.get_list_of_gesture()['Gesture 3'], 2, 20)
+    assert sorted(sample_dict.keys()) == ['L', 'R']
+    assert sample_dict['R'][1].shape == (2, 20, len(Frame.get_joint_names()), 3)
+    root_pos, joints, gesture_names, hand_sides = next(augmenter.iter_batches(gestures, batch_size=8, length=12,
+                                                                              target_hand_side='R'))
+    assert (root_pos.shape, joints.shape) == ((8, 12, 3), (8, 12, len(Frame.get_joint_names()), 3))
+    assert set(gesture_names) <= set(gestures.get_list_of_gesture().keys()) and set(hand_sides) == {'R'}
+    with pytest.raises(ValueError):
+        next(augmenter.iter_batches(Gestures()))
+    assert augmenter.augment_gesture(Gesture('Gesture 1'), 2) == {}
+    with pytest.raises(ValueError):
+        GestureAugmenter(mirror_probability=2)
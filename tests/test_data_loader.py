@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from augmentation import GestureAugmenter
+from data_loader import GestureLoader
+from models.frame import Frame
+
+
+class FailingAugmenter:
+    """ An augmenter returning samples unchanged, which raises an error at the given call """
+
+    def __init__(self, failing_call: int):
+        self.failing_call = failing_call
+        self.call_count = 0
+
+    def augment(self, root_pos: np.ndarray, joints: np.ndarray, count: int, hand_side: str) -> tuple:
+        self.call_count += 1
+        if self.call_count == self.failing_call:
+            raise RuntimeError('augmentation failed')
+        return root_pos[np.newaxis], joints[np.newaxis], np.array([hand_side])
+
+
+def get_samples(batches: list) -> list:
+    return [(str(gesture_name), str(hand_side)) for batch in batches
+            for (gesture_name, hand_side) in zip(batch['gesture_names'], batch['hand_sides'])]
+
+
+def test_the_order_of_an_epoch_depends_on_the_seed_and_the_epoch(gestures):
+    loader = GestureLoader(gestures, batch_size=4, seed=5)
+    assert loader.get_sample_count() == 11 and len(loader) == 3
+    same_seed = GestureLoader(gestures, batch_size=4, seed=5)
+    for epoch in range(3):
+        assert [list(indexes) for indexes in loader.get_batch_indexes(epoch)] == \
+               [list(indexes) for indexes in same_seed.get_batch_indexes(epoch)]
+    assert [list(indexes) for indexes in loader.get_batch_indexes(0)] != \
+           [list(indexes) for indexes in loader.get_batch_indexes(1)]
+
+    # epochs follow each other, and an epoch given again is iterated in the same order
+    first, second = get_samples(loader.iter_epoch()), get_samples(loader.iter_epoch())
+    assert first != second and sorted(first) == sorted(second)
+    assert len(set(first)) == 11
+    assert get_samples(loader.iter_epoch(1)) == second
+    assert get_samples(same_seed) == first
+
+
+def test_masks_and_lengths_follow_the_real_frames_of_each_sample(gestures):
+    loader = GestureLoader(gestures, batch_size=4, shuffle=False, dtype=np.float64)
+    for batch in loader:
+        assert batch['mask'].shape == batch['joints'].shape[:2] == batch['root_pos'].shape[:2]
+        np.testing.assert_array_equal(batch['mask'].sum(axis=1), batch['lengths'])
+        assert batch['mask'].shape[1] == batch['lengths'].max()
+        for (row, (gesture_name, hand_side)) in enumerate(zip(batch['gesture_names'], batch['hand_sides'])):
+            hand_frames = gestures.get_list_of_gesture()[gesture_name].get_hand_frames(hand_side)
+            length = batch['lengths'][row]
+            assert length == len(hand_frames)
+            assert batch['mask'][row, :length].all() and not batch['mask'][row, length:].any()
+            np.testing.assert_array_equal(batch['joints'][row, :length], hand_frames.get_joints())
+            np.testing.assert_array_equal(batch['root_pos'][row, :length], hand_frames.get_root_pos())
+            assert not batch['joints'][row, length:].any()
+            assert loader.get_label_names()[batch['labels'][row]] == gesture_name
+
+
+def test_bucketing_puts_samples_of_similar_lengths_together(gestures):
+    bucket = GestureLoader(gestures, batch_size=3, mode='bucket', seed=2)
+    batches = list(bucket)
+    assert sorted(get_samples(batches)) == sorted(get_samples(GestureLoader(gestures, batch_size=3, seed=2)))
+    # the lengths of every batch are a run of the sorted lengths of every sample
+    runs = sorted((sorted(batch['lengths']) for batch in batches), key=lambda lengths: lengths[0])
+    for (previous, following) in zip(runs, runs[1:]):
+        assert previous[-1] <= following[0]
+    padded = GestureLoader(gestures, batch_size=3, shuffle=False)
+    list(padded)
+    assert bucket.get_statistics()['padding_ratio'] < padded.get_statistics()['padding_ratio']
+    # batches come in a random order
+    assert [list(batch) for batch in bucket.get_batch_indexes(0)] != \
+           [list(batch) for batch in GestureLoader(gestures, batch_size=3, mode='bucket', shuffle=False)
+            .get_batch_indexes(0)]
+
+
+def test_an_error_in_the_background_thread_is_raised_in_the_consumer(gestures):
+    loader = GestureLoader(gestures, batch_size=2, shuffle=False, augmenter=FailingAugmenter(3))
+    batches = loader.iter_epoch()
+    assert len(next(batches)['lengths']) == 2
+    with pytest.raises(RuntimeError, match='augmentation failed'):
+        next(batches)
+    assert loader.get_statistics()['epochs'] == 0
+
+
+def test_a_consumer_stopping_early_does_not_block_the_background_thread(gestures):
+    loader = GestureLoader(gestures, batch_size=1, prefetch=1, seed=0)
+    for _ in loader:
+        break
+    statistics = loader.get_statistics()
+    assert (statistics['batches'], statistics['epochs']) == (1, 0)
+    assert len(list(loader)) == 11
+
+
+def test_hand_sides_fingers_frames_and_augmentation_are_selected(gestures):
+    finger_name_list = [Frame.get_thumb_finger(), Frame.get_index_finger()]
+    loader = GestureLoader(gestures, batch_size=8, finger_name_list=finger_name_list, hand_side='R',
+                           max_frames=100, augmenter=GestureAugmenter(mirror_probability=1.0, seed=0))
+    batch = next(iter(loader))
+    assert loader.get_sample_count() == 5
+    assert batch['joints'].shape[2] == len(loader.joint_names) < len(Frame.get_joint_names())
+    assert batch['joints'].dtype == np.float32 and batch['lengths'].max() == 100
+    assert set(batch['hand_sides']) == {'L'}
+    with pytest.raises(ValueError):
+        GestureLoader(gestures, mode='sorted')
+    with pytest.raises(ValueError):
+        GestureLoader(gestures, batch_size=0)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+import main
+from features import FeatureExtractor
+from models.frame import Frame
+
+
+def column(joint_name: str) -> int:
+    return Frame.get_joint_names().index(joint_name)
+
+
+def create_hand() -> np.ndarray:
+    """ A hand of one frame whose index finger is bent by a right angle at 'Index1' and straight after it, and whose
+    other fingers are straight along the y axis at x = 1, 2, 3 and 4 """
+    joints = np.zeros((1, len(Frame.get_joint_names()), 3))
+    for (offset, finger) in enumerate([Frame.get_thumb_finger(), Frame.get_middle_finger(), Frame.get_ring_finger(),
+                                       Frame.get_pinky_finger()]):
+        for (step, joint_column) in enumerate(Frame.get_finger_joint_columns(finger)):
+            joints[0, joint_column] = (offset + 1, step + 1, 0)
+    joints[0, [column('Index1'), column('Index2'), column('Index3'), column('IndexTip')]] = \
+        [(1, 0, 0), (1, 1, 0), (1, 2, 0), (1, 3, 0)]
+    return joints
+
+
+def test_angles_and_flexion_match_a_hand_computation():
+    extractor = FeatureExtractor(['angles', 'flexion'], [Frame.get_index_finger()])
+    assert extractor.get_feature_names() == ['Index1_angle', 'Index2_angle', 'Index3_angle', 'INDEX_flexion']
+    # at 'Index1' the chain turns from the wrist (-x) to 'Index2' (+y), the rest of the finger is straight
+    np.testing.assert_allclose(extractor.transform(create_hand()), [[np.pi / 2, np.pi, np.pi, np.pi / 2]])
+
+
+def test_tip_distances_match_a_hand_computation():
+    extractor = FeatureExtractor(['tip_distances'], [Frame.get_index_finger(), Frame.get_thumb_finger(),
+                                                     Frame.get_pinky_finger()])
+    assert extractor.get_feature_names() == ['ThumbTip_IndexTip_distance', 'ThumbTip_PinkyTip_distance',
+                                             'IndexTip_PinkyTip_distance']
+    # tips: thumb (1, 5, 0), index (1, 3, 0), pinky (4, 5, 0)
+    np.testing.assert_allclose(extractor.transform(create_hand()), [[2.0, 3.0, np.sqrt(13.0)]])
+
+
+def test_velocities_and_accelerations_of_a_known_movement():
+    frames = np.arange(6, dtype=np.float64)
+    joints = np.zeros((6, len(Frame.get_joint_names()), 3))
+    joints[:, column('Index1'), 0] = 2 * frames  # uniform movement
+    joints[:, column('Index2'), 1] = frames ** 2  # uniformly accelerated movement
+    extractor = FeatureExtractor(['velocities', 'accelerations'], [Frame.get_index_finger()], frame_rate=10.0)
+    features = extractor.transform(joints)
+    names = extractor.get_feature_names()
+    np.testing.assert_allclose(features[:, names.index('Index1_vx')], 20.0)
+    np.testing.assert_allclose(features[:, names.index('Index1_ax')], 0.0)
+    np.testing.assert_allclose(features[1:-1, names.index('Index2_vy')], 2 * frames[1:-1] * 10)
+    np.testing.assert_allclose(features[2:-2, names.index('Index2_ay')], 200.0)
+    assert np.all(features[:, names.index('Index3_vz')] == 0)
+
+
+def test_batches_give_the_features_of_each_sequence_and_columns_follow_the_names(gestures):
+    extractor = FeatureExtractor()
+    sequences = [gestures.get_list_of_gesture()[name].get_hand_frames('R').get_joints()[:50]
+                 for name in ['Gesture 1', 'Gesture 2']]
+    features = extractor.transform(np.stack(sequences))
+    assert features.shape == (2, 50, len(extractor.get_feature_names()))
+    for (batch_features, sequence) in zip(features, sequences):
+        np.testing.assert_allclose(batch_features, extractor.transform(sequence))
+    positions = FeatureExtractor(['positions'], [Frame.get_ring_finger()]).transform(sequences[0])
+    np.testing.assert_array_equal(positions[:, 3:6], sequences[0][:, column('Ring2')])
+
+
+def test_features_of_a_missing_joint_are_missing():
+    joints = create_hand()
+    joints[0, column('Index3')] = np.nan
+    extractor = FeatureExtractor(['angles', 'tip_distances'], [Frame.get_index_finger(), Frame.get_ring_finger()])
+    features = dict(zip(extractor.get_feature_names(), extractor.transform(joints)[0]))
+    assert np.isnan(features['Index2_angle']) and np.isnan(features['Index3_angle'])
+    assert features['Index1_angle'] == pytest.approx(np.pi / 2)
+    assert features['IndexTip_RingTip_distance'] == pytest.approx(np.hypot(2, 1))  # (1, 3, 0) and (3, 4, 0)
+
+
+def test_extracted_fingers_give_the_features_of_the_gesture(gestures):
+    finger_name_list = [Frame.get_middle_finger(), Frame.get_thumb_finger()]
+    extractor = FeatureExtractor(['positions', 'angles', 'velocities'], finger_name_list)
+    expected = extractor.transform_gesture(gestures.get_list_of_gesture()['Gesture 3'])
+    from_arrays = extractor.transform_extracted(main.extract_finger_array('Gesture 3', 'B', finger_name_list,
+                                                                          gestures))
+    from_frames = extractor.transform_extracted(main.extract_finger_frame('Gesture 3', 'B', finger_name_list,
+                                                                          gestures))
+    for hand_side in ['R', 'L']:
+        np.testing.assert_allclose(from_arrays[hand_side], expected[hand_side])
+        np.testing.assert_allclose(from_frames[hand_side], expected[hand_side])
+    with pytest.raises(ValueError):
+        FeatureExtractor(['speed'])
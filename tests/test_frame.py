@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import main
+from models.frame import Frame
+from models.hand_frames import HandFrames
+
+
+def create_hand_frames(frame_count: int = 3) -> HandFrames:
+    rng = np.random.default_rng(0)
+    return HandFrames('R', rng.random((frame_count, 3)), rng.random((frame_count, len(Frame.get_joint_names()), 3)))
+
+
+@pytest.mark.parametrize('finger_type', ['Thumb0', 'Index2', 'Middle3', 'RingTip', 'Pinky0'])
+def test_set_finger_data_writes_through_an_array_view(finger_type):
+    hand_frames = create_hand_frames()
+    frame = hand_frames[1]
+    main.set_finger_data(finger_type, (9.0, 8.0, 7.0), frame)
+
+    column = Frame.get_joint_names().index(finger_type)
+    np.testing.assert_array_equal(hand_frames.get_joints()[1, column], (9.0, 8.0, 7.0))
+    assert hand_frames[1].get_joint_array()[column].tolist() == [9.0, 8.0, 7.0]
+
+
+def test_set_finger_data_on_a_frame_with_dictionaries():
+    frame = Frame('L', 1, (0.0, 0.0, 0.0))
+    main.set_finger_data('Thumb1', (1.0, 2.0, 3.0), frame)
+    main.set_finger_data('Thumb2', (4.0, 5.0, 6.0), frame)
+    assert frame.get_thumb_data() == {'Thumb1': (1.0, 2.0, 3.0), 'Thumb2': (4.0, 5.0, 6.0)}
+
+
+def test_finger_data_of_an_array_view_is_read_only():
+    frame = create_hand_frames()[0]
+    with pytest.raises(TypeError):
+        frame.get_index_finger_data()['Index1'] = (0.0, 0.0, 0.0)
+    frame.set_index_finger_data({'Index1': (0.0, 0.0, 0.0)})
+    assert frame.get_index_finger_data()['Index1'] == (0.0, 0.0, 0.0)
+    # joints left out of the dictionary become missing
+    assert 'Index2' not in frame.get_index_finger_data()
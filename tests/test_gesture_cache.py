@@ -0,0 +1,32 @@
+import os
+import shutil
+
+import numpy as np
+
+from benchmarks.synthetic import SyntheticCorpus
+from gesture_cache import GestureCache
+from gesture_parser import format_gesture_text, parse_gesture_file
+
+
+def test_cached_arrays_equal_parsed_arrays(tmp_path, data_files):
+    file_name = shutil.copy(data_files[0], tmp_path)
+    cache = GestureCache(os.path.join(tmp_path, 'cache'))
+    root_pos, joints = parse_gesture_file(file_name)
+    for _ in range(2):  # parsed and saved, then memory-mapped from the entry
+        cached_root_pos, cached_joints = cache.load(file_name)
+        np.testing.assert_array_equal(cached_root_pos, root_pos)
+        np.testing.assert_array_equal(cached_joints, joints)
+    assert isinstance(cached_joints, np.memmap)
+    assert cache.load(file_name, np.float32)[1].dtype == np.float32
+
+
+def test_changed_file_is_parsed_again(tmp_path):
+    file_name = os.path.join(tmp_path, 'Right_Hand_Gesture_1.txt')
+    cache = GestureCache(os.path.join(tmp_path, 'cache'))
+    for (frame_count, seed) in ((10, 1), (12, 2)):
+        root_pos, joints = SyntheticCorpus.generate_arrays(frame_count, seed)
+        with open(file_name, 'w', newline='') as data_file:
+            data_file.write(format_gesture_text(root_pos, joints))
+        np.testing.assert_array_equal(cache.load(file_name)[1], parse_gesture_file(file_name)[1])
+    # the stale entry was replaced rather than kept next to the new one
+    assert len(os.listdir(cache.cache_dir)) == 2
@@ -0,0 +1,105 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import main
+from gesture_catalog import LazyGestures
+from models.frame import Frame
+from models.gesture import Gesture
+from models.hand_frames import HandFrames
+from tests.conftest import DATA_DIR
+
+
+class CountingReader:
+    """ A function reading data files which counts the files it read """
+
+    def __init__(self):
+        self.file_names = []
+
+    def __call__(self, file_name: str) -> Gesture:
+        self.file_names.append(os.path.basename(file_name))
+        return main.read_gesture(file_name)
+
+
+def create_catalog(data_files: list, max_loaded_gestures: int = 2) -> tuple:
+    reader = CountingReader()
+    return LazyGestures(data_files, reader, max_loaded_gestures), reader
+
+
+def test_indexing_reads_no_gesture_and_counts_frames(data_files, gestures):
+    catalog, reader = create_catalog(data_files)
+    assert reader.file_names == []
+    assert sorted(catalog.get_gesture_names()) == sorted(gestures.get_list_of_gesture().keys())
+    assert catalog.get_frame_counts('Gesture 3') == {'L': 166, 'R': 272}
+    assert 'Gesture 3' in catalog.get_list_of_gesture() and 'Gesture 99' not in catalog.get_list_of_gesture()
+    assert catalog.get_loaded_gesture_names() == []
+
+
+def test_the_least_recently_used_gesture_is_evicted(data_files):
+    catalog, reader = create_catalog(data_files)
+    for gesture_name in ['Gesture 1', 'Gesture 2', 'Gesture 1', 'Gesture 4']:
+        catalog.get_list_of_gesture()[gesture_name]
+    assert catalog.get_loaded_gesture_names() == ['Gesture 1', 'Gesture 4']
+    assert reader.file_names == ['Right_Hand_Gesture_1.txt', 'Right_Hand_Gesture_2.txt', 'Left_Hand_Gesture_4.txt']
+    # an evicted gesture is read again, as another Gesture object
+    version = catalog.get_version()
+    catalog.load_gesture('Gesture 2')
+    assert reader.file_names[-1] == 'Right_Hand_Gesture_2.txt'
+    assert catalog.get_version() > version
+    assert catalog.get_loaded_gesture_names() == ['Gesture 4', 'Gesture 2']
+
+
+def test_gestures_of_both_hand_sides_are_merged_like_read_data_files(data_files, gestures):
+    catalog, reader = create_catalog(data_files)
+    gesture = catalog.load_gesture('Gesture 3')
+    assert sorted(reader.file_names) == ['Left_Hand_Gesture_3.txt', 'Right_Hand_Gesture_3.txt']
+    for hand_side in ['R', 'L']:
+        np.testing.assert_array_equal(gesture.get_hand_frames(hand_side).get_joints(),
+                                      gestures.get_list_of_gesture()['Gesture 3'].get_hand_frames(hand_side)
+                                      .get_joints())
+
+
+def test_added_gestures_are_pinned_and_never_evicted(data_files):
+    catalog, reader = create_catalog(data_files, max_loaded_gestures=1)
+    new_gesture = Gesture('Gesture 42')
+    new_gesture.set_hand_frames(HandFrames('R', np.zeros((2, 3)), np.zeros((2, len(Frame.get_joint_names()), 3))))
+    catalog.add_gesture(new_gesture)
+    extra_hand = Gesture('Gesture 1')
+    extra_hand.set_hand_frames(HandFrames('L', np.ones((3, 3)), np.ones((3, len(Frame.get_joint_names()), 3))))
+    catalog.add_gesture(extra_hand)
+
+    for gesture_name in ['Gesture 2', 'Gesture 4', 'Gesture 5']:
+        catalog.load_gesture(gesture_name)
+    assert catalog.get_loaded_gesture_names() == ['Gesture 42', 'Gesture 1', 'Gesture 5']
+    assert catalog.get_gesture_names()[-1] == 'Gesture 42'
+    # the merged gesture keeps the frames read from its file and the added ones, and it is not read again
+    merged = catalog.load_gesture('Gesture 1')
+    assert (len(merged.get_hand_frames('R')), len(merged.get_hand_frames('L'))) == (359, 3)
+    assert reader.file_names.count('Right_Hand_Gesture_1.txt') == 1
+
+
+def test_get_gesture_keeps_the_order_of_the_catalog(data_files):
+    catalog, _ = create_catalog(data_files, max_loaded_gestures=16)
+    names = [gesture.gesture_name for gesture in catalog.get_gesture(('Gesture 4', 'Gesture 10', 'Gesture 99'))]
+    assert names == [name for name in catalog.get_gesture_names() if name in {'Gesture 4', 'Gesture 10'}]
+
+
+def test_a_gesture_without_readable_files_does_not_exist(tmp_path, capsys):
+    data_file = os.path.join(tmp_path, 'Right_Hand_Gesture_7.txt')
+    os.mkdir(data_file)
+    catalog, _ = create_catalog([data_file])
+    with pytest.raises(KeyError):
+        catalog.load_gesture('Gesture 7')
+    assert 'File not found or unreadable' in capsys.readouterr().err
+    with pytest.raises(ValueError):
+        LazyGestures([], main.read_gesture, max_loaded_gestures=0)
+
+
+def test_read_data_catalog_takes_a_data_directory(tmp_path):
+    file_name = 'Left_Hand_Gesture_9.txt'
+    shutil.copyfile(os.path.join(DATA_DIR, file_name), os.path.join(tmp_path, file_name))
+    catalog = main.read_data_catalog(use_cache=False, data_dir=str(tmp_path))
+    assert catalog.get_gesture_names() == ['Gesture 9']
+    assert len(catalog.get_list_of_gesture()['Gesture 9'].get_hand_frames('L')) == 66
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from gesture_codec import GestureCodec
+from gesture_parser import parse_gesture_file
+from tests.conftest import FIXTURE_DIR
+
+
+@pytest.mark.parametrize('compression', ['none', 'zlib', 'bz2', 'lzma'])
+def test_lossless_round_trip_is_exact(data_files, compression):
+    root_pos, joints = parse_gesture_file(data_files[0])
+    data = GestureCodec.encode(root_pos, joints, 'L', 'Gesture 10', compression=compression)
+    assert GestureCodec.decode(data)[:2] == ('Gesture 10', 'L')
+    decoded_root_pos, decoded_joints = GestureCodec.decode(data)[2:]
+    np.testing.assert_array_equal(decoded_root_pos, root_pos)
+    np.testing.assert_array_equal(decoded_joints, joints)
+    assert len(data) < root_pos.nbytes + joints.nbytes
+
+
+def test_lossless_round_trip_keeps_missing_joints():
+    root_pos, joints = parse_gesture_file(os.path.join(FIXTURE_DIR, 'Right_Hand_Gesture_1.txt'))
+    decoded_root_pos, decoded_joints = GestureCodec.decode(GestureCodec.encode(root_pos, joints))[2:]
+    np.testing.assert_array_equal(decoded_root_pos, root_pos)
+    np.testing.assert_array_equal(decoded_joints, joints)
+
+
+def test_lossless_round_trip_of_arrays_beyond_the_text_precision():
+    rng = np.random.default_rng(0)
+    root_pos, joints = rng.normal(size=(20, 3)), rng.normal(size=(20, 24, 3))
+    decoded_root_pos, decoded_joints = GestureCodec.decode(GestureCodec.encode(root_pos, joints))[2:]
+    np.testing.assert_array_equal(decoded_root_pos, root_pos)
+    np.testing.assert_array_equal(decoded_joints, joints)
+
+
+@pytest.mark.parametrize('max_error', [1e-6, 1e-4, 1e-3])
+def test_fixed_round_trip_is_within_max_error(data_files, max_error):
+    root_pos, joints = parse_gesture_file(data_files[-1])
+    data = GestureCodec.encode(root_pos, joints, mode='fixed', max_error=max_error)
+    decoded_root_pos, decoded_joints = GestureCodec.decode(data)[2:]
+    assert np.abs(decoded_root_pos - root_pos).max() <= max_error
+    assert np.abs(decoded_joints - joints).max() <= max_error
+
+
+def test_float16_round_trip_is_close(data_files):
+    root_pos, joints = parse_gesture_file(data_files[0])
+    decoded_root_pos, decoded_joints = GestureCodec.decode(GestureCodec.encode(root_pos, joints,
+                                                                               mode='float16'))[2:]
+    np.testing.assert_allclose(decoded_root_pos, root_pos, rtol=1e-3, atol=1e-7)
+    np.testing.assert_allclose(decoded_joints, joints, rtol=1e-3, atol=1e-7)
+
+
+def test_encoded_file_round_trip(tmp_path, data_files):
+    output_file_name = GestureCodec.convert_text_file(data_files[0], os.path.join(tmp_path, 'gesture.gsb'))
+    assert GestureCodec.is_encoded_file(output_file_name)
+    root_pos, joints = parse_gesture_file(data_files[0])
+    decoded_root_pos, decoded_joints = GestureCodec.read_file(output_file_name)[2:]
+    np.testing.assert_array_equal(decoded_root_pos, root_pos)
+    np.testing.assert_array_equal(decoded_joints, joints)
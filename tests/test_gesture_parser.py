@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks import baseline
+from gesture_parser import format_gesture_text, iter_hand_frames, parse_file_name, parse_gesture_file, \
+    parse_gesture_text
+from models.frame import Frame
+from models.hand_frames import HandFrames
+from tests.conftest import FIXTURE_DIR
+
+# columns of joints the original reader keeps, it skips 'Hand_Start' and 'Hand_ForearmStub'
+FINGER_COLUMNS = sorted(column for finger in (Frame.get_thumb_finger(), Frame.get_index_finger(),
+                                              Frame.get_middle_finger(), Frame.get_ring_finger(),
+                                              Frame.get_pinky_finger())
+                        for column in Frame.get_finger_joint_columns(finger))
+
+
+def test_parse_file_name():
+    assert parse_file_name('/data/Left_Hand_Gesture_10.txt') == ('Gesture 10', 'L')
+    assert parse_file_name('Right_Hand_Gesture_4.txt') == ('Gesture 4', 'R')
+
+
+def test_parser_matches_the_golden_fixture():
+    # the fixture has a byte order mark, CRLF line endings and 'Hand_Index2' missing in its second frame
+    root_pos, joints = parse_gesture_file(os.path.join(FIXTURE_DIR, 'Right_Hand_Gesture_1.txt'))
+    golden = np.load(os.path.join(FIXTURE_DIR, 'Right_Hand_Gesture_1.npz'))
+    np.testing.assert_array_equal(root_pos, golden['root_pos'])
+    np.testing.assert_array_equal(joints, golden['joints'])
+    missing = np.argwhere(np.isnan(joints).any(axis=-1)).tolist()
+    assert missing == [[1, Frame.get_joint_names().index('Index2')]]
+
+
+def test_parser_matches_the_original_reader(data_files):
+    for file_name in data_files:
+        root_pos, joints = parse_gesture_file(file_name)
+        gesture = baseline.read_gesture(file_name)
+        hand_side = parse_file_name(file_name)[1]
+        original = HandFrames.from_frames(hand_side, gesture.get_frames_data_in_dict()[hand_side])
+        np.testing.assert_array_equal(root_pos, original.get_root_pos(), err_msg=file_name)
+        np.testing.assert_array_equal(joints[:, FINGER_COLUMNS], original.get_joints()[:, FINGER_COLUMNS],
+                                      err_msg=file_name)
+
+
+def test_formatted_text_is_parsed_back():
+    golden = np.load(os.path.join(FIXTURE_DIR, 'Right_Hand_Gesture_1.npz'))
+    root_pos, joints = parse_gesture_text(format_gesture_text(golden['root_pos'], golden['joints']))
+    np.testing.assert_array_equal(root_pos, golden['root_pos'])
+    np.testing.assert_array_equal(joints, golden['joints'])
+
+
+@pytest.mark.parametrize('batch_size, chunk_size', [(1, 64), (2, 1000), (256, 1 << 18)])
+def test_streamed_frames_match_the_bulk_parser(data_files, batch_size, chunk_size):
+    file_name = data_files[0]
+    root_pos, joints = parse_gesture_file(file_name)
+    batches = list(iter_hand_frames(file_name, batch_size=batch_size, chunk_size=chunk_size))
+    assert all(len(batch) <= batch_size for batch in batches)
+    np.testing.assert_array_equal(np.concatenate([batch.get_root_pos() for batch in batches]), root_pos)
+    np.testing.assert_array_equal(np.concatenate([batch.get_joints() for batch in batches]), joints)
+    np.testing.assert_array_equal(np.concatenate([batch.get_frame_numbers() for batch in batches]),
+                                  np.arange(1, len(root_pos) + 1))
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+
+from benchmarks.synthetic import SyntheticCorpus
+from gesture_parser import format_gesture_text, parse_gesture_file
+from gesture_watcher import GestureWatcher
+
+
+def write_take(path: str, frame_count: int, seed: int, mode: str = 'w'):
+    root_pos, joints = SyntheticCorpus.generate_arrays(frame_count, seed)
+    with open(path, mode, encoding='utf-8', newline='') as data_file:
+        data_file.write(format_gesture_text(root_pos, joints))
+
+
+def assert_same_frames(watcher: GestureWatcher, path: str):
+    hand_frames = watcher.gestures.get_list_of_gesture()['Gesture 1'].get_hand_frames('R')
+    root_pos, joints = parse_gesture_file(path)
+    np.testing.assert_array_equal(hand_frames.get_root_pos(), root_pos)
+    np.testing.assert_array_equal(hand_frames.get_joints(), joints)
+    np.testing.assert_array_equal(hand_frames.get_frame_numbers(), np.arange(1, len(root_pos) + 1))
+
+
+def test_appended_frames_are_parsed_from_the_offset(tmp_path):
+    path = os.path.join(tmp_path, 'Right_Hand_Gesture_1.txt')
+    write_take(path, 20, seed=1)
+    watcher = GestureWatcher(tmp_path)
+    assert [change['type'] for change in watcher.poll()] == ['added']
+
+    write_take(path, 5, seed=2, mode='a')
+    changes = watcher.poll()
+    assert [(change['type'], change['first_frame_number'], change['frame_count']) for change in changes] \
+        == [('appended', 21, 5)]
+    assert_same_frames(watcher, path)
+    assert watcher.poll() == []
+
+
+def test_incomplete_last_frame_is_read_at_the_next_poll(tmp_path):
+    path = os.path.join(tmp_path, 'Right_Hand_Gesture_1.txt')
+    write_take(path, 10, seed=1)
+    root_pos, joints = SyntheticCorpus.generate_arrays(1, seed=3)
+    text = format_gesture_text(root_pos, joints)
+    watcher = GestureWatcher(tmp_path)
+    watcher.poll()
+
+    with open(path, 'a', newline='') as data_file:
+        data_file.write(text[:len(text) // 2])
+    assert watcher.poll() == []
+    with open(path, 'a', newline='') as data_file:
+        data_file.write(text[len(text) // 2:])
+    assert [change['frame_count'] for change in watcher.poll()] == [1]
+    assert_same_frames(watcher, path)
+
+
+def test_rewritten_file_larger_than_the_offset_is_replaced(tmp_path):
+    path = os.path.join(tmp_path, 'Right_Hand_Gesture_1.txt')
+    write_take(path, 20, seed=1)
+    watcher = GestureWatcher(tmp_path)
+    watcher.poll()
+
+    write_take(path, 30, seed=2)
+    changes = watcher.poll()
+    assert [change['type'] for change in changes] == ['replaced']
+    assert changes[-1]['frame_count'] == 30
+    assert_same_frames(watcher, path)
+
+    # the state is up to date, so appending works again afterwards
+    write_take(path, 4, seed=3, mode='a')
+    assert [change['type'] for change in watcher.poll()] == ['appended']
+    assert_same_frames(watcher, path)
+
+
+def test_truncated_file_is_replaced(tmp_path):
+    path = os.path.join(tmp_path, 'Right_Hand_Gesture_1.txt')
+    write_take(path, 20, seed=1)
+    watcher = GestureWatcher(tmp_path)
+    watcher.poll()
+
+    write_take(path, 8, seed=1)
+    assert watcher.poll()[-1]['type'] == 'replaced'
+    assert_same_frames(watcher, path)
+
+
+def test_replaced_file_with_another_inode_is_parsed_again(tmp_path):
+    path = os.path.join(tmp_path, 'Right_Hand_Gesture_1.txt')
+    write_take(path, 20, seed=1)
+    watcher = GestureWatcher(tmp_path)
+    watcher.poll()
+
+    # a new take is written next to the file and moved over it, starting with the same frames
+    temporary_path = os.path.join(tmp_path, 'take.tmp')
+    write_take(temporary_path, 20, seed=1)
+    write_take(temporary_path, 6, seed=4, mode='a')
+    os.replace(temporary_path, path)
+    assert watcher.poll()[-1]['type'] == 'replaced'
+    assert_same_frames(watcher, path)
+
+
+def test_removed_file_removes_its_gesture(tmp_path):
+    path = os.path.join(tmp_path, 'Right_Hand_Gesture_1.txt')
+    write_take(path, 5, seed=1)
+    watcher = GestureWatcher(tmp_path)
+    watcher.poll()
+
+    os.remove(path)
+    assert [change['type'] for change in watcher.poll()] == ['removed']
+    assert 'Gesture 1' not in watcher.gestures.get_list_of_gesture()
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from models.frame import Frame
+from models.gesture import Gesture
+from models.hand_frames import HandFrames
+
+
+def create_hand_frames(frame_count: int, seed: int = 0) -> HandFrames:
+    rng = np.random.default_rng(seed)
+    return HandFrames('R', rng.random((frame_count, 3)), rng.random((frame_count, len(Frame.get_joint_names()), 3)))
+
+
+def test_frames_appended_one_by_one_equal_the_source():
+    source = create_hand_frames(100)
+    gesture = Gesture('Gesture 1')
+    gesture.set_hand_frames(HandFrames('R', source.get_root_pos()[:1], source.get_joints()[:1]))
+    for frame in source[1:]:
+        gesture.set_frames_data(frame)
+
+    hand_frames = gesture.get_hand_frames('R')
+    assert len(hand_frames) == 100
+    np.testing.assert_array_equal(hand_frames.get_root_pos(), source.get_root_pos())
+    np.testing.assert_array_equal(hand_frames.get_joints(), source.get_joints())
+    np.testing.assert_array_equal(hand_frames.get_frame_numbers(), source.get_frame_numbers())
+
+
+def test_appending_does_not_change_a_copy_or_arrays_returned_before():
+    hand_frames = create_hand_frames(4)
+    hand_frames.extend(create_hand_frames(4, seed=1))  # there are spare rows after this
+    copied = hand_frames.copy()
+    joints = hand_frames.get_joints()
+    expected_joints = joints.copy()
+
+    hand_frames.extend(create_hand_frames(1, seed=2))
+    copied.extend(create_hand_frames(1, seed=3))
+    np.testing.assert_array_equal(joints, expected_joints)
+    np.testing.assert_array_equal(hand_frames.get_joints()[-1], create_hand_frames(1, seed=2).get_joints()[0])
+    np.testing.assert_array_equal(copied.get_joints()[-1], create_hand_frames(1, seed=3).get_joints()[0])
+    assert len(hand_frames) == len(copied) == 9
+
+
+def test_spare_rows_are_not_frames():
+    hand_frames = create_hand_frames(3)
+    hand_frames.append(hand_frames[0])
+    assert len(list(hand_frames)) == len(hand_frames.get_joints()) == 4
+    assert hand_frames[-1].frame_number == 1
+    with pytest.raises(IndexError):
+        hand_frames[4]
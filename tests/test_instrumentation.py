@@ -0,0 +1,99 @@
+import os
+import pstats
+
+import pytest
+
+import instrumentation
+import main
+from instrumentation import Instrumentation, instrumented
+
+
+@pytest.fixture
+def enabled():
+    """ Instrumentation enabled from a clean state, and disabled and cleared after the test """
+    Instrumentation.reset()
+    Instrumentation.enable()
+    yield
+    Instrumentation.disable()
+    Instrumentation.reset()
+
+
+class Clock:
+    """ A 'time.perf_counter_ns' giving durations of stages one by one """
+
+    def __init__(self, durations_ns: list):
+        self.__times = []
+        for duration_ns in durations_ns:
+            self.__times += [0, duration_ns]
+
+    def __call__(self) -> int:
+        return self.__times.pop(0)
+
+
+def test_counters_accumulate_only_while_enabled(enabled):
+    Instrumentation.count('frames_parsed', 3)
+    Instrumentation.count('frames_parsed', 4)
+    Instrumentation.count('files_failed')
+    Instrumentation.disable()
+    Instrumentation.count('frames_parsed', 100)
+    assert Instrumentation.get_summary()['counters'] == {'files_failed': 1, 'frames_parsed': 7}
+
+
+def test_stage_durations_accumulate_into_statistics_and_a_histogram(enabled, monkeypatch):
+    monkeypatch.setattr(instrumentation.time, 'perf_counter_ns', Clock([500, 3000, 3000, 70000]))
+    for _ in range(4):
+        with Instrumentation.stage('parse'):
+            pass
+    stage = Instrumentation.get_summary()['stages']['parse']
+    assert (stage['count'], stage['total_ms'], stage['mean_ms']) == (4, 0.0765, 0.0765 / 4)
+    assert (stage['min_ms'], stage['max_ms']) == (0.0005, 0.07)
+    # buckets of up to 1, 4 and 128 microseconds, a percentile is the upper bound of its bucket
+    assert stage['histogram_us'] == {1: 1, 4: 2, 128: 1}
+    assert (stage['p50_ms'], stage['p90_ms'], stage['p99_ms']) == (0.004, 0.07, 0.07)
+
+
+def test_a_stage_raising_an_exception_is_recorded(enabled):
+    with pytest.raises(KeyError):
+        with Instrumentation.stage('lookup'):
+            raise KeyError('missing')
+    assert Instrumentation.get_summary()['stages']['lookup']['count'] == 1
+
+
+def test_instrumented_functions_are_recorded_only_while_enabled(enabled):
+    @instrumented('square')
+    def square(value):
+        return value * value
+
+    assert [square(value) for value in range(3)] == [0, 1, 4]
+    Instrumentation.disable()
+    assert square(5) == 25
+    assert Instrumentation.get_summary()['stages']['square']['count'] == 3
+    assert square.__name__ == 'square'
+
+
+def test_reading_data_files_records_stages_and_counters(enabled, gestures):
+    main.read_data_files(use_cache=False)
+    summary = Instrumentation.get_summary()
+    frame_count = sum(len(gesture.get_hand_frames(hand_side)) for gesture in gestures.get_list_of_gesture().values()
+                      for hand_side in ['R', 'L'])
+    assert summary['counters']['frames_parsed'] == frame_count
+    assert summary['stages']['parse_gesture_text']['count'] == 11
+    assert summary['stages']['read_data_files']['count'] == 1
+    assert 'read_data_files' in Instrumentation.format_summary()
+
+
+def test_disabled_instrumentation_records_nothing():
+    Instrumentation.reset()
+    with Instrumentation.stage('idle'):
+        Instrumentation.count('idle')
+    assert Instrumentation.get_summary() == {'stages': {}, 'counters': {}}
+    assert Instrumentation.get_profile_stats() is None
+
+
+def test_the_profile_is_dumped_to_a_pstats_file(enabled, tmp_path):
+    Instrumentation.enable(profile=True)
+    main.read_data_files(use_cache=False)
+    file_name = os.path.join(tmp_path, 'profile.pstats')
+    assert Instrumentation.dump_profile(file_name)
+    statistics = pstats.Stats(file_name)
+    assert any(function_name == 'read_data_files' for (_, _, function_name) in statistics.stats)
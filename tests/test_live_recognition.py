@@ -0,0 +1,149 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+import gesture_parser
+from live_recognition import FrameAssembler, FrameRingBuffer, LiveRecognizer
+from recognition import GestureRecognizer
+
+
+class LineReader:
+    """ A reader of lines which lets other coroutines run before each line, as a slow producer does """
+
+    def __init__(self, text: str):
+        self.__lines = [line.encode('utf-8') for line in text.splitlines(keepends=True)]
+
+    async def readline(self) -> bytes:
+        await asyncio.sleep(0)
+        return self.__lines.pop(0) if len(self.__lines) > 0 else b''
+
+
+class SlowRecognizer:
+    """ A recognizer which takes a while to match and never finds anything """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def recognize(self, query, k: int = 1, hand_side: str = None) -> list:
+        time.sleep(self.seconds)
+        return []
+
+
+def get_text(gestures, gesture_name: str, hand_side: str) -> str:
+    hand_frames = gestures.get_list_of_gesture()[gesture_name].get_hand_frames(hand_side)
+    return gesture_parser.format_gesture_text(hand_frames.get_root_pos(), hand_frames.get_joints())
+
+
+async def run(live_recognizer: LiveRecognizer, readers: list, hand_side: str):
+    """ Consuming every reader concurrently while matching runs, until every reader ends """
+    matching = asyncio.create_task(live_recognizer.run_matching())
+    try:
+        await asyncio.gather(*[live_recognizer.consume(reader, hand_side) for reader in readers])
+    finally:
+        matching.cancel()
+
+
+@pytest.fixture(scope='module')
+def recognizer(gestures):
+    return GestureRecognizer(gestures)
+
+
+def test_assembler_completes_a_frame_when_every_joint_arrived(gestures):
+    hand_frames = gestures.get_list_of_gesture()['Gesture 1'].get_hand_frames('R')
+    lines = gesture_parser.format_gesture_text(hand_frames.get_root_pos()[:1], hand_frames.get_joints()[:1]) \
+        .splitlines()
+    assembler = FrameAssembler()
+    assert assembler.feed('Hand_Thumb0, (1.0, 2.0, 3.0)') is None  # before the first 'RootPos'
+    assert assembler.feed('not a joint line') is None
+    assert [assembler.feed(line) for line in lines[:-1]] == [None] * (len(lines) - 1)
+    root_pos, joints = assembler.feed(lines[-1])
+    np.testing.assert_allclose(root_pos, hand_frames.get_root_pos()[0])
+    np.testing.assert_allclose(joints, hand_frames.get_joints()[0])
+    assert assembler.flush() is None
+
+
+def test_assembler_completes_a_frame_with_missing_joints_at_the_next_root_pos():
+    assembler = FrameAssembler()
+    assert assembler.feed('RootPos, (1.0, 2.0, 3.0)') is None
+    assert assembler.feed('Hand_Thumb0, (0.1, 0.2, 0.3)') is None
+    root_pos, joints = assembler.feed('RootPos, (4.0, 5.0, 6.0)')
+    column = gesture_parser.get_column_index('Hand_Thumb0')
+    np.testing.assert_array_equal(root_pos, [1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(joints[column], [0.1, 0.2, 0.3])
+    assert np.isnan(np.delete(joints, column, axis=0)).all()
+    root_pos, joints = assembler.flush()
+    np.testing.assert_array_equal(root_pos, [4.0, 5.0, 6.0])
+    assert np.isnan(joints).all()
+
+
+def test_ring_buffer_keeps_the_latest_frames_in_order():
+    buffer = FrameRingBuffer(3)
+    for index in range(5):
+        buffer.append(np.full(3, index), np.full((buffer.get_latest_joints().shape[1], 3), index))
+    assert buffer.frame_count == 5
+    np.testing.assert_array_equal(buffer.get_latest_root_pos()[:, 0], [2, 3, 4])
+    np.testing.assert_array_equal(buffer.get_latest_joints(2)[:, 0, 0], [3, 4])
+    np.testing.assert_array_equal(buffer.get_latest_joints(10)[:, 0, 0], [2, 3, 4])
+    with pytest.raises(ValueError):
+        FrameRingBuffer(0)
+
+
+@pytest.mark.parametrize('gesture_name, hand_side', [('Gesture 1', 'R'), ('Gesture 6', 'L'), ('Gesture 9', 'L')])
+def test_replayed_reference_is_detected_with_the_default_threshold(gestures, recognizer, gesture_name, hand_side):
+    detections = []
+    live_recognizer = LiveRecognizer(recognizer, cooldown=0, on_detection=detections.append)
+    assert live_recognizer.window == recognizer.get_longest_reference()
+    asyncio.run(run(live_recognizer, [LineReader(get_text(gestures, gesture_name, hand_side))], hand_side))
+    # the stream is matched for the last time at its end of file, without a call of 'finish'
+    frame_count = len(gestures.get_list_of_gesture()[gesture_name].get_hand_frames(hand_side))
+    assert (gesture_name, frame_count) in [(detection['gesture'], detection['frame']) for detection in detections]
+    assert all(detection['distance'] <= live_recognizer.get_threshold(hand_side) for detection in detections)
+
+
+def test_the_end_of_a_stream_is_matched_even_with_fewer_frames_than_stride(gestures, recognizer):
+    detections = []
+    live_recognizer = LiveRecognizer(recognizer, stride=100000, on_detection=detections.append)
+    asyncio.run(run(live_recognizer, [LineReader(get_text(gestures, 'Gesture 2', 'R'))], 'R'))
+    assert live_recognizer.get_statistics()['matching_runs'] == 1
+    assert [detection['gesture'] for detection in detections] == ['Gesture 2']
+
+
+def test_concurrent_producers_are_not_interleaved(gestures, recognizer):
+    detections = []
+    live_recognizer = LiveRecognizer(recognizer, cooldown=0, on_detection=detections.append)
+    readers = [LineReader(get_text(gestures, gesture_name, 'R')) for gesture_name in ['Gesture 1', 'Gesture 7']]
+    asyncio.run(run(live_recognizer, readers, 'R'))
+    final_detections = {(detection['stream'], detection['gesture'], detection['frame']) for detection in detections}
+    assert (0, 'Gesture 1', 359) in final_detections
+    assert (1, 'Gesture 7', 357) in final_detections
+
+
+def test_matching_runs_are_coalesced_when_frames_arrive_faster(gestures):
+    live_recognizer = LiveRecognizer(SlowRecognizer(0.02), window=20, stride=1, threshold=1.0)
+    asyncio.run(run(live_recognizer, [LineReader(get_text(gestures, 'Gesture 1', 'R'))], 'R'))
+    statistics = live_recognizer.get_statistics()
+    assert statistics['frames'] == 359
+    assert statistics['skipped_runs'] > 0
+    assert statistics['matching_runs'] < statistics['frames'] / 2
+    assert statistics['detections'] == 0
+
+
+def test_a_file_redirected_to_stdin_is_read(gestures, recognizer, tmp_path, monkeypatch):
+    path = tmp_path / 'stdin.txt'
+    path.write_text(get_text(gestures, 'Gesture 9', 'L'), newline='')
+    detections = []
+    live_recognizer = LiveRecognizer(recognizer, on_detection=detections.append)
+
+    async def read():
+        matching = asyncio.create_task(live_recognizer.run_matching())
+        try:
+            await live_recognizer.read_stdin('L')
+        finally:
+            matching.cancel()
+
+    with open(path) as file:
+        monkeypatch.setattr('sys.stdin', file)
+        asyncio.run(read())
+    assert 'Gesture 9' in [detection['gesture'] for detection in detections]
@@ -0,0 +1,68 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import main
+from tests.conftest import DATA_DIR
+
+
+def test_read_data_files_keeps_the_current_directory(monkeypatch):
+    monkeypatch.chdir(os.path.dirname(DATA_DIR))
+    first = main.read_data_files(use_cache=False, data_dir='data')
+    second = main.read_data_files(use_cache=False, data_dir='data')
+    assert os.getcwd() == os.path.dirname(DATA_DIR)
+    assert sorted(first.get_list_of_gesture().keys()) == sorted(second.get_list_of_gesture().keys())
+    assert len(first.get_list_of_gesture()) == 10
+
+
+def test_read_data_files_puts_the_cache_in_the_data_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv('GESTURE_CACHE_DIR', raising=False)
+    monkeypatch.chdir(tmp_path)
+    data_dir = os.path.join(tmp_path, 'recordings')
+    os.mkdir(data_dir)
+    with open(os.path.join(DATA_DIR, 'Right_Hand_Gesture_1.txt'), 'rb') as source_file, \
+            open(os.path.join(data_dir, 'Right_Hand_Gesture_1.txt'), 'wb') as data_file:
+        data_file.write(source_file.read())
+
+    gestures = main.read_data_files(use_cache=True, data_dir='recordings')
+    assert list(gestures.get_list_of_gesture().keys()) == ['Gesture 1']
+    assert os.path.isdir(os.path.join(data_dir, '.gesture_cache'))
+    assert not os.path.exists(os.path.join(tmp_path, '.gesture_cache'))
+
+
+def assert_same_gestures(first, second):
+    assert list(first.get_list_of_gesture().keys()) == list(second.get_list_of_gesture().keys())
+    for (gesture, other_gesture) in zip(first.get_list_of_gesture().values(), second.get_list_of_gesture().values()):
+        for hand_side in ['R', 'L']:
+            hand_frames = gesture.get_hand_frames(hand_side)
+            other_hand_frames = other_gesture.get_hand_frames(hand_side)
+            np.testing.assert_array_equal(hand_frames.get_root_pos(), other_hand_frames.get_root_pos())
+            np.testing.assert_array_equal(hand_frames.get_joints(), other_hand_frames.get_joints())
+            np.testing.assert_array_equal(hand_frames.get_frame_numbers(), other_hand_frames.get_frame_numbers())
+
+
+@pytest.mark.parametrize('compact', [True, False])
+def test_parallel_loading_gives_the_gestures_of_serial_loading_in_the_same_order(compact):
+    serial = main.read_data_files(compact=compact, use_cache=False, workers=1)
+    parallel = main.read_data_files(compact=compact, use_cache=False, workers=3)
+    assert_same_gestures(serial, parallel)
+    assert all(gesture.is_compact() == compact or len(gesture.get_frames_data_in_dict()) == 0
+               for gesture in parallel.get_list_of_gesture().values())
+
+
+def test_files_failing_in_worker_processes_are_reported_and_the_others_are_loaded(tmp_path, capsys):
+    for file_name in ['Right_Hand_Gesture_1.txt', 'Left_Hand_Gesture_3.txt', 'Right_Hand_Gesture_3.txt']:
+        shutil.copyfile(os.path.join(DATA_DIR, file_name), os.path.join(tmp_path, file_name))
+    with open(os.path.join(tmp_path, 'Right_Hand_Gesture_2.txt'), 'w') as data_file:
+        data_file.write('RootPos, (1.0, x, 3.0)\n')
+    os.mkdir(os.path.join(tmp_path, 'Left_Hand_Gesture_2.txt'))
+
+    gestures = main.read_data_files(use_cache=False, workers=2, data_dir=str(tmp_path))
+    errors = capsys.readouterr().err.splitlines()
+    assert len(errors) == 2
+    assert 'Is a directory' in errors[0] and errors[0].endswith('File not found or unreadable')
+    assert 'could not convert' in errors[1] and errors[1].endswith('Data file is ill-formatted')
+    assert list(gestures.get_list_of_gesture().keys()) == ['Gesture 3', 'Gesture 1']
+    assert_same_gestures(gestures, main.read_data_files(use_cache=False, workers=1, data_dir=str(tmp_path)))
@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import pytest
+
+from models.frame import Frame
+from models.gesture import Gesture
+from models.gestures import Gestures
+from models.hand_frames import HandFrames
+from pose_index import PoseIndex
+
+
+def get_brute_force(pose_index: PoseIndex, gestures, joints: np.ndarray, hand_side: str = None) -> tuple:
+    """ Getting the distance to every frame of the gestures, with (gesture name, hand side, frame number) of each """
+    vector = pose_index.get_pose_vectors(joints)
+    keys, distances = [], []
+    for gesture in gestures.get_list_of_gesture().values():
+        for each_hand_side in ('R', 'L'):
+            hand_frames = gesture.get_hand_frames(each_hand_side)
+            if len(hand_frames) == 0 or hand_side not in (None, each_hand_side):
+                continue
+            vectors = pose_index.get_pose_vectors(hand_frames.get_joints())
+            distances += np.linalg.norm(vectors - vector, axis=1).tolist()
+            keys += [(gesture.gesture_name, each_hand_side, frame_number)
+                     for frame_number in hand_frames.get_frame_numbers().tolist()]
+    return keys, np.array(distances)
+
+
+def get_queries(gestures, count: int = 20) -> np.ndarray:
+    """ Drawing frames of the gestures with noise, so queries are near the indexed frames but not on them """
+    rng = np.random.default_rng(0)
+    hand_frames = gestures.get_list_of_gesture()['Gesture 3'].get_hand_frames('R')
+    joints = hand_frames.get_joints()[rng.integers(0, len(hand_frames), count)]
+    return joints + rng.normal(0, 0.005, joints.shape)
+
+
+@pytest.mark.parametrize('normalize, leaf_size', [(True, 32), (False, 4)])
+def test_query_matches_brute_force(gestures, normalize, leaf_size):
+    pose_index = PoseIndex(normalize=normalize, leaf_size=leaf_size)
+    pose_index.add_gestures(gestures)
+    pose_index.build()
+    for joints in get_queries(gestures):
+        keys, distances = get_brute_force(pose_index, gestures, joints)
+        results = pose_index.query(joints, k=5)
+        np.testing.assert_allclose([distance for (_, _, _, distance) in results], np.sort(distances)[:5])
+        assert results[0][:3] == keys[int(np.argmin(distances))]
+
+
+def test_query_of_a_hand_side_and_pending_vectors_match_brute_force(gestures):
+    pose_index = PoseIndex(leaf_size=8)
+    gesture_list = list(gestures.get_list_of_gesture().values())
+    for gesture in gesture_list[:-1]:
+        pose_index.add_gesture(gesture)
+    pose_index.build()
+    pose_index.add_gesture(gesture_list[-1])  # a few vectors are not in the tree yet
+    for joints in get_queries(gestures, 5):
+        _, distances = get_brute_force(pose_index, gestures, joints, 'L')
+        results = pose_index.query(joints, k=3, hand_side='L')
+        assert all(hand_side == 'L' for (_, hand_side, _, _) in results)
+        np.testing.assert_allclose([distance for (_, _, _, distance) in results], np.sort(distances)[:3])
+
+
+def test_query_radius_matches_brute_force(gestures):
+    pose_index = PoseIndex()
+    pose_index.add_gestures(gestures)
+    for joints in get_queries(gestures, 5):
+        keys, distances = get_brute_force(pose_index, gestures, joints)
+        radius = float(np.sort(distances)[50])
+        results = pose_index.query_radius(joints, radius)
+        assert sorted(result[:3] for result in results) \
+            == sorted(key for (key, distance) in zip(keys, distances) if distance <= radius)
+
+
+def test_saved_index_gives_the_same_results(tmp_path, gestures):
+    pose_index = PoseIndex(finger_name_list=[Frame.get_index_finger(), Frame.get_thumb_finger()])
+    pose_index.add_gestures(gestures)
+    file_name = os.path.join(tmp_path, 'poses.npz')
+    pose_index.save(file_name)
+    loaded = PoseIndex.load(file_name)
+    assert len(loaded) == len(pose_index)
+    for joints in get_queries(gestures, 5):
+        assert loaded.query(joints, k=4) == pose_index.query(joints, k=4)
+
+
+@pytest.mark.parametrize('saved', [False, True])
+def test_frames_appended_to_an_indexed_hand_side_are_added(tmp_path, gestures, saved):
+    hand_frames = gestures.get_list_of_gesture()['Gesture 3'].get_hand_frames('L')
+    growing = Gesture('Gesture 3')
+    growing.set_hand_frames(HandFrames('L', hand_frames.get_root_pos()[:100], hand_frames.get_joints()[:100]))
+    growing_gestures = Gestures()
+    growing_gestures.add_gesture(growing)
+    pose_index = PoseIndex(leaf_size=8)
+    pose_index.add_gestures(growing_gestures)
+    pose_index.build()
+    if saved:
+        pose_index.save(os.path.join(tmp_path, 'poses.npz'))
+        pose_index = PoseIndex.load(os.path.join(tmp_path, 'poses.npz'))
+
+    growing.set_hand_frames(HandFrames('L', hand_frames.get_root_pos()[100:], hand_frames.get_joints()[100:],
+                                       hand_frames.get_frame_numbers()[100:]))
+    pose_index.add_gestures(growing_gestures)
+    pose_index.add_gestures(growing_gestures)  # nothing new the second time
+    assert len(pose_index) == len(hand_frames)
+    assert pose_index.get_labels() == [('Gesture 3', 'L')]
+    for joints in get_queries(gestures, 5):
+        keys, distances = get_brute_force(pose_index, growing_gestures, joints)
+        results = pose_index.query(joints, k=3)
+        np.testing.assert_allclose([distance for (_, _, _, distance) in results], np.sort(distances)[:3])
+    assert pose_index.query(hand_frames.get_joints()[150])[0][2:] == (151, 0.0)
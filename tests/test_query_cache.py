@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from models.frame import Frame
+from models.gesture import Gesture
+from models.gestures import Gestures
+from models.hand_frames import HandFrames
+from query_cache import QueryCache
+
+
+def create_gestures(frame_count: int = 50, gesture_count: int = 3, compact: bool = True) -> Gestures:
+    rng = np.random.default_rng(0)
+    gestures = Gestures()
+    for number in range(1, gesture_count + 1):
+        gesture = Gesture(f'Gesture {number}')
+        hand_frames = HandFrames('R', rng.random((frame_count, 3)),
+                                 rng.random((frame_count, len(Frame.get_joint_names()), 3)))
+        if compact:
+            gesture.set_hand_frames(hand_frames)
+        else:
+            for frame in hand_frames:
+                frame_with_dictionaries = Frame('R', frame.frame_number, frame.wrist_position)
+                frame_with_dictionaries.set_thumb_data(dict(frame.get_thumb_data()))
+                frame_with_dictionaries.set_index_finger_data(dict(frame.get_index_finger_data()))
+                gesture.set_frames_data(frame_with_dictionaries)
+        gestures.add_gesture(gesture)
+    return gestures
+
+
+def test_a_repeated_query_is_a_hit_returning_the_same_result():
+    cache = QueryCache(create_gestures())
+    first = cache.extract_finger_array('Gesture 1', 'R', [Frame.get_index_finger()])
+    assert cache.extract_finger_array('Gesture 1', 'R', [Frame.get_index_finger()]) is first
+    assert not first[0]['R'].flags.writeable
+    statistics = cache.get_statistics()
+    assert (statistics['hits'], statistics['misses'], statistics['entries']) == (1, 1, 1)
+
+
+def test_a_change_through_a_frame_setter_invalidates_results():
+    gestures = create_gestures()
+    cache = QueryCache(gestures)
+    before = cache.extract_finger_frame('Gesture 1', 'R', [Frame.get_thumb_finger()])
+    gestures.get_list_of_gesture()['Gesture 1'].get_hand_frames('R')[0].set_thumb_data({'Thumb0': (9.0, 9.0, 9.0)})
+    after = cache.extract_finger_frame('Gesture 1', 'R', [Frame.get_thumb_finger()])
+    assert after is not before
+    assert dict(after['R'][0][0]) == {'Thumb0': (9.0, 9.0, 9.0)}
+    assert cache.get_statistics()['invalidations'] == 1
+
+
+def test_added_or_replaced_gestures_invalidate_results():
+    gestures = create_gestures()
+    cache = QueryCache(gestures)
+    names = cache.get_gesture(['Gesture 1', 'Gesture 4'])
+    before = cache.extract_finger_array('Gesture 1', 'R', [Frame.get_pinky_finger()])
+    gestures.add_gesture(create_gestures(gesture_count=1).get_list_of_gesture()['Gesture 1'])
+    after = cache.extract_finger_array('Gesture 1', 'R', [Frame.get_pinky_finger()])
+    assert len(after[0]['R']) == 2 * len(before[0]['R'])
+    assert cache.get_gesture(['Gesture 1', 'Gesture 4']) is not names
+    gestures.add_gesture(create_gestures(gesture_count=4).get_list_of_gesture()['Gesture 4'])
+    assert len(cache.get_gesture(['Gesture 1', 'Gesture 4'])) == 2
+
+
+def test_compacting_a_gesture_never_gives_an_old_version_back():
+    gestures = create_gestures()
+    gesture = gestures.get_list_of_gesture()['Gesture 1']
+    gesture.get_hand_frames('R')[0].set_thumb_data({})
+    version = gesture.get_version()
+    gesture.compact(np.float32)
+    assert gesture.get_version() > version
+
+
+def test_gestures_with_frame_objects_are_not_memoized():
+    gestures = create_gestures(compact=False)
+    cache = QueryCache(gestures)
+    before = cache.extract_finger_frame('Gesture 2', 'R', [Frame.get_thumb_finger()])
+    gestures.get_list_of_gesture()['Gesture 2'].get_right_hand_frame_data()[0].set_thumb_data({'Thumb1': (1, 2, 3)})
+    after = cache.extract_finger_frame('Gesture 2', 'R', [Frame.get_thumb_finger()])
+    assert before['R'][0][0] != after['R'][0][0] == {'Thumb1': (1, 2, 3)}
+    cache.extract_finger_array('Gesture 2', 'R', [Frame.get_index_finger()])
+    statistics = cache.get_statistics()
+    assert (statistics['uncached'], statistics['entries'], statistics['bytes']) == (3, 0, 0)
+
+
+def test_least_recently_used_results_are_evicted_within_the_budget():
+    finger_name_list = [Frame.get_thumb_finger(), Frame.get_ring_finger()]  # not neighbours, the joints are copied
+    cache = QueryCache(create_gestures(), max_bytes=1 << 30)
+    cache.extract_finger_array('Gesture 1', 'R', finger_name_list)
+    entry_bytes = cache.get_statistics()['bytes']
+
+    cache = QueryCache(create_gestures(), max_bytes=2 * entry_bytes)
+    for gesture_name in ['Gesture 1', 'Gesture 2', 'Gesture 1', 'Gesture 3']:
+        cache.extract_finger_array(gesture_name, 'R', finger_name_list)
+    statistics = cache.get_statistics()
+    assert (statistics['evictions'], statistics['entries'], statistics['hits']) == (1, 2, 1)
+    assert statistics['bytes'] <= cache.max_bytes
+    # 'Gesture 2' was the least recently used one
+    cache.extract_finger_array('Gesture 1', 'R', finger_name_list)
+    assert cache.get_statistics()['hits'] == 2
+    cache.extract_finger_array('Gesture 2', 'R', finger_name_list)
+    assert cache.get_statistics()['misses'] == 4
+
+
+def test_a_result_larger_than_the_budget_is_not_kept():
+    cache = QueryCache(create_gestures(), max_bytes=100)
+    cache.extract_finger_array('Gesture 1', 'R', [Frame.get_thumb_finger(), Frame.get_pinky_finger()])
+    assert (cache.get_statistics()['entries'], cache.get_statistics()['bytes']) == (0, 0)
+    with pytest.raises(ValueError):
+        QueryCache(Gestures(), max_bytes=-1)
+
+
+def test_copied_arrays_count_the_memory_they_keep_alive_and_views_do_not():
+    frame_count = 1000
+    cache = QueryCache(create_gestures(frame_count))
+    # thumb and index are neighbours, so the result is a view of the gesture's own joint array
+    cache.extract_finger_array('Gesture 1', 'R', [Frame.get_thumb_finger(), Frame.get_index_finger()])
+    view_bytes = cache.get_statistics()['bytes']
+    copied, _ = cache.extract_finger_array('Gesture 2', 'R', [Frame.get_thumb_finger(), Frame.get_pinky_finger()])
+    copied_bytes = cache.get_statistics()['bytes'] - view_bytes
+    assert view_bytes < frame_count
+    assert copied_bytes >= frame_count * 10 * 3 * 8 == copied['R'].nbytes
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from recognition import GestureRecognizer, _banded_dtw
+
+
+def naive_dtw(query: np.ndarray, reference: np.ndarray, band: int) -> float:
+    """ The textbook DTW within a Sakoe-Chiba band, the sum of squared frame distances along the best path """
+    length = len(query)
+    accumulated = np.full((length + 1, length + 1), np.inf)
+    accumulated[0, 0] = 0
+    for i in range(1, length + 1):
+        for j in range(max(1, i - band), min(length, i + band) + 1):
+            cost = float(np.sum((query[i - 1] - reference[j - 1]) ** 2))
+            accumulated[i, j] = cost + min(accumulated[i - 1, j - 1], accumulated[i - 1, j], accumulated[i, j - 1])
+    return accumulated[length, length]
+
+
+@pytest.mark.parametrize('band', [0, 1, 3, 12])
+def test_banded_dtw_matches_naive_dtw(band):
+    rng = np.random.default_rng(band)
+    query = np.cumsum(rng.normal(size=(12, 4)), axis=0)
+    references = np.cumsum(rng.normal(size=(5, 12, 4)), axis=0)
+    expected = [naive_dtw(query, reference, band) for reference in references]
+    np.testing.assert_allclose(_banded_dtw(query, references, band), expected)
+
+
+def test_banded_dtw_of_pairs_matches_naive_dtw():
+    rng = np.random.default_rng(1)
+    queries = rng.normal(size=(6, 10, 3))
+    references = rng.normal(size=(6, 10, 3))
+    expected = [naive_dtw(query, reference, 2) for (query, reference) in zip(queries, references)]
+    np.testing.assert_allclose(_banded_dtw(queries, references, 2), expected)
+
+
+def test_early_abandoning_only_drops_a_batch_beyond_the_threshold():
+    rng = np.random.default_rng(2)
+    query = rng.normal(size=(10, 3))
+    references = np.stack([query + 0.01, query + 10.0])
+    # a batch is abandoned only when every reference in it is beyond the threshold
+    np.testing.assert_allclose(_banded_dtw(query, references, 2, threshold=1.0),
+                               [naive_dtw(query, reference, 2) for reference in references])
+    assert np.all(np.isinf(_banded_dtw(query, references[1:], 2, threshold=1.0)))
+
+
+def test_recognize_finds_the_gesture_itself_and_matches_exhaustive_dtw(gestures):
+    recognizer = GestureRecognizer(gestures)
+    hand_frames = gestures.get_list_of_gesture()['Gesture 3'].get_hand_frames('R')
+    results = recognizer.recognize(hand_frames, k=3)
+    assert results[0][:2] == ('Gesture 3', 'R')
+    assert results[0][2] == pytest.approx(0, abs=1e-6)
+
+    query = recognizer.get_features(hand_frames)
+    references = np.stack([recognizer.get_features(gestures.get_list_of_gesture()[name].get_hand_frames(hand_side))
+                           for (name, hand_side) in recognizer.get_labels()])
+    distances = np.sqrt(_banded_dtw(query, references, recognizer.band))
+    np.testing.assert_allclose([distance for (_, _, distance) in results], np.sort(distances)[:3], atol=1e-6)
+
+
+def test_separation_is_the_distance_between_the_nearest_references_of_different_gestures(gestures):
+    recognizer = GestureRecognizer(gestures)
+    for hand_side in ['R', 'L']:
+        distances, frame_counts = [], []
+        for (gesture_name, gesture) in gestures.get_list_of_gesture().items():
+            hand_frames = gesture.get_hand_frames(hand_side)
+            if len(hand_frames) == 0:
+                continue
+            frame_counts.append(len(hand_frames))
+            distances += [distance for (name, _, distance) in recognizer.recognize(hand_frames, 20, hand_side)
+                          if name != gesture_name]
+        assert recognizer.get_separation(hand_side) == pytest.approx(min(distances))
+        assert recognizer.get_longest_reference(hand_side) == max(frame_counts)
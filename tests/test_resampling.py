@@ -0,0 +1,34 @@
+import os
+
+import numpy as np
+import pytest
+
+import main
+from resampling import Resampler
+from tests.conftest import DATA_DIR
+from visualisation import Visualization
+
+
+def get_drawn_points(gesture, hand_side: str) -> np.ndarray:
+    """ Stacking the line coordinates 'Visualization' draws for every finger into shape (frames, points, 3) """
+    line_data = Visualization.precompute_line_data(gesture)[hand_side]
+    return np.concatenate([finger_lines.transpose(0, 2, 1) for finger_lines in line_data.values()], axis=1)
+
+
+@pytest.mark.parametrize('tolerance', [0.002, 0.02])
+def test_decimated_frames_are_drawn_within_the_tolerance(tolerance):
+    gesture = main.read_gesture(os.path.join(DATA_DIR, 'Right_Hand_Gesture_1.txt'))
+    decimated = Resampler.decimate_gesture(gesture, tolerance)
+    restored = Resampler.restore_hand_frames(decimated.get_hand_frames('R'))
+    assert len(decimated.get_hand_frames('R')) < len(restored) == len(gesture.get_hand_frames('R'))
+
+    restored_gesture = main.create_gesture('Gesture 1', 'R', restored.get_root_pos(), restored.get_joints())
+    error = np.linalg.norm(get_drawn_points(restored_gesture, 'R') - get_drawn_points(gesture, 'R'), axis=-1)
+    assert np.nanmax(error) <= tolerance + 1e-12
+
+
+def test_decimation_keeps_the_first_and_last_frame():
+    joints = np.zeros((5, 2, 3))
+    np.testing.assert_array_equal(Resampler.get_decimation_indexes(joints, 0.1), [0, 4])
+    joints[2, 1] = 1.0
+    np.testing.assert_array_equal(Resampler.get_decimation_indexes(joints, 0.1), [0, 1, 2, 3, 4])
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from segmentation import GestureSegmenter
+
+
+def create_recording(gestures) -> tuple:
+    """ Joining a few gestures into one recording with idle frames, the last frame held with noise, around them
+    Returns:
+        tuple : (joints, frame ranges of the gestures)
+    """
+    rng = np.random.default_rng(0)
+    parts, ranges, frame_count = [], [], 0
+    for gesture_name in ('Gesture 1', 'Gesture 2', 'Gesture 7'):
+        joints = np.nan_to_num(gestures.get_list_of_gesture()[gesture_name].get_hand_frames('R').get_joints())
+        idle = joints[:1] + rng.normal(0, 1e-5, (120,) + joints.shape[1:])
+        parts += [idle, joints]
+        ranges.append((frame_count + len(idle), frame_count + len(idle) + len(joints)))
+        frame_count += len(idle) + len(joints)
+    parts.append(parts[-1][-1:] + rng.normal(0, 1e-5, (120,) + parts[-1].shape[1:]))
+    return np.concatenate(parts), ranges
+
+
+@pytest.mark.parametrize('batch_size', [1, 7, 64, 1000])
+def test_streamed_segments_equal_batch_segments(gestures, batch_size):
+    joints, _ = create_recording(gestures)
+    segmenter = GestureSegmenter()
+    expected = segmenter.segment(joints)
+
+    segments = []
+    for start in range(0, len(joints), batch_size):
+        segments += segmenter.process(joints[start:start + batch_size])
+    segments += segmenter.finish()
+    assert segments == expected
+
+
+def test_segments_are_found_within_the_gestures(gestures):
+    joints, ranges = create_recording(gestures)
+    segments = GestureSegmenter().segment(joints)
+    # a gesture may pause within itself, so it may be split, but every segment is within a gesture and its padding
+    for (start, end) in segments:
+        assert any(gesture_start - 10 <= start and end <= gesture_end + 10 for (gesture_start, gesture_end) in ranges)
+    for (gesture_start, gesture_end) in ranges:
+        assert any(start < gesture_end and gesture_start < end for (start, end) in segments)
+
+
+def test_idle_recording_has_no_segment():
+    joints = np.random.default_rng(1).normal(0, 1e-5, (500, 24, 3))
+    assert GestureSegmenter().segment(joints) == []
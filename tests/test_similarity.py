@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from recognition import _banded_dtw
+from similarity import GestureSimilarity
+
+
+def get_brute_force(sequences: np.ndarray, metric: str, band: int) -> np.ndarray:
+    count = len(sequences)
+    matrix = np.zeros((count, count))
+    for row in range(count):
+        for column in range(count):
+            if row == column:
+                continue
+            if metric == 'euclidean':
+                matrix[row, column] = np.sqrt(np.sum((sequences[row] - sequences[column]) ** 2))
+            else:
+                matrix[row, column] = np.sqrt(_banded_dtw(sequences[row], sequences[column:column + 1], band)[0])
+    return matrix
+
+
+@pytest.mark.parametrize('metric, tile_size', [('euclidean', 32), ('euclidean', 3), ('dtw', 4)])
+def test_matrix_matches_brute_force(gestures, metric, tile_size):
+    sequences, labels, band = GestureSimilarity.get_sequences(gestures, length=32)
+    matrix, matrix_labels = GestureSimilarity.compute_matrix(gestures, metric, length=32, tile_size=tile_size)
+    assert matrix_labels == labels
+    np.testing.assert_allclose(matrix, get_brute_force(sequences, metric, band), atol=1e-6)
+    np.testing.assert_array_equal(matrix, matrix.T)
+
+
+def test_condensed_matrix_of_worker_processes_equals_the_dense_matrix(gestures):
+    progress = []
+    matrix, _ = GestureSimilarity.compute_matrix(gestures, 'dtw', length=16, tile_size=5)
+    condensed, _ = GestureSimilarity.compute_matrix(gestures, 'dtw', length=16, workers=2, tile_size=5,
+                                                    condensed=True, progress=lambda done, total: progress.append(done))
+    np.testing.assert_allclose(condensed, matrix[np.triu_indices(len(matrix), k=1)])
+    tile_count = len(GestureSimilarity.get_tiles(len(matrix), 5))
+    assert progress == list(range(1, tile_count + 1))
+
+
+def test_unknown_metric_is_rejected(gestures):
+    with pytest.raises(ValueError):
+        GestureSimilarity.compute_matrix(gestures, 'cosine')
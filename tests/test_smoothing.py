@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from smoothing import BatchSmoother, ExponentialFilter, OneEuroFilter
+
+
+def reflected_butterworth(values: np.ndarray, cutoff: float, order: int) -> np.ndarray:
+    """ Butterworth filtering of a recording extended by its point reflection far beyond the response of the filter,
+    with the frame rate of one """
+    extended = values
+    while len(extended) < 64 * len(values) + 4096:  # the recording stays in the middle of the extension
+        extended = np.concatenate([2 * extended[:1] - extended[:0:-1], extended,
+                                   2 * extended[-1:] - extended[-2::-1]])
+    start = (len(extended) - len(values)) // 2
+    frequencies = np.fft.rfftfreq(len(extended))
+    ratio = np.tan(np.pi * frequencies) / np.tan(np.pi * cutoff)
+    gain = (1 / (1 + ratio ** (2 * order))).reshape((-1,) + (1,) * (values.ndim - 1))
+    return np.fft.irfft(np.fft.rfft(extended, axis=0) * gain, n=len(extended), axis=0)[start:start + len(values)]
+
+
+@pytest.mark.parametrize('frame_count', [2, 3, 5, 20, 101])
+@pytest.mark.parametrize('method, parameters', [('savitzky_golay', {}), ('savitzky_golay', {'polyorder': 1}),
+                                                ('butterworth', {}), ('butterworth', {'order': 4, 'cutoff': 0.05})])
+def test_constant_and_linear_movements_are_kept(frame_count, method, parameters):
+    frames = np.arange(frame_count, dtype=np.float64)
+    values = np.stack([np.full(frame_count, 3.5), 0.25 * frames - 1, -2 * frames], axis=1)
+    np.testing.assert_allclose(BatchSmoother.smooth(values, method, **parameters), values, atol=1e-9)
+
+
+@pytest.mark.parametrize('frame_count', [5, 20, 64, 333])
+@pytest.mark.parametrize('order, cutoff', [(2, 0.1), (4, 0.05), (1, 0.3)])
+def test_butterworth_matches_a_far_reflected_extension(frame_count, order, cutoff):
+    values = np.random.default_rng(frame_count).normal(size=(frame_count, 4, 3)).cumsum(axis=0)
+    np.testing.assert_allclose(BatchSmoother.butterworth(values, cutoff, order=order),
+                               reflected_butterworth(values, cutoff, order), atol=1e-9)
+
+
+def test_butterworth_removes_high_frequencies():
+    frames = np.arange(200)
+    slow, fast = np.sin(2 * np.pi * 0.01 * frames), 0.5 * np.sin(2 * np.pi * 0.4 * frames)
+    smoothed = BatchSmoother.butterworth(slow + fast, cutoff=0.1)
+    assert np.abs(smoothed - slow)[20:-20].max() < 0.01
+
+
+@pytest.mark.parametrize('window_length, polyorder', [(5, 2), (9, 3), (7, 6), (11, 0)])
+def test_savitzky_golay_reproduces_polynomials_up_to_its_order(window_length, polyorder):
+    frames = np.linspace(-1, 1, 40)
+    coefficients = np.random.default_rng(window_length).normal(size=(polyorder + 1, 2))
+    values = np.stack([np.polyval(coefficients[:, column], frames) for column in range(2)], axis=1)
+    np.testing.assert_allclose(BatchSmoother.savitzky_golay(values, window_length, polyorder), values, atol=1e-9)
+
+
+@pytest.mark.parametrize('method', BatchSmoother.get_methods())
+def test_batch_smoothers_keep_missing_values_missing(method):
+    values = np.random.default_rng(0).normal(size=(30, 5, 3)).cumsum(axis=0)
+    values[[3, 4, 17], 2] = np.nan
+    values[:, 4] = np.nan
+    smoothed = BatchSmoother.smooth(values, method)
+    np.testing.assert_array_equal(np.isnan(smoothed), np.isnan(values))
+
+
+@pytest.mark.parametrize('create_filter', [lambda: ExponentialFilter(0.3), lambda: OneEuroFilter()])
+def test_streaming_filters_skip_missing_joints(create_filter):
+    values = np.random.default_rng(1).normal(size=(25, 4, 3)).cumsum(axis=0)
+    missing_frames = [0, 6, 7, 12]
+    with_missing = values.copy()
+    with_missing[missing_frames, 1] = np.nan
+
+    filtered = create_filter().filter(with_missing)
+    assert np.isnan(filtered[missing_frames, 1]).all()
+    assert not np.isnan(np.delete(filtered, missing_frames, axis=0)).any()
+    # a joint missing in a frame leaves its state unchanged, as if the frame had not been there for the joint
+    present = [frame for frame in range(len(values)) if frame not in missing_frames]
+    np.testing.assert_allclose(filtered[present, 1], create_filter().filter(values[present, 1:2])[:, 0])
+    # other joints are not affected
+    np.testing.assert_allclose(np.delete(filtered, 1, axis=1), create_filter().filter(np.delete(values, 1, axis=1)))
+
+
+def test_a_missing_coordinate_of_the_exponential_filter_leaves_the_others():
+    exponential_filter = ExponentialFilter(0.5)
+    exponential_filter.filter_frame(np.array([0.0, 0.0, 0.0]))
+    filtered = exponential_filter.filter_frame(np.array([2.0, np.nan, 4.0]))
+    np.testing.assert_array_equal(filtered[[0, 2]], [1.0, 2.0])
+    assert np.isnan(filtered[1])
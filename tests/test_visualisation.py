@@ -0,0 +1,35 @@
+import matplotlib
+import numpy as np
+import pytest
+
+from models.frame import Frame
+from models.gesture import Gesture
+from models.gestures import Gestures
+from models.hand_frames import HandFrames
+from visualisation import Visualization
+
+# 'visualisation' selects TkAgg, figures are drawn without a display here
+matplotlib.use('Agg')
+
+
+def create_gestures() -> Gestures:
+    gestures = Gestures()
+    gestures.add_gesture(Gesture('Gesture 1'))  # a gesture without any frame
+    gesture = Gesture('Gesture 2')
+    gesture.set_hand_frames(HandFrames('R', np.zeros((3, 3)), np.zeros((3, len(Frame.get_joint_names()), 3))))
+    gestures.add_gesture(gesture)
+    return gestures
+
+
+def test_dashboard_rejects_gestures_without_frames():
+    with pytest.raises(ValueError):
+        Visualization.create_dashboard(['Gesture 1', 'Gesture 3'], create_gestures())
+
+
+def test_dashboard_skips_gestures_without_frames():
+    fig, line_ani, controls = Visualization.create_dashboard(['Gesture 1', 'Gesture 2'], create_gestures())
+    assert [ax.get_title() for ax in fig.axes if ax.name == '3d'] == ['Gesture 2']
+    first_frame = controls['state']['frame']
+    for _ in range(4):
+        line_ani._func(None)  # a tick of the shared timer
+    assert controls['state']['frame'] == (first_frame + 4) % 3
@@ -2,12 +2,14 @@ import matplotlib;
 
 import matplotlib;
 
+from models.gesture import Gesture
 from models.gestures import Gestures
 
 matplotlib.use("TkAgg")
 import numpy as np
 from matplotlib import pyplot as plt, animation
 
+from instrumentation import instrumented
 from models.frame import Frame
 
 
@@ -65,6 +67,60 @@ class Visualization:
         return np.stack((finger_x, finger_y, finger_z))
 
     @classmethod
+    def precompute_line_data(cls, gesture: Gesture) -> dict:
+        """ Computing line coordinates of every finger in every frame of a gesture at once
+        Parameters:
+            gesture(Gesture) : a gesture to animate
+
+        Returns:
+            dict : an array of shape (frames, 3, joints + 1) for each finger of each hand side
+                   e.g {'R': {'THUMB': array, ..}, 'L': {..}}, a hand side without frames is left out
+
+        it computes the same coordinates as '__generate_finger_line_data' does for a single frame, but for all
+        frames with one array operation per finger. Row zero of each frame is X, row one is Y and row two is Z,
+        and the first column is the wrist
+        """
+        line_data = dict()
+        for (hand_side, hand_frame_data) in gesture.get_frames_data_in_dict().items():
+            if len(hand_frame_data) > 0:
+                hand_frames = gesture.get_hand_frames(hand_side)
+                # shape (frames, 1, 3) to broadcast the wrist position over the joints of each frame
+                wrist_position = hand_frames.get_root_pos()[:, np.newaxis, :].astype(np.float64)
+                finger_lines = dict()
+                for finger in cls.__FINGER_LIST:
+                    finger_joints, _ = hand_frames.select_fingers([finger])
+                    # the reason for subtracting each coordinate from wrist_position is that the wrist is a root
+                    # for all fingers
+                    points = np.concatenate((wrist_position, wrist_position - finger_joints), axis=1)
+                    finger_lines.update({finger: np.ascontiguousarray(points.transpose(0, 2, 1))})
+                line_data.update({hand_side: finger_lines})
+        return line_data
+
+    @classmethod
+    @instrumented('Visualization.update_precomputed')
+    def update_precomputed(cls, frame_index, hand_finger, line_data) -> list:
+        """ This method updates each Line2Ds from precomputed line coordinates
+        Parameters:
+            frame_index(int) : index of the frame to draw, starting from zero,
+            hand_finger(dict) : a list of Line2D of each fingers for each hand side,
+            line_data(dict) : line coordinates of each finger for each hand side from 'precompute_line_data'
+
+        Returns:
+            list : every updated Line2D, which is required for blitting
+
+        the last frame of a hand side is kept when the other hand side has more frames
+        """
+        updated_lines = []
+        for (hand, finger_lines) in line_data.items():
+            for (finger, finger_line_data) in finger_lines.items():
+                finger_graph_data = finger_line_data[min(frame_index, len(finger_line_data) - 1)]
+                hand_finger[hand][finger].set_data(finger_graph_data[:2, :])  # (finger_x, finger_y)
+                hand_finger[hand][finger].set_3d_properties(finger_graph_data[2, :])  # (finger_z)
+                updated_lines.append(hand_finger[hand][finger])
+        return updated_lines
+
+    @classmethod
+    @instrumented('Visualization.update')
     def update(cls, frame_number, hand_finger, all_frames):
         """ This method updates each Line2Ds to generate animation of fingers
         Parameters:
@@ -89,16 +145,136 @@ class Visualization:
                     hand_finger[hand][finger].set_3d_properties(finger_graph_data[2, :])  # (finger_z)
 
     @classmethod
-    def animate_hand_gesture(cls, gesture_name: str, gesture_list: Gestures):
+    def create_dashboard(cls, gesture_names: list, gesture_list: Gestures, columns: int = None,
+                         interval: int = 100) -> tuple:
+        """ This method draws several gestures in one figure driven by a single animation
+        Parameters:
+            gesture_names(list) : gesture names to animate, names not in the gesture list and gestures without
+                                  any frame are skipped,
+            gesture_list(Gestures) : a list of gestures,
+            columns(int) : the number of subplots in a row, about the square root of the number of gestures if None,
+            interval(int) : milliseconds between frames
+
+        Returns:
+            tuple : (figure, animation, controls) where controls is a dictionary of the widgets, which should be
+                    kept referenced as long as the figure is shown
+
+        line coordinates of every gesture are precomputed once (see 'precompute_line_data') and a Line2D of each
+        finger of each hand side is created once per subplot, then a single FuncAnimation updates every subplot
+        and only the updated artists are redrawn (blitting). All gestures share one frame counter, a gesture shorter
+        than the longest one keeps its last frame. A play/pause button (or the space key) and a slider (or the left
+        and right keys) control the shared frame counter
+        """
+        from matplotlib.widgets import Button, Slider
+
+        all_gestures = gesture_list.get_list_of_gesture()
+        # a gesture without frames would leave the shared frame counter without any frame to count
+        gesture_names = [gesture_name for gesture_name in gesture_names if gesture_name in all_gestures.keys()
+                         and any(len(frames) > 0 for frames in all_gestures[gesture_name].get_frames_data_in_list())]
+        if len(gesture_names) == 0:
+            raise ValueError('none of the gesture names is in the gesture list with frames')
+        if columns is None:
+            columns = int(np.ceil(np.sqrt(len(gesture_names))))
+        rows = int(np.ceil(len(gesture_names) / columns))
+
+        fig = plt.figure(figsize=(4 * columns, 4 * rows + 0.6))
+        fig.subplots_adjust(left=0.02, right=0.98, top=0.95, bottom=0.12, wspace=0.05, hspace=0.1)
+        # (hand_finger, line_data) of each subplot, where hand_finger is a dictionary to store a Line2D
+        # of each fingers for each hand side
+        subplot_data = []
+        frame_number = 0
+        for (index, gesture_name) in enumerate(gesture_names):
+            line_data = cls.precompute_line_data(gesture_list.get_list_of_gesture()[gesture_name])
+            ax = fig.add_subplot(rows, columns, index + 1, projection='3d')
+            ax.set_title(gesture_name, fontsize=10)
+            hand_finger = dict()
+            for (hand_side, finger_line_data) in line_data.items():
+                finger_lines = dict()
+                for finger in cls.__FINGER_LIST:
+                    finger_graph_data = finger_line_data[finger][0]
+                    line, = ax.plot(finger_graph_data[0, :], finger_graph_data[1, :], finger_graph_data[2, :],
+                                    'o-', label=hand_side + '_' + finger, lw=1.5, markersize=2)
+                    finger_lines.update({finger: line})
+                hand_finger.update({hand_side: finger_lines})
+                frame_number = max(frame_number, len(finger_line_data[cls.__FINGER_LIST[0]]))
+            # Setting the axes properties in the same way as 'animate_hand_gesture'
+            ax.set_xlim3d([0, 0.5])
+            ax.set_ylim3d([0.8, 1.3])
+            ax.set_zlim3d([0.2, 0.4])
+            ax.set_xticklabels([])
+            ax.set_yticklabels([])
+            ax.set_zticklabels([])
+            subplot_data.append((hand_finger, line_data))
+
+        # 'state' is the shared frame counter and whether the animation is playing
+        state = {'frame': 0, 'playing': True}
+        play_ax = fig.add_axes([0.02, 0.02, 0.08, 0.05])
+        play_button = Button(play_ax, 'Pause')
+        slider_ax = fig.add_axes([0.2, 0.03, 0.7, 0.03])
+        slider = Slider(slider_ax, 'Frame', 0, max(frame_number - 1, 1), valinit=0, valstep=1, valfmt='%d')
+        # the slider is moved by each frame without a full redraw, its changed artists are blitted with the lines
+        slider.drawon = False
+        slider_artists = [slider.poly, slider.valtext] + list(slider_ax.lines)
+
+        def update_dashboard(_):
+            if state['playing']:
+                state['frame'] = (state['frame'] + 1) % frame_number
+            updated_artists = []
+            for (hand_finger, line_data) in subplot_data:
+                updated_artists += cls.update_precomputed(state['frame'], hand_finger, line_data)
+            slider.eventson = False  # moving the slider here is not a scrub
+            slider.set_val(state['frame'])
+            slider.eventson = True
+            return updated_artists + slider_artists
+
+        def on_scrub(value):
+            state['frame'] = int(value)
+
+        def on_play(_):
+            state['playing'] = not state['playing']
+            play_button.label.set_text('Pause' if state['playing'] else 'Play')
+            fig.canvas.draw_idle()
+
+        def on_key(event):
+            if event.key == ' ':
+                on_play(event)
+            elif event.key in ('left', 'right'):
+                state['frame'] = (state['frame'] + (1 if event.key == 'right' else -1)) % frame_number
+
+        slider.on_changed(on_scrub)
+        play_button.on_clicked(on_play)
+        fig.canvas.mpl_connect('key_press_event', on_key)
+
+        # a single timer drives every subplot, frames are counted by 'state' so the frames argument is unbounded
+        line_ani = animation.FuncAnimation(fig, update_dashboard, interval=interval, blit=True,
+                                           cache_frame_data=False)
+        return fig, line_ani, {'play_button': play_button, 'slider': slider, 'state': state}
+
+    @classmethod
+    def animate_dashboard(cls, gesture_names: list, gesture_list: Gestures, columns: int = None,
+                          interval: int = 100):
+        """ This method shows several gestures in one window, see 'create_dashboard'
+
+        Returns:
+            void
+        """
+        fig, line_ani, controls = cls.create_dashboard(gesture_names, gesture_list, columns, interval)
+        plt.show()
+
+    @classmethod
+    def animate_hand_gesture(cls, gesture_name: str, gesture_list: Gestures, fast: bool = False):
         """ This method is a main method to do gesture animation
         Parameters:
             gesture_name(str) : a gesture name to animate,
-            gesture_list(list) : a list of gestures
+            gesture_list(list) : a list of gestures,
+            fast(bool) : True to precompute line coordinates of all frames once and animate with blitting
 
         Returns:
             void
 
-        this method is to animate a gesture for a given gesture name
+        this method is to animate a gesture for a given gesture name.
+        In fast mode each animation tick only indexes into the precomputed coordinates
+        (see 'precompute_line_data' and 'update_precomputed') and only the finger lines are redrawn
         """
         # checking if a gesture name is actually in a given list of gestures
         if gesture_name in gesture_list.get_list_of_gesture().keys():
@@ -112,21 +288,34 @@ class Visualization:
             # hand_finger is a dictionary to store a Line2D of each fingers for each hand side,
             hand_finger = dict()
 
-            # all_frames has all frames data of each hand side
-            for each_hand_side_frame_data in all_frames:
-                # check if a gesture has a frame data for each hand sides
-                if len(each_hand_side_frame_data) > 0:
-                    first_frame = each_hand_side_frame_data[0]
-                    hand_side = first_frame.hand_type
-                    # finger_lines is a dictionary to store a Line2D of each fingers
+            if fast:
+                line_data = cls.precompute_line_data(a_gesture)
+                for (hand_side, finger_line_data) in line_data.items():
                     finger_lines = dict()
-                    # for each finger, draw an initial line, and store a Line2D data of each finger into finger_line dict
                     for finger in cls.__FINGER_LIST:
-                        finger_graph_data = cls.__generate_finger_line_data(first_frame, finger)
+                        finger_graph_data = finger_line_data[finger][0]
                         line, = ax.plot(finger_graph_data[0, :], finger_graph_data[1, :], finger_graph_data[2, :],
                                         'o-', label=finger, lw=2)
                         finger_lines.update({finger: line})
                     hand_finger.update({hand_side: finger_lines})
+                frame_number = max([len(finger_line_data[cls.__FINGER_LIST[0]])
+                                    for finger_line_data in line_data.values()] + [0])
+            else:
+                # all_frames has all frames data of each hand side
+                for each_hand_side_frame_data in all_frames:
+                    # check if a gesture has a frame data for each hand sides
+                    if len(each_hand_side_frame_data) > 0:
+                        first_frame = each_hand_side_frame_data[0]
+                        hand_side = first_frame.hand_type
+                        # finger_lines is a dictionary to store a Line2D of each fingers
+                        finger_lines = dict()
+                        # for each finger, draw an initial line, and store a Line2D data of each finger into finger_line dict
+                        for finger in cls.__FINGER_LIST:
+                            finger_graph_data = cls.__generate_finger_line_data(first_frame, finger)
+                            line, = ax.plot(finger_graph_data[0, :], finger_graph_data[1, :], finger_graph_data[2, :],
+                                            'o-', label=finger, lw=2)
+                            finger_lines.update({finger: line})
+                        hand_finger.update({hand_side: finger_lines})
 
             labels = []
             visibility = []
@@ -151,8 +340,12 @@ class Visualization:
 
             check.on_clicked(func)
 
-            line_ani = animation.FuncAnimation(fig, cls.update, frame_number,
-                                               fargs=(hand_finger, all_frames), interval=100, blit=False)
+            if fast:
+                line_ani = animation.FuncAnimation(fig, cls.update_precomputed, frame_number,
+                                                   fargs=(hand_finger, line_data), interval=100, blit=True)
+            else:
+                line_ani = animation.FuncAnimation(fig, cls.update, frame_number,
+                                                   fargs=(hand_finger, all_frames), interval=100, blit=False)
 
             # Setting the axes properties
             ax.set_xlabel('X')
@@ -0,0 +1,204 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from matplotlib import animation
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from models.gestures import Gestures
+from visualisation import Visualization
+
+
+class VisualizationExport:
+    """ This is a class to render gesture animations into files without any display.
+    Figures are drawn by the Agg canvas directly instead of pyplot, so the interactive backend selected by
+    Visualization is never used, and rendering runs on servers without a display.
+
+    A gesture is written as an animated GIF, an MP4 video (which requires ffmpeg) or a sequence of PNG images.
+    Gestures, and chunks of frames of a PNG sequence, are rendered in a process pool, and only precomputed line
+    coordinates (see 'Visualization.precompute_line_data') are sent to the worker processes.
+    In the program, all methods are class methods, and therefore this class will NOT be instantiated.
+    """
+
+    # these variables are set as a private constant to encapsulate the access to the variable.
+    # '__FORMATS' represents each supported output format, and '__FPS' matches the 100 ms interval of Visualization
+    __GIF_FORMAT = 'gif'
+    __MP4_FORMAT = 'mp4'
+    __PNG_FORMAT = 'png'
+    __FORMATS = (__GIF_FORMAT, __MP4_FORMAT, __PNG_FORMAT)
+    __FPS = 10
+
+    @classmethod
+    def get_formats(cls) -> tuple:
+        return cls.__FORMATS
+
+    @classmethod
+    def __create_figure(cls, gesture_name: str, line_data: dict, dpi: int) -> tuple:
+        """ Creating a figure on the Agg canvas with a Line2D for each finger of each hand side
+
+        Returns:
+            tuple : (figure, hand_finger) where hand_finger is a dictionary of Line2D of each fingers for each hand side
+        """
+        fig = Figure(dpi=dpi)
+        FigureCanvasAgg(fig)
+        fig.suptitle(gesture_name, fontsize=16)
+        ax = fig.add_subplot(projection='3d')
+
+        hand_finger = dict()
+        for (hand_side, finger_line_data) in line_data.items():
+            finger_lines = dict()
+            for (finger, finger_graph_data) in finger_line_data.items():
+                line, = ax.plot(finger_graph_data[0, 0, :], finger_graph_data[0, 1, :], finger_graph_data[0, 2, :],
+                                'o-', label=hand_side + '_' + finger, lw=2)
+                finger_lines.update({finger: line})
+            hand_finger.update({hand_side: finger_lines})
+
+        # Setting the axes properties in the same way as Visualization.animate_hand_gesture
+        ax.set_xlabel('X')
+        ax.set_xlim3d([0, 0.5])
+        ax.set_ylabel('Y')
+        ax.set_ylim3d([0.8, 1.3])
+        ax.set_zlabel('Z')
+        ax.set_zlim3d([0.2, 0.4])
+        ax.legend(loc='upper left', fontsize='small')
+        return fig, hand_finger
+
+    @classmethod
+    def get_frame_count(cls, line_data: dict) -> int:
+        """ Getting the number of frames to render, which is the number of frames of the longest hand side """
+        return max([len(finger_graph_data) for finger_line_data in line_data.values()
+                    for finger_graph_data in finger_line_data.values()] + [0])
+
+    @classmethod
+    def render_line_data(cls, gesture_name: str, line_data: dict, output_path: str, output_format: str,
+                         start: int = 0, stop: int = None, dpi: int = 100) -> str:
+        """ Rendering precomputed line coordinates of a gesture into a file
+        Parameters:
+            gesture_name(str) : a gesture name used as the title,
+            line_data(dict) : line coordinates from 'Visualization.precompute_line_data',
+            output_path(str) : a GIF or MP4 file name, or a directory for a PNG sequence,
+            output_format(str) : 'gif', 'mp4' or 'png',
+            start(int), stop(int) : range of frame indexes to render, only used for a PNG sequence,
+            dpi(int) : resolution of each frame
+
+        Returns:
+            str : output_path
+
+        PNG files are named after their frame number, e.g 'frame_00001.png', so that chunks of a sequence
+        rendered by different processes end up in one directory in the right order
+        """
+        if output_format not in cls.__FORMATS:
+            raise ValueError(f'{output_format} is not one of {cls.__FORMATS}')
+        fig, hand_finger = cls.__create_figure(gesture_name, line_data, dpi)
+        frame_count = cls.get_frame_count(line_data)
+
+        if output_format == cls.__PNG_FORMAT:
+            os.makedirs(output_path, exist_ok=True)
+            for frame_index in range(start, frame_count if stop is None else min(stop, frame_count)):
+                Visualization.update_precomputed(frame_index, hand_finger, line_data)
+                fig.savefig(os.path.join(output_path, f'frame_{frame_index + 1:05d}.png'))
+            return output_path
+
+        if output_format == cls.__GIF_FORMAT:
+            writer = animation.PillowWriter(fps=cls.__FPS)
+        else:
+            writer = animation.FFMpegWriter(fps=cls.__FPS)
+        with writer.saving(fig, output_path, dpi):
+            for frame_index in range(frame_count):
+                Visualization.update_precomputed(frame_index, hand_finger, line_data)
+                writer.grab_frame()
+        return output_path
+
+    @classmethod
+    def export_gestures(cls, gesture_list: Gestures, output_dir: str, output_format: str = 'gif',
+                        gesture_names: list = None, workers: int = 1, frames_per_task: int = None,
+                        dpi: int = 100) -> list:
+        """ Rendering gestures into files in a process pool
+        Parameters:
+            gesture_list(Gestures) : all gesture data,
+            output_dir(str) : a directory to write files in,
+            output_format(str) : 'gif', 'mp4' or 'png',
+            gesture_names(list) : names of gestures to render, every gesture if it is None,
+            workers(int) : the number of processes, 1 renders in this process and 0 or less uses every CPU,
+            frames_per_task(int) : the number of frames rendered by a task for a PNG sequence,
+                                   a whole gesture is a task if it is None,
+            dpi(int) : resolution of each frame
+
+        Returns:
+            list : paths written, a gesture which could not be rendered is reported to stderr and left out
+
+        each gesture is written to '<output_dir>/<gesture name>.<format>' or to a '<output_dir>/<gesture name>'
+        directory for a PNG sequence, spaces in a gesture name are replaced with underscores
+        """
+        if output_format not in cls.__FORMATS:
+            raise ValueError(f'{output_format} is not one of {cls.__FORMATS}')
+        if gesture_names is None:
+            gesture_names = list(gesture_list.get_list_of_gesture().keys())
+        os.makedirs(output_dir, exist_ok=True)
+
+        # each task is (gesture name, line data, output path, format, start, stop, dpi)
+        tasks = []
+        for gesture_name in gesture_names:
+            line_data = Visualization.precompute_line_data(gesture_list.get_list_of_gesture()[gesture_name])
+            output_path = os.path.join(output_dir, gesture_name.replace(' ', '_'))
+            if output_format != cls.__PNG_FORMAT:
+                tasks.append((gesture_name, line_data, output_path + '.' + output_format, output_format, 0, None, dpi))
+                continue
+            frame_count = cls.get_frame_count(line_data)
+            chunk = frame_count if frames_per_task is None else max(1, frames_per_task)
+            for start in range(0, frame_count, max(chunk, 1)):
+                tasks.append((gesture_name, line_data, output_path, output_format, start, start + chunk, dpi))
+
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        if workers == 1 or len(tasks) <= 1:
+            results = map(_render_task, tasks)
+            return cls.__collect_results(tasks, results)
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            return cls.__collect_results(tasks, executor.map(_render_task, tasks))
+
+    @classmethod
+    def __collect_results(cls, tasks: list, results) -> list:
+        """ Collecting written paths in the order of tasks and reporting failed tasks to stderr """
+        written_paths = []
+        for (task, (output_path, error_message)) in zip(tasks, results):
+            if error_message is not None:
+                print(f'{error_message}: {task[0]} could not be rendered', file=sys.stderr)
+            elif output_path not in written_paths:
+                written_paths.append(output_path)
+        return written_paths
+
+
+def _render_task(task: tuple) -> tuple:
+    """ Rendering a task of 'VisualizationExport.export_gestures', it runs in a worker process
+
+    Returns:
+        tuple : (output path, None) or (None, error message) when the task failed
+    """
+    try:
+        return VisualizationExport.render_line_data(*task), None
+    except Exception as e:
+        return None, f'{e}'
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import main
+
+    parser = argparse.ArgumentParser(description='Render hand gesture animations into files without a display')
+    parser.add_argument('output_dir')
+    parser.add_argument('--format', default='gif', choices=VisualizationExport.get_formats())
+    parser.add_argument('--gestures', nargs='*', help='gesture names e.g "Gesture 1", every gesture by default')
+    parser.add_argument('--workers', type=int, default=0, help='number of processes, 0 uses every CPU')
+    parser.add_argument('--frames-per-task', type=int, default=None, help='chunk size of a PNG sequence')
+    parser.add_argument('--dpi', type=int, default=100)
+    arguments = parser.parse_args()
+
+    output_dir = os.path.abspath(arguments.output_dir)
+    all_gestures_data = main.read_data_files(workers=arguments.workers)
+    for path in VisualizationExport.export_gestures(all_gestures_data, output_dir, arguments.format,
+                                                    arguments.gestures, arguments.workers,
+                                                    arguments.frames_per_task, arguments.dpi):
+        print(path)